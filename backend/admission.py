@@ -0,0 +1,129 @@
+"""
+Control de admisión para los endpoints de inferencia
+Limita las inferencias concurrentes, mantiene una cola de espera acotada y
+rechaza rápido (429/503 con Retry-After) cuando el servidor está saturado,
+en lugar de dejar que los hilos se acumulen sobre el modelo y la latencia
+crezca sin límite
+
+Cada solicitud trae (o recibe por defecto) un deadline; si vence mientras
+espera en la cola se descarta antes de llegar a la inferencia
+"""
+
+import math
+import threading
+import time
+
+class AdmissionRejected(Exception):
+	"""
+	Solicitud rechazada por el control de admisión
+	"""
+
+	def __init__(self, status, reason, retry_after):
+		super().__init__(reason)
+		self.status = status
+		self.reason = reason
+		self.retry_after = retry_after
+
+	def __reduce__(self):
+		# Permite devolver el rechazo desde un proceso del executor asíncrono
+		return (AdmissionRejected, (self.status, self.reason, self.retry_after))
+
+class AdmissionController:
+	"""
+	Semáforo de `max_concurrent` plazas + cola de espera de `max_queue`
+	solicitudes como máximo, cada una esperando `max_wait` segundos como mucho
+	"""
+
+	def __init__(self, max_concurrent, max_queue, max_wait):
+		self.max_concurrent = max_concurrent
+		self.max_queue = max_queue
+		self.max_wait = max_wait
+
+		self._slots = threading.BoundedSemaphore(max_concurrent)
+		self._lock = threading.Lock()
+		self.active = 0
+		self.waiting = 0
+		self.admitted = 0
+		self.shed_queue_full = 0
+		self.shed_timeout = 0
+		self.expired = 0
+		# Tiempo medio de servicio (media móvil exponencial) para estimar Retry-After
+		self.service_time = 0.05
+
+	def retry_after(self):
+		"""
+		Segundos estimados hasta que se vacíe la cola actual (mínimo 1)
+		"""
+		backlog = (self.waiting + self.active) / self.max_concurrent
+		return max(1, math.ceil(backlog * self.service_time))
+
+	def acquire(self, deadline=None):
+		"""
+		Reserva una plaza de inferencia o lanza AdmissionRejected
+
+		Args:
+			deadline: Instante límite (time.monotonic) de la solicitud o None
+
+		Returns:
+			Instante en que se obtuvo la plaza (se pasa a release)
+		"""
+		if not self._slots.acquire(blocking=False):
+			with self._lock:
+				if self.waiting >= self.max_queue:
+					self.shed_queue_full += 1
+					raise AdmissionRejected(429, 'Cola de inferencia llena', self.retry_after())
+				self.waiting += 1
+
+			timeout = self.max_wait
+			if deadline is not None:
+				timeout = min(timeout, deadline - time.monotonic())
+			acquired = timeout > 0 and self._slots.acquire(timeout=timeout)
+
+			with self._lock:
+				self.waiting -= 1
+				if not acquired:
+					if deadline is not None and time.monotonic() >= deadline:
+						self.expired += 1
+						raise AdmissionRejected(503, 'Deadline de la solicitud vencido en la cola', self.retry_after())
+					self.shed_timeout += 1
+					raise AdmissionRejected(503, 'Tiempo de espera en la cola agotado', self.retry_after())
+
+		# Plaza obtenida pero el deadline ya venció: no vale la pena inferir
+		if deadline is not None and time.monotonic() >= deadline:
+			self._slots.release()
+			with self._lock:
+				self.expired += 1
+			raise AdmissionRejected(503, 'Deadline de la solicitud vencido antes de la inferencia', self.retry_after())
+
+		with self._lock:
+			self.active += 1
+			self.admitted += 1
+		return time.monotonic()
+
+	def release(self, started):
+		with self._lock:
+			self.active -= 1
+			self.service_time = 0.9 * self.service_time + 0.1 * (time.monotonic() - started)
+		self._slots.release()
+
+	def record_expired(self):
+		"""
+		Cuenta una solicitud descartada por deadline después de ser admitida
+		"""
+		with self._lock:
+			self.expired += 1
+
+	def snapshot(self):
+		with self._lock:
+			return {
+				'max_concurrent': self.max_concurrent,
+				'max_queue': self.max_queue,
+				'max_wait_ms': int(self.max_wait * 1000),
+				'active': self.active,
+				'queue_depth': self.waiting,
+				'admitted': self.admitted,
+				'shed_queue_full': self.shed_queue_full,
+				'shed_timeout': self.shed_timeout,
+				'expired': self.expired,
+				'avg_service_ms': round(self.service_time * 1000, 3)
+			}
@@ -3,15 +3,30 @@ API REST Flask para predicción de riesgo de cáncer de hígado
 Sirve el modelo entrenado y maneja las solicitudes de predicción
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response, make_response, g, has_request_context
 from flask_cors import CORS
 import numpy as np
-import pandas as pd
-import tensorflow as tf
-import pickle
+import csv
 import json
+import hmac
 import os
+import time
+import uuid
 from datetime import datetime
+from functools import wraps
+from admission import AdmissionController, AdmissionRejected
+from artifact_manifest import ArtifactVerificationError, verify_artifacts
+from json_provider import create_json_provider, numpy_to_builtin
+from static_assets import StaticAssetCache
+from decision_policy import DecisionPolicy
+from drift_monitor import DriftMonitor
+from ood_detector import OODDetector
+from preprocessing import build_encoders, load_preprocessing
+from profiling import SamplingProfiler, RequestTrace, NO_TRACE
+from reference_profile import load_reference_profile
+from request_logging import RequestLogger, setup_logging
+from shared_weights import SharedWeightsModel
+from thread_config import apply_thread_config, configure_tensorflow_threads
 
 # Inicializar Flask
 app = Flask(__name__)
@@ -19,14 +34,120 @@ CORS(app)  # Habilitar CORS para permitir requests del frontend
 
 # Variables globales para el modelo y preprocessors
 model = None
+model_backend = None
 scaler = None
 feature_metadata = None
 encoders = None
+decision_policy = None
+
+# Línea base de las explicaciones (media de entrenamiento) y su predicción, cacheadas al cargar
+explain_baseline = None
+explain_base_value = None
+
+# Valores por defecto de cada feature para los barridos what-if, precalculados al cargar
+whatif_default_grids = None
+
+# Monitor de drift alimentado por /predict (None si no hay perfil de referencia)
+drift_monitor = None
+
+# Detector de entradas fuera de distribución (None si no hay perfil de referencia)
+ood_detector = None
+
+# Afinidad de CPU e hilos nativos efectivos del proceso (se fijan al cargar el modelo)
+thread_settings = None
+
+# Resultado de verificar los artefactos cargados contra run_manifest.json
+artifact_status = None
 
 # Ruta absoluta a la carpeta del frontend (../frontend respecto a este archivo)
 FRONTEND_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend'))
 DATA_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
 PREDICTIONS_LOG_PATH = os.path.join(DATA_FOLDER, 'predictions_log.csv')
+# Columna del CSV que se completa a mano con el diagnóstico confirmado
+PREDICTIONS_LOG_LABEL_COLUMN = 'liver_cancer'
+
+# Backend de inferencia elegido al iniciar: 'keras' (tf.keras), 'onnx' (ONNX Runtime)
+# o 'mmap' (pesos compartidos entre workers en un archivo mapeado en memoria)
+MODEL_BACKEND = os.environ.get('MODEL_BACKEND', 'keras').strip().lower()
+# Archivo de pesos del backend 'mmap'; en /dev/shm queda como segmento de memoria compartida
+SHARED_WEIGHTS_PATH = os.environ.get('SHARED_WEIGHTS_PATH', 'saved_models/liver_cancer_weights.bin')
+# Hilos de ONNX Runtime (0 = valor por defecto de ORT)
+ORT_INTRA_OP_THREADS = int(os.environ.get('ORT_INTRA_OP_THREADS', '0'))
+ORT_INTER_OP_THREADS = int(os.environ.get('ORT_INTER_OP_THREADS', '0'))
+# Hilos de TensorFlow (0 = valor por defecto de TF)
+TF_INTRA_OP_THREADS = int(os.environ.get('TF_INTRA_OP_THREADS', '0'))
+TF_INTER_OP_THREADS = int(os.environ.get('TF_INTER_OP_THREADS', '0'))
+# Hilos de OpenMP/MKL/OpenBLAS (0 = no se modifican)
+NATIVE_THREADS = int(os.environ.get('NATIVE_THREADS', '0'))
+# Núcleos a los que se fija el proceso, estilo taskset ('0-3,6'); vacío = sin fijar
+CPU_AFFINITY = os.environ.get('CPU_AFFINITY', '').strip()
+# Verificación de los artefactos contra los hashes de run_manifest.json al cargar:
+# 'warn' (avisar y servir igual), 'strict' (no servir si no coinciden) u 'off'
+ARTIFACT_VERIFY = os.environ.get('ARTIFACT_VERIFY', 'warn').strip().lower()
+ARTIFACT_MANIFEST_PATH = 'saved_models/run_manifest.json'
+
+# Máximo de pacientes aceptados por solicitud en los endpoints que admiten lotes
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', '1000'))
+
+# Barridos what-if: puntos por defecto de cada feature numérica y tamaño máximo de la grilla
+WHATIF_DEFAULT_STEPS = int(os.environ.get('WHATIF_DEFAULT_STEPS', '50'))
+MAX_WHATIF_GRID = int(os.environ.get('MAX_WHATIF_GRID', '10000'))
+
+# Monitor de drift: tamaño de la ventana deslizante y número de sub-ventanas
+DRIFT_MONITOR = os.environ.get('DRIFT_MONITOR', 'true').strip().lower() not in ('0', 'false', 'no')
+DRIFT_WINDOW_SIZE = int(os.environ.get('DRIFT_WINDOW_SIZE', '5000'))
+DRIFT_BUCKETS = int(os.environ.get('DRIFT_BUCKETS', '10'))
+
+# Detección OOD: percentil de la distancia de entrenamiento a partir del cual se marca la entrada
+OOD_CHECK = os.environ.get('OOD_CHECK', 'true').strip().lower() not in ('0', 'false', 'no')
+OOD_THRESHOLD = float(os.environ.get('OOD_THRESHOLD', '0.99'))
+
+# Control de admisión de las inferencias: plazas concurrentes, cola de espera acotada
+# y deadline por defecto de cada solicitud (0 = sin deadline salvo X-Request-Timeout-Ms)
+ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').strip().lower() not in ('0', 'false', 'no')
+MAX_CONCURRENT_INFERENCES = int(os.environ.get('MAX_CONCURRENT_INFERENCES', str(os.cpu_count() or 4)))
+MAX_QUEUE_SIZE = int(os.environ.get('MAX_QUEUE_SIZE', '64'))
+MAX_QUEUE_WAIT_MS = int(os.environ.get('MAX_QUEUE_WAIT_MS', '1000'))
+DEFAULT_REQUEST_TIMEOUT_MS = int(os.environ.get('DEFAULT_REQUEST_TIMEOUT_MS', '0'))
+
+# Token de los endpoints /admin/* (cabecera X-Admin-Token); vacío = endpoints desactivados
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+# Profiler por muestreo: intervalo por defecto y duración máxima de una sesión
+PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '10'))
+PROFILER_MAX_SECONDS = float(os.environ.get('PROFILER_MAX_SECONDS', '300'))
+profiler = SamplingProfiler()
+
+# Logging estructurado: formato ('json' o 'text'), nivel, fracción de solicitudes
+# exitosas que se registran (los errores siempre) y tamaño de la cola del listener
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').strip().lower()
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').strip().upper()
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', '1.0'))
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+request_logger = RequestLogger(app.logger, LOG_SAMPLE_RATE)
+log_handler = None
+log_listener = None
+admission = AdmissionController(
+	MAX_CONCURRENT_INFERENCES, MAX_QUEUE_SIZE, MAX_QUEUE_WAIT_MS / 1000
+) if ADMISSION_CONTROL else None
+
+# Proveedor JSON para parsear/renderizar: 'orjson' (si está instalado) o 'std'
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson').strip().lower()
+app.json = create_json_provider(app, JSON_PROVIDER)
+
+# Assets del frontend precomprimidos en memoria con ETag (desactivar al desarrollar el frontend)
+STATIC_ASSET_CACHE = os.environ.get('STATIC_ASSET_CACHE', 'true').strip().lower() not in ('0', 'false', 'no')
+static_assets = StaticAssetCache(FRONTEND_FOLDER).load() if STATIC_ASSET_CACHE else None
+
+# Tipos MIME aceptados para el formato binario compacto (MessagePack)
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+
+# Rangos válidos de las features numéricas
+NUMERIC_RANGES = {
+	'age': (0, 120),
+	'bmi': (10, 60),
+	'liver_function_score': (0, 100),
+	'alpha_fetoprotein_level': (0, 1000)
+}
 
 def _str_to_bool(value: str) -> bool:
 	"""
@@ -38,37 +159,339 @@ def _str_to_bool(value: str) -> bool:
 	value = str(value).strip().lower()
 	return value in {"true", "1", "yes", "y", "si", "sí"}
 
-def append_prediction_to_csv(row: dict):
+def predictions_log_header():
+	"""
+	Cabecera del CSV de predicciones: la del archivo si ya existe (las filas
+	nuevas se alinean con ella) o la fija de features + liver_cancer + timestamp
+	
+	Returns:
+		(columnas, True si hay que escribir la cabecera)
+	"""
+	try:
+		with open(PREDICTIONS_LOG_PATH, 'r', newline='', encoding='utf-8') as f:
+			header = next(csv.reader(f), None)
+	except FileNotFoundError:
+		header = None
+	if header:
+		return header, False
+	return feature_metadata['feature_names'] + [PREDICTIONS_LOG_LABEL_COLUMN, 'timestamp'], True
+
+def append_prediction_to_csv(row):
 	"""
-	Agrega una fila al CSV de logs de predicciones en data/predictions_log.csv
-	Crea el directorio/archivo si no existe.
+	Agrega una fila (dict) o varias (lista de dicts) al CSV de logs de
+	predicciones en data/predictions_log.csv
+	Crea el directorio/archivo si no existe. La columna liver_cancer queda
+	vacía para completarla con el diagnóstico confirmado (--incremental)
 	"""
 	try:
 		os.makedirs(DATA_FOLDER, exist_ok=True)
-		# Escribir con cabecera sólo si el archivo no existe
-		file_exists = os.path.exists(PREDICTIONS_LOG_PATH)
-		df_row = pd.DataFrame([row])
-		df_row.to_csv(PREDICTIONS_LOG_PATH, mode='a', index=False, header=not file_exists, encoding='utf-8')
-	except Exception as e:
-		app.logger.error(f"No se pudo guardar la predicción en CSV: {e}")
+		rows = row if isinstance(row, list) else [row]
+		fieldnames, write_header = predictions_log_header()
+		with open(PREDICTIONS_LOG_PATH, 'a', newline='', encoding='utf-8') as f:
+			writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+			if write_header:
+				writer.writeheader()
+			writer.writerows(rows)
+	except Exception:
+		app.logger.exception('No se pudo guardar la predicción en CSV', extra=log_context())
+
+def log_context(**fields):
+	"""
+	extra para app.logger con el request_id y la ruta de la solicitud actual (si la hay)
+	"""
+	if not has_request_context():
+		return {'fields': fields}
+	return {'fields': {'request_id': g.get('request_id'), 'path': request.path, **fields}}
+
+def prediction_log_fields(payload):
+	"""
+	Campos de la predicción que se agregan a la línea de log de la solicitud
+	"""
+	prediction = payload.get('prediction')
+	if prediction is None:
+		return {}
+	return {
+		'risk_percentage': prediction['risk_percentage'],
+		'risk_level': prediction['risk_level'],
+		'is_ood': prediction['ood']['is_ood'] if 'ood' in prediction else None
+	}
+
+def init_logging():
+	"""
+	Envía todos los logs por la cola del listener en segundo plano. El
+	handler síncrono que Flask agrega a app.logger se quita, y la línea por
+	solicitud de finish_request_log reemplaza el access log de werkzeug.
+	Idempotente; al salir del proceso se detiene el listener, que vacía la cola
+	"""
+	global log_handler, log_listener
+	if log_handler is not None:
+		return log_handler, log_listener
+	import atexit
+	import logging
+	from flask.logging import default_handler
+	
+	log_handler, log_listener = setup_logging(LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_SIZE)
+	request_logger.handler = log_handler
+	atexit.register(log_listener.stop)
+	app.logger.removeHandler(default_handler)
+	logging.getLogger('werkzeug').setLevel(logging.WARNING)
+	return log_handler, log_listener
+
+@app.before_request
+def start_request_log():
+	"""
+	Asigna el request_id (el X-Request-ID del cliente o uno nuevo) y marca el inicio
+	"""
+	g.request_id = (request.headers.get('X-Request-ID') or uuid.uuid4().hex)[:128]
+	g.request_started = time.perf_counter()
+
+@app.after_request
+def finish_request_log(response):
+	"""
+	Devuelve el request_id en X-Request-ID y encola la línea de log de la solicitud
+	"""
+	response.headers['X-Request-ID'] = g.request_id
+	request_logger.log(
+		g.request_id, request.method, request.path, response.status_code,
+		(time.perf_counter() - g.request_started) * 1000,
+		**g.get('log_fields', {})
+	)
+	return response
+
+def is_msgpack_request():
+	"""
+	Indica si el cuerpo de la solicitud viene en MessagePack
+	"""
+	return request.mimetype in MSGPACK_MIMETYPES
+
+def prefers_msgpack(accept_mimetypes):
+	"""
+	True si la cabecera Accept ya parseada (MIMEAccept de werkzeug) prefiere
+	MessagePack a JSON según sus q-values; compartida con la app asíncrona
+	"""
+	best = accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES, default='application/json')
+	return best in MSGPACK_MIMETYPES
+
+def wants_msgpack():
+	"""
+	Negociación de contenido: True si el cliente prefiere MessagePack a JSON
+	(cabecera Accept). Sin preferencia explícita se responde en JSON.
+	"""
+	return prefers_msgpack(request.accept_mimetypes)
+
+def read_request_payload():
+	"""
+	Lee el cuerpo de la solicitud en JSON o MessagePack
+	
+	Returns:
+		El payload decodificado, o None si el Content-Type no es soportado
+	
+	Raises:
+		ValueError: si el cuerpo no se puede decodificar (400 para el cliente)
+	"""
+	if is_msgpack_request():
+		import msgpack
+		try:
+			return msgpack.unpackb(request.get_data(), raw=False)
+		except (ValueError, TypeError) as e:
+			raise ValueError(f"Cuerpo MessagePack mal formado: {str(e) or type(e).__name__}") from None
+	if request.is_json:
+		payload = request.get_json(silent=True)
+		if payload is None:
+			raise ValueError("Cuerpo JSON mal formado")
+		return payload
+	return None
+
+def api_response(payload, status=200):
+	"""
+	Serializa la respuesta en el formato negociado (JSON por defecto o MessagePack)
+	"""
+	if wants_msgpack():
+		import msgpack
+		body = msgpack.packb(payload, use_bin_type=True, default=numpy_to_builtin)
+		return Response(body, status=status, mimetype='application/msgpack')
+	return jsonify(payload), status
+
+def request_deadline():
+	"""
+	Deadline (time.monotonic) de la solicitud actual: el presupuesto que envía
+	el cliente en X-Request-Timeout-Ms o DEFAULT_REQUEST_TIMEOUT_MS; None si no hay
+	"""
+	timeout_ms = request.headers.get('X-Request-Timeout-Ms', type=float) or DEFAULT_REQUEST_TIMEOUT_MS
+	if not timeout_ms or timeout_ms <= 0:
+		return None
+	return time.monotonic() + timeout_ms / 1000
+
+def deadline_expired():
+	deadline = g.get('request_deadline')
+	return deadline is not None and time.monotonic() >= deadline
+
+def rejection_response(message, status, retry_after):
+	"""
+	Respuesta de carga rechazada (429/503) con cabecera Retry-After
+	"""
+	response = make_response(api_response({
+		'success': False,
+		'error': 'Servidor saturado' if status == 429 else 'Servicio no disponible',
+		'message': message
+	}, status))
+	response.headers['Retry-After'] = str(retry_after)
+	return response
+
+def expired_rejection():
+	"""
+	Rechazo de una solicitud cuyo deadline venció antes de la inferencia
+	"""
+	if admission is not None:
+		admission.record_expired()
+	return AdmissionRejected(
+		503, 'Deadline de la solicitud vencido antes de la inferencia',
+		admission.retry_after() if admission is not None else 1
+	)
+
+def deadline_expired_response():
+	"""
+	Descarta una solicitud cuyo deadline venció antes de la inferencia
+	"""
+	rejection = expired_rejection()
+	return rejection_response(rejection.reason, rejection.status, rejection.retry_after)
+
+def admission_controlled(view):
+	"""
+	Envuelve un endpoint de inferencia con el control de admisión: espera una
+	plaza (o rechaza con 429/503 y Retry-After) y propaga el deadline en g
+	"""
+	@wraps(view)
+	def wrapper(*args, **kwargs):
+		g.request_deadline = request_deadline()
+		g.trace = RequestTrace() if trace_requested() else NO_TRACE
+		if admission is None:
+			return view(*args, **kwargs)
+		
+		try:
+			started = admission.acquire(g.request_deadline)
+		except AdmissionRejected as e:
+			return rejection_response(e.reason, e.status, e.retry_after)
+		g.trace.mark('queue')
+		
+		try:
+			return view(*args, **kwargs)
+		finally:
+			admission.release(started)
+	
+	return wrapper
+
+def trace_requested():
+	"""
+	Las solicitudes con X-Request-Trace: 1 reciben sus tiempos por etapa en Server-Timing
+	"""
+	return _str_to_bool(request.headers.get('X-Request-Trace', 'false'))
+
+def with_server_timing(response, trace):
+	"""
+	Agrega la cabecera Server-Timing (y Timing-Allow-Origin para el frontend) a la respuesta
+	"""
+	response = make_response(response)
+	response.headers['Server-Timing'] = trace.server_timing()
+	response.headers['Timing-Allow-Origin'] = '*'
+	return response
+
+def admin_required(view):
+	"""
+	Restringe un endpoint a quien envíe X-Admin-Token igual a ADMIN_TOKEN
+	"""
+	@wraps(view)
+	def wrapper(*args, **kwargs):
+		if not ADMIN_TOKEN:
+			return jsonify({
+				'success': False,
+				'error': 'Endpoints de administración desactivados',
+				'message': 'Defina ADMIN_TOKEN para habilitarlos'
+			}), 403
+		if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+			return jsonify({'success': False, 'error': 'Token de administración inválido'}), 401
+		return view(*args, **kwargs)
+	
+	return wrapper
+
+def load_onnx_session(model_path):
+	"""
+	Crea una sesión de ONNX Runtime con los hilos intra/inter-op configurados
+	"""
+	import onnxruntime as ort
+	
+	options = ort.SessionOptions()
+	options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+	options.inter_op_num_threads = ORT_INTER_OP_THREADS
+	options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+	
+	return ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+def load_shared_weights(weights_path, model_family):
+	"""
+	Mapea en memoria el archivo de pesos compartidos; devuelve None (y se usa
+	ONNX) si no existe o no corresponde al modelo servido
+	"""
+	if not os.path.exists(weights_path):
+		print(f"Pesos compartidos no encontrados ({weights_path}), se usa el backend ONNX")
+		return None
+	
+	shared_model = SharedWeightsModel(weights_path)
+	if shared_model.model_family != model_family:
+		print(f"Los pesos compartidos son de '{shared_model.model_family}' pero se sirve '{model_family}', se usa el backend ONNX")
+		return None
+	if shared_model.feature_names != feature_metadata['feature_names']:
+		print("Las features de los pesos compartidos no coinciden con la metadata, se usa el backend ONNX")
+		return None
+	
+	print(f"Pesos compartidos mapeados en memoria: {weights_path} ({shared_model.nbytes} bytes)")
+	return shared_model
+
+def verify_loaded_artifacts(backend):
+	"""
+	Verifica los artefactos que se van a cargar con `backend` contra
+	run_manifest.json según ARTIFACT_VERIFY
+	
+	Raises:
+		ArtifactVerificationError: En modo 'strict', si alguno no coincide o falta en el manifiesto
+	"""
+	if ARTIFACT_VERIFY == 'off':
+		return None
+	
+	paths = ['saved_models/feature_metadata.json', 'saved_models/decision_policy.json']
+	if backend == 'mmap':
+		paths.append(SHARED_WEIGHTS_PATH)
+	else:
+		paths.append(f'saved_models/liver_cancer_model.{"onnx" if backend == "onnx" else "keras"}')
+		paths.append('saved_models/preprocessing.json')
+	if os.path.exists('saved_models/reference_profile.bin'):
+		paths.append('saved_models/reference_profile.bin')
+	
+	status = verify_artifacts(ARTIFACT_MANIFEST_PATH, paths)
+	if status['verified'] is None:
+		message = f"No hay manifiesto de entrenamiento ({ARTIFACT_MANIFEST_PATH}), artefactos sin verificar"
+	elif status['verified']:
+		print(f"Artefactos verificados contra la ejecución {status['run_id']}: {', '.join(status['ok'])}")
+		return status
+	else:
+		message = (f"Artefactos que no coinciden con la ejecución {status['run_id']}: "
+			f"distintos {status['mismatched']}, fuera del manifiesto {status['unlisted']}")
+	
+	if ARTIFACT_VERIFY == 'strict':
+		raise ArtifactVerificationError(message)
+	print(f"⚠️ {message}")
+	return status
 
 def load_model_artifacts():
 	"""
 	Carga el modelo, scaler y metadata al iniciar el servidor
 	"""
-	global model, scaler, feature_metadata, encoders
+	global model, model_backend, scaler, feature_metadata, encoders, decision_policy, thread_settings, artifact_status
 	
 	try:
-		# Cargar modelo Keras
-		model_path = 'saved_models/liver_cancer_model.keras'
-		model = tf.keras.models.load_model(model_path)
-		print(f"Modelo cargado desde: {model_path}")
-		
-		# Cargar scaler
-		scaler_path = 'saved_models/scaler.pkl'
-		with open(scaler_path, 'rb') as f:
-			scaler = pickle.load(f)
-		print(f"Scaler cargado desde: {scaler_path}")
+		# Fijar afinidad e hilos nativos antes de que ningún runtime cree sus pools
+		thread_settings = apply_thread_config(CPU_AFFINITY, NATIVE_THREADS)
+		print(f"Hilos de inferencia: núcleos {thread_settings['cpus']}, hilos nativos {NATIVE_THREADS or 'por defecto'}")
 		
 		# Cargar metadata
 		metadata_path = 'saved_models/feature_metadata.json'
@@ -76,13 +499,65 @@ def load_model_artifacts():
 			feature_metadata = json.load(f)
 		print(f"Metadata cargada desde: {metadata_path}")
 		
-		# Reconstruir encoders
-		encoders = {}
-		for col, classes in feature_metadata['encoders'].items():
-			from sklearn.preprocessing import LabelEncoder
-			le = LabelEncoder()
-			le.classes_ = np.array(classes)
-			encoders[col] = le
+		# Si la comparación de familias eligió un modelo distinto del MLP, solo
+		# existe como artefacto ONNX
+		model_backend = MODEL_BACKEND
+		model_family = feature_metadata.get('model_family', 'mlp')
+		if model_backend == 'keras' and model_family != 'mlp':
+			print(f"Modelo servido: {model_family}, se usa el backend ONNX")
+			model_backend = 'onnx'
+		
+		# Verificar los artefactos antes de cargarlos (con mmap, el archivo de
+		# pesos antes de mapearlo; si se recurre a ONNX, también los de ONNX)
+		if model_backend == 'mmap':
+			model_path = SHARED_WEIGHTS_PATH
+			artifact_status = verify_loaded_artifacts(model_backend) if os.path.exists(model_path) else None
+			model = load_shared_weights(model_path, model_family)
+			if model is None:
+				model_backend = 'onnx'
+		if model_backend != 'mmap':
+			artifact_status = verify_loaded_artifacts(model_backend)
+		
+		if model_backend == 'onnx':
+			# Cargar grafo ONNX (modelo + scaler fusionado) en ONNX Runtime
+			model_path = 'saved_models/liver_cancer_model.onnx'
+			model = load_onnx_session(model_path)
+		elif model_backend == 'keras':
+			# Cargar modelo Keras (TensorFlow solo se importa con este backend)
+			import tensorflow as tf
+			configure_tensorflow_threads(tf, TF_INTRA_OP_THREADS, TF_INTER_OP_THREADS)
+			model_path = 'saved_models/liver_cancer_model.keras'
+			model = tf.keras.models.load_model(model_path)
+		elif model_backend != 'mmap':
+			raise ValueError(f"MODEL_BACKEND desconocido: {model_backend} (use 'keras', 'onnx' o 'mmap')")
+		print(f"Modelo cargado desde: {model_path} (backend: {model_backend})")
+		
+		# Cargar política de decisión (bandas de riesgo)
+		decision_policy = DecisionPolicy.load('saved_models/decision_policy.json')
+		print(f"Política de decisión: {len(decision_policy.bands)} bandas, umbrales {decision_policy.thresholds.tolist()}")
+		
+		# Cargar scaler y encoders (con pesos compartidos ya están en el archivo mapeado)
+		if model_backend == 'mmap':
+			scaler = model.scaler
+			encoders = build_encoders(model.encoders)
+		else:
+			preprocessing_path = 'saved_models/preprocessing.json'
+			scaler, encoders, preprocessing_features = load_preprocessing(preprocessing_path)
+			if preprocessing_features != feature_metadata['feature_names']:
+				raise ValueError(f"Las features de {preprocessing_path} no coinciden con la metadata")
+			print(f"Scaler y encoders cargados desde: {preprocessing_path}")
+		
+		# Perfil de referencia de entrenamiento (si existe): línea base de las
+		# explicaciones, monitor de drift y detector OOD
+		profile_path = 'saved_models/reference_profile.bin'
+		profile = load_reference_profile(profile_path) if os.path.exists(profile_path) else None
+		
+		# Precalcular la línea base de las explicaciones y las grillas what-if
+		init_explainer(profile)
+		init_whatif_grids()
+		
+		# Iniciar el monitor de drift y el detector OOD si existe el perfil de referencia
+		init_reference_profile(profile, profile_path)
 		
 		print("Todos los artefactos del modelo cargados exitosamente")
 		return True
@@ -91,6 +566,180 @@ def load_model_artifacts():
 		print(f"Error cargando artefactos del modelo: {e}")
 		return False
 
+def init_explainer(profile=None):
+	"""
+	Cachea la línea base usada por /explain y la probabilidad que el modelo le
+	asigna. Las numéricas se ocluyen con su media de entrenamiento
+	(scaler.mean_); las categóricas y binarias con su clase más frecuente en
+	entrenamiento (del perfil de referencia), ya que la media daría un código
+	fraccionario que no corresponde a ningún paciente. Sin perfil se usa el
+	código válido más cercano a la media
+	"""
+	global explain_baseline, explain_base_value
+	
+	explain_baseline = np.array(scaler.mean_, dtype=np.float64)
+	if profile is not None:
+		for k, j in enumerate(profile['categorical_idx']):
+			size = int(profile['categorical_sizes'][k])
+			explain_baseline[j] = float(np.argmax(profile['categorical_proportions'][k, :size]))
+	else:
+		for j, feature in enumerate(feature_metadata['feature_names']):
+			if feature not in NUMERIC_RANGES:
+				explain_baseline[j] = np.round(explain_baseline[j])
+	explain_base_value = float(predict_proba(explain_baseline[None, :])[0])
+
+def init_reference_profile(profile, profile_path):
+	"""
+	Arranca el monitor de drift y el detector OOD a partir del perfil de
+	referencia de entrenamiento (None si no existe)
+	"""
+	global drift_monitor, ood_detector
+	
+	if not (DRIFT_MONITOR or OOD_CHECK):
+		return
+	if profile is None:
+		print(f"Perfil de referencia no encontrado ({profile_path}), monitor de drift y detección OOD desactivados")
+		return
+	
+	if DRIFT_MONITOR:
+		drift_monitor = DriftMonitor(profile, window_size=DRIFT_WINDOW_SIZE, num_buckets=DRIFT_BUCKETS).start()
+		print(f"Monitor de drift iniciado (perfil: {profile_path})")
+	
+	if OOD_CHECK:
+		ood_detector = OODDetector(profile, threshold=OOD_THRESHOLD)
+		print(f"Detección OOD activada (umbral: percentil {OOD_THRESHOLD:.0%} de entrenamiento)")
+
+def init_whatif_grids():
+	"""
+	Precalcula los valores por defecto de cada feature para /whatif:
+	una grilla uniforme sobre el rango válido para las numéricas, todas las
+	clases para las categóricas y 0/1 para las binarias
+	"""
+	global whatif_default_grids
+	
+	whatif_default_grids = {}
+	for feature in feature_metadata['feature_names']:
+		if feature in NUMERIC_RANGES:
+			min_val, max_val = NUMERIC_RANGES[feature]
+			values = np.round(np.linspace(min_val, max_val, WHATIF_DEFAULT_STEPS), 4).tolist()
+		elif feature in encoders:
+			values = encoders[feature].classes_.tolist()
+		else:
+			values = [0, 1]
+		whatif_default_grids[feature] = values
+
+def resolve_sweep_values(feature, spec):
+	"""
+	Convierte la especificación de barrido de una feature en (valores, valores codificados)
+	
+	spec puede ser None (grilla por defecto), una lista de valores explícitos o,
+	para features numéricas, {"min": ..., "max": ..., "steps": ...}
+	"""
+	if feature not in feature_metadata['feature_names']:
+		raise ValueError(f"Feature desconocida: {feature}")
+	
+	if spec is None or spec is True:
+		values = whatif_default_grids[feature]
+	elif isinstance(spec, dict):
+		if feature not in NUMERIC_RANGES:
+			raise ValueError(f"{feature} no es numérica; use una lista de valores")
+		min_val, max_val = NUMERIC_RANGES[feature]
+		try:
+			start = float(spec.get('min', min_val))
+			stop = float(spec.get('max', max_val))
+			steps = int(spec.get('steps', WHATIF_DEFAULT_STEPS))
+		except (TypeError, ValueError, OverflowError):
+			raise ValueError(f"min, max y steps de {feature} deben ser numéricos") from None
+		# Acotar antes de reservar memoria: la grilla nunca puede superar MAX_WHATIF_GRID
+		if not 1 <= steps <= MAX_WHATIF_GRID:
+			raise ValueError(f"steps de {feature} debe estar entre 1 y {MAX_WHATIF_GRID}")
+		# Validar el tramo antes de linspace: con extremos como ±1e308 el paso desborda a inf/NaN
+		if not (min_val <= start <= max_val and min_val <= stop <= max_val):
+			raise ValueError(f"{feature} debe estar entre {min_val} y {max_val}")
+		values = np.linspace(start, stop, steps).tolist()
+	elif isinstance(spec, list) and spec:
+		if len(spec) > MAX_WHATIF_GRID:
+			raise ValueError(f"{feature} tiene {len(spec)} valores y el máximo es {MAX_WHATIF_GRID}")
+		values = spec
+	else:
+		raise ValueError(f"Especificación de barrido inválida para {feature}")
+	
+	if feature in NUMERIC_RANGES:
+		min_val, max_val = NUMERIC_RANGES[feature]
+		try:
+			encoded = np.asarray(values, dtype=np.float64)
+		except (TypeError, ValueError):
+			raise ValueError(f"Los valores de {feature} deben ser numéricos") from None
+		# NaN (p. ej. null en la lista) no falla las comparaciones de rango
+		if not np.isfinite(encoded).all() or encoded.min() < min_val or encoded.max() > max_val:
+			raise ValueError(f"{feature} debe estar entre {min_val} y {max_val}")
+	elif feature in encoders:
+		classes = encoders[feature].classes_.tolist()
+		invalid = [value for value in values if value not in classes]
+		if invalid:
+			raise ValueError(f"{feature} debe ser uno de: {classes}")
+		encoded = np.asarray([classes.index(value) for value in values], dtype=np.float64)
+	else:
+		encoded = np.asarray(values, dtype=np.float64)
+		if not np.isin(encoded, (0, 1)).all():
+			raise ValueError(f"{feature} debe ser 0 o 1")
+	
+	return values, encoded
+
+def build_whatif_grid(base_encoded, sweep):
+	"""
+	Construye la grilla completa de un barrido what-if como una sola matriz
+	
+	Args:
+		base_encoded: Array (d,) con el paciente base ya codificado
+		sweep: Diccionario ordenado {feature: especificación}
+	
+	Returns:
+		features: Lista de features barridas (en orden)
+		values: Lista con los valores de cada feature
+		grid: Array (prod(len(values)), d) con todas las combinaciones
+	"""
+	features = list(sweep.keys())
+	resolved = [resolve_sweep_values(feature, sweep[feature]) for feature in features]
+	values = [raw for raw, _ in resolved]
+	
+	shape = tuple(len(raw) for raw in values)
+	grid_size = int(np.prod(shape))
+	if grid_size > MAX_WHATIF_GRID:
+		raise ValueError(f"La grilla tiene {grid_size} puntos y el máximo es {MAX_WHATIF_GRID}")
+	
+	grid = np.tile(base_encoded, (grid_size, 1))
+	mesh = np.meshgrid(*[encoded for _, encoded in resolved], indexing='ij')
+	for feature, axis_values in zip(features, mesh):
+		grid[:, feature_metadata['feature_names'].index(feature)] = axis_values.ravel()
+	
+	return features, values, grid
+
+def parse_patients(payload):
+	"""
+	Normaliza el cuerpo de una solicitud a una lista de pacientes
+	Acepta un dict (un paciente), una lista de dicts o {"patients": [...]}
+	
+	Returns:
+		(records, is_batch) o lanza ValueError si el formato no es válido
+	"""
+	if isinstance(payload, dict) and 'patients' in payload:
+		payload = payload['patients']
+		if not isinstance(payload, list):
+			raise ValueError("'patients' debe ser una lista de pacientes")
+	
+	if isinstance(payload, dict):
+		return [payload], False
+	
+	if not isinstance(payload, list) or not payload:
+		raise ValueError("Se espera un paciente (objeto JSON) o una lista no vacía de pacientes")
+	if len(payload) > MAX_BATCH_SIZE:
+		raise ValueError(f"El lote excede el máximo de {MAX_BATCH_SIZE} pacientes")
+	if not all(isinstance(record, dict) for record in payload):
+		raise ValueError("Cada paciente debe ser un objeto JSON")
+	
+	return payload, True
+
 def validate_input_data(data):
 	"""
 	Valida que los datos de entrada tengan todas las features necesarias
@@ -107,14 +756,7 @@ def validate_input_data(data):
 	binary_features = ['hepatitis_b', 'hepatitis_c', 'cirrhosis_history', 'family_history_cancer', 'diabetes']
 	
 	# Validar rangos numéricos
-	validations = {
-		'age': (0, 120),
-		'bmi': (10, 60),
-		'liver_function_score': (0, 100),
-		'alpha_fetoprotein_level': (0, 1000)
-	}
-	
-	for feature, (min_val, max_val) in validations.items():
+	for feature, (min_val, max_val) in NUMERIC_RANGES.items():
 		if feature in data:
 			value = float(data[feature])
 			if not (min_val <= value <= max_val):
@@ -123,43 +765,112 @@ def validate_input_data(data):
 	# Validar valores categóricos
 	for feature in categorical_features:
 		if feature in data and feature in encoders:
-			if data[feature] not in encoders[feature].classes_:
-				valid_values = encoders[feature].classes_.tolist()
+			# Contra la lista, no el array: `['Male'] in array` compara elemento a elemento y daría True
+			valid_values = encoders[feature].classes_.tolist()
+			if data[feature] not in valid_values:
 				return False, f"{feature} debe ser uno de: {valid_values}"
 	
 	return True, "Datos válidos"
 
+def encode_input(data):
+	"""
+	Codifica los datos de entrada (sin escalar) en el orden de entrenamiento
+	Acepta un dict (un paciente) o una lista de dicts (lote)
+	"""
+	records = data if isinstance(data, list) else [data]
+	
+	# Una columna por feature, en el orden de entrenamiento (sin pandas:
+	# construir un DataFrame por solicitud costaba más que la inferencia)
+	X = np.empty((len(records), len(feature_metadata['feature_names'])), dtype=np.float64)
+	for j, col in enumerate(feature_metadata['feature_names']):
+		values = [record[col] for record in records]
+		if col in encoders:
+			# Variables categóricas
+			X[:, j] = encoders[col].transform(values)
+		elif col in NUMERIC_RANGES:
+			X[:, j] = [float(value) for value in values]
+		else:
+			# Binarias a int
+			X[:, j] = [int(value) for value in values]
+	
+	return X
+
+def scale_features(X):
+	"""
+	Aplica el StandardScaler de entrenamiento a una matriz ya codificada
+	"""
+	return (X - scaler.mean_) / scaler.scale_
+
 def preprocess_input(data):
 	"""
 	Preprocesa los datos de entrada para que coincidan con el formato de entrenamiento
 	"""
-	# Crear DataFrame con una sola fila
-	df = pd.DataFrame([data])
+	return scale_features(encode_input(data))
+
+def compute_feature_attributions(X_encoded):
+	"""
+	Atribuciones por feature mediante oclusión vectorizada
 	
-	# Asegurar el orden correcto de las columnas
-	df = df[feature_metadata['feature_names']]
+	Para cada paciente se construyen d+1 filas: la original y d copias donde la
+	feature j se reemplaza por su valor de línea base. Todas las filas de todos
+	los pacientes se evalúan en una sola llamada al modelo, por lo que la
+	latencia añadida es una única inferencia por lote.
 	
-	# Codificar variables categóricas
-	categorical_columns = ['gender', 'alcohol_consumption', 'smoking_status', 'physical_activity_level']
+	Returns:
+		probabilities: Array (n,) con la probabilidad de cada paciente
+		contributions: Array (n, d) con p(x) - p(x con feature j en línea base)
+	"""
+	n, d = X_encoded.shape
+	idx = np.arange(d)
 	
-	for col in categorical_columns:
-		if col in encoders:
-			df[col] = encoders[col].transform(df[col])
+	grid = np.repeat(X_encoded[:, None, :], d + 1, axis=1)
+	grid[:, idx + 1, idx] = explain_baseline
 	
-	# Convertir tipos de datos
-	numeric_columns = ['age', 'bmi', 'liver_function_score', 'alpha_fetoprotein_level']
-	for col in numeric_columns:
-		df[col] = pd.to_numeric(df[col])
+	proba = predict_proba(grid.reshape(n * (d + 1), d)).reshape(n, d + 1)
+	probabilities = proba[:, 0]
+	contributions = probabilities[:, None] - proba[:, 1:]
 	
-	# Convertir binarias a int
-	binary_columns = ['hepatitis_b', 'hepatitis_c', 'cirrhosis_history', 'family_history_cancer', 'diabetes']
-	for col in binary_columns:
-		df[col] = df[col].astype(int)
+	return probabilities, contributions
+
+def predict_proba(X_encoded):
+	"""
+	Devuelve la probabilidad de riesgo para cada fila de una matriz codificada
 	
-	# Escalar características
-	df_scaled = scaler.transform(df)
+	Con los backends ONNX y mmap el escalado va fusionado en la primera capa,
+	por lo que reciben las features sin escalar; con Keras se escala antes de
+	llamar a predict.
+	"""
+	if model_backend == 'onnx':
+		outputs = model.run(None, {'input': X_encoded.astype(np.float32)})
+		return outputs[0][:, 0]
+	if model_backend == 'mmap':
+		return model.predict_proba(X_encoded)
 	
-	return df_scaled
+	return model.predict(scale_features(X_encoded), verbose=0)[:, 0]
+
+def build_predictions(probabilities):
+	"""
+	Construye el bloque 'prediction' de cada probabilidad; la banda de riesgo
+	(nivel, mensaje y acción) sale de la política de decisión, clasificando
+	todo el lote con una única búsqueda binaria vectorizada
+	"""
+	probabilities = np.asarray(probabilities, dtype=np.float64).ravel()
+	band_indices = decision_policy.classify(probabilities)
+	
+	return [
+		{
+			'risk_percentage': round(probability * 100, 2),
+			'risk_probability': probability,
+			**decision_policy.band(band_index)
+		}
+		for probability, band_index in zip(probabilities.tolist(), band_indices.tolist())
+	]
+
+def build_prediction(risk_probability):
+	"""
+	Construye el bloque 'prediction' de la respuesta a partir de la probabilidad
+	"""
+	return build_predictions([risk_probability])[0]
 
 @app.route('/openapi', methods=['GET'])
 def openapi_info():
@@ -173,134 +884,540 @@ def openapi_info():
 			'/openapi': 'API information',
 			'/health': 'Health check',
 			'/predict': 'POST - Predict cancer risk',
+			'/predict/batch': 'POST - Predict cancer risk for a list of patients',
+			'/explain': 'POST - Per-feature risk contributions (single or batch)',
+			'/whatif': 'POST - Risk curve/grid sweeping one or more features',
+			'/drift': 'GET - Input drift vs training reference (PSI/KS)',
+			'/policy': 'GET - Decision policy (risk bands and thresholds)',
+			'/metrics': 'GET - Admission control metrics (queue depth, shed counts)',
+			'/admin/profiler/start': 'POST - Start the sampling profiler (X-Admin-Token)',
+			'/admin/profiler/stop': 'POST - Stop the sampling profiler (X-Admin-Token)',
+			'/admin/profiler/profile': 'GET - Download collapsed stacks for flamegraphs (X-Admin-Token)',
 			'/features': 'GET - Features and encoders info',
 			'/': 'Serve frontend UI (index.html)'
 		},
 		'model_performance': feature_metadata.get('model_performance', {}) if feature_metadata else {}
 	})
 
+def serve_frontend_file(filename):
+	"""
+	Sirve un archivo del frontend desde la cache de assets (precomprimido,
+	con ETag y Cache-Control) o, si no está en cache, desde disco
+	"""
+	if static_assets is not None:
+		response = static_assets.response(filename, app.response_class)
+		if response is not None:
+			return response
+	return send_from_directory(FRONTEND_FOLDER, filename)
+
 @app.route('/', methods=['GET'])
 def serve_root_ui():
 	"""
 	Sirve la UI del frontend en la raíz
 	"""
-	return send_from_directory(FRONTEND_FOLDER, 'index.html')
+	return serve_frontend_file('index.html')
 
 @app.route('/ui')
 def serve_ui():
     """
     Sirve la aplicación web (index.html) del frontend
     """
-    return send_from_directory(FRONTEND_FOLDER, 'index.html')
+    return serve_frontend_file('index.html')
 
 @app.route('/ui/<path:filename>')
 def serve_ui_assets(filename):
     """
     Sirve los assets estáticos (JS, CSS, imágenes) del frontend
     """
-    return send_from_directory(FRONTEND_FOLDER, filename)
+    return serve_frontend_file(filename)
 
-@app.route('/health', methods=['GET'])
-def health_check():
+def get_health_status():
 	"""
-	Health check endpoint para verificar que la API esté funcionando
+	Estado del servicio (compartido por la app Flask y el servidor asíncrono)
 	"""
-	health_status = {
+	return {
 		'status': 'healthy' if model is not None else 'unhealthy',
 		'timestamp': datetime.now().isoformat(),
 		'model_loaded': model is not None,
+		'model_backend': model_backend,
+		'model_family': feature_metadata.get('model_family', 'mlp') if feature_metadata else None,
+		'model_version': feature_metadata.get('model_version', 0) if feature_metadata else None,
 		'scaler_loaded': scaler is not None,
-		'metadata_loaded': feature_metadata is not None
+		'metadata_loaded': feature_metadata is not None,
+		'artifacts': artifact_status,
+		'threads': thread_settings
 	}
-	
+
+@app.route('/health', methods=['GET'])
+def health_check():
+	"""
+	Health check endpoint para verificar que la API esté funcionando
+	"""
+	health_status = get_health_status()
 	return jsonify(health_status), 200 if health_status['status'] == 'healthy' else 503
 
+def run_prediction(data, include_input=True, save=False, deadline=None, trace=NO_TRACE):
+	"""
+	Núcleo de /predict independiente del framework (lo usan la app Flask y el
+	servidor asíncrono): valida, preprocesa, predice y arma la respuesta
+	
+	Args:
+		data: Diccionario con los datos del paciente
+		include_input: Si es True, la respuesta incluye input_data
+		save: Si es True, guarda la entrada en el CSV de predicciones
+		deadline: Instante límite (time.monotonic) o None
+		trace: RequestTrace que recibe los tiempos por etapa (NO_TRACE = sin medir)
+	
+	Returns:
+		(payload, status)
+	
+	Raises:
+		AdmissionRejected: si el deadline vence antes de la inferencia
+	"""
+	# 1. Validar datos de entrada
+	if not isinstance(data, dict):
+		return {
+			'error': 'Datos inválidos',
+			'message': 'Se espera un paciente (objeto JSON)'
+		}, 400
+	is_valid, message = validate_input_data(data)
+	trace.mark('validate')
+	if not is_valid:
+		return {
+			'error': 'Datos inválidos',
+			'message': message
+		}, 400
+	
+	# 2. Preprocesar datos
+	input_encoded = encode_input(data)
+	trace.mark('preprocess')
+	
+	# 3. Realizar predicción (salvo que el deadline haya vencido mientras tanto)
+	if deadline is not None and time.monotonic() >= deadline:
+		raise expired_rejection()
+	prediction_proba = predict_proba(input_encoded)
+	risk_probability = float(prediction_proba[0])
+	trace.mark('infer')
+	
+	# Alimentar el monitor de drift (solo encola, se procesa en segundo plano)
+	if drift_monitor is not None:
+		drift_monitor.submit(input_encoded, prediction_proba)
+	
+	# 4. Generar mensaje de acción según el riesgo
+	prediction = build_prediction(risk_probability)
+	
+	# Marcar si el paciente está fuera de la distribución de entrenamiento
+	if ood_detector is not None:
+		prediction['ood'] = ood_detector.check(input_encoded)[0]
+	
+	# 5. Preparar respuesta
+	response = {
+		'success': True,
+		'prediction': prediction,
+		'timestamp': datetime.now().isoformat()
+	}
+	if include_input:
+		response['input_data'] = data
+	trace.mark('postprocess')
+	
+	# 6. Si se solicita, guardar la información en CSV
+	if save:
+		row_to_save = {
+			**data,
+			'timestamp': response['timestamp']
+		}
+		append_prediction_to_csv(row_to_save)
+
+	trace.mark('log')
+	
+	return response, 200
+
 @app.route('/predict', methods=['POST'])
+@admission_controlled
 def predict():
 	"""
 	Endpoint principal de predicción
 	Acepta datos del paciente y devuelve probabilidad de riesgo
+	
+	Acepta JSON o MessagePack y responde en el formato pedido en Accept.
+	Con ?include_input=false no se devuelve input_data.
+	"""
+	try:
+		# Recibir datos (JSON o MessagePack)
+		trace = g.get('trace', NO_TRACE)
+		try:
+			data = read_request_payload()
+		except ValueError as e:
+			return api_response({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}, 400)
+		if data is None:
+			return api_response({
+				'error': 'Content-Type debe ser application/json o application/msgpack'
+			}, 400)
+		trace.mark('parse')
+		
+		save_param = request.args.get('save') or request.args.get('conservar') or request.args.get('guardar')
+		payload, status = run_prediction(
+			data,
+			include_input=_str_to_bool(request.args.get('include_input', 'true')),
+			save=_str_to_bool(save_param),
+			deadline=g.get('request_deadline'),
+			trace=trace
+		)
+		g.log_fields = prediction_log_fields(payload)
+		response = api_response(payload, status)
+		if trace is NO_TRACE:
+			return response
+		trace.mark('serialize')
+		return with_server_timing(response, trace)
+		
+	except AdmissionRejected as e:
+		return rejection_response(e.reason, e.status, e.retry_after)
+	except Exception as e:
+		app.logger.exception('Error en predicción', extra=log_context())
+		return api_response({
+			'success': False,
+			'error': 'Error interno del servidor',
+			'message': str(e)
+		}, 500)
+
+@app.route('/predict/batch', methods=['POST'])
+@admission_controlled
+def predict_batch():
+	"""
+	Predicción por lotes: una lista de pacientes (o {"patients": [...]})
+	evaluada en una sola llamada al modelo
+	
+	Mismo formato de entrada/salida negociable y mismos parámetros
+	(include_input, save) que /predict.
+	"""
+	try:
+		trace = g.get('trace', NO_TRACE)
+		try:
+			payload = read_request_payload()
+		except ValueError as e:
+			return api_response({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}, 400)
+		if payload is None:
+			return api_response({
+				'error': 'Content-Type debe ser application/json o application/msgpack'
+			}, 400)
+		
+		try:
+			records, _ = parse_patients(payload)
+		except ValueError as e:
+			return api_response({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}, 400)
+		trace.mark('parse')
+		
+		for i, record in enumerate(records):
+			is_valid, message = validate_input_data(record)
+			if not is_valid:
+				return api_response({
+					'error': 'Datos inválidos',
+					'message': f"Paciente {i}: {message}"
+				}, 400)
+		trace.mark('validate')
+		
+		input_encoded = encode_input(records)
+		trace.mark('preprocess')
+		if deadline_expired():
+			return deadline_expired_response()
+		probabilities = predict_proba(input_encoded)
+		trace.mark('infer')
+		predictions = build_predictions(probabilities)
+		
+		if ood_detector is not None:
+			for prediction, ood in zip(predictions, ood_detector.check(input_encoded)):
+				prediction['ood'] = ood
+		
+		if drift_monitor is not None:
+			drift_monitor.submit(input_encoded, probabilities)
+		
+		response = {
+			'success': True,
+			'count': len(predictions),
+			'predictions': predictions,
+			'timestamp': datetime.now().isoformat()
+		}
+		if _str_to_bool(request.args.get('include_input', 'true')):
+			response['input_data'] = records
+		trace.mark('postprocess')
+		
+		save_param = request.args.get('save') or request.args.get('conservar') or request.args.get('guardar')
+		if _str_to_bool(save_param):
+			append_prediction_to_csv([
+				{**record, 'timestamp': response['timestamp']} for record in records
+			])
+		
+		trace.mark('log')
+		
+		g.log_fields = {'count': len(predictions)}
+		
+		response = api_response(response, 200)
+		if trace is NO_TRACE:
+			return response
+		trace.mark('serialize')
+		return with_server_timing(response, trace)
+		
+	except Exception as e:
+		app.logger.exception('Error en predicción por lote', extra=log_context())
+		return api_response({
+			'success': False,
+			'error': 'Error interno del servidor',
+			'message': str(e)
+		}, 500)
+
+@app.route('/explain', methods=['POST'])
+@admission_controlled
+def explain():
+	"""
+	Devuelve la predicción junto con la contribución de cada feature
+	Acepta un paciente o un lote de pacientes, en JSON o MessagePack
+	"""
+	try:
+		try:
+			payload = read_request_payload()
+		except ValueError as e:
+			return api_response({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}, 400)
+		if payload is None:
+			return api_response({
+				'error': 'Content-Type debe ser application/json o application/msgpack'
+			}, 400)
+		
+		try:
+			records, is_batch = parse_patients(payload)
+		except ValueError as e:
+			return api_response({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}, 400)
+		
+		for i, record in enumerate(records):
+			is_valid, message = validate_input_data(record)
+			if not is_valid:
+				return api_response({
+					'error': 'Datos inválidos',
+					'message': f"Paciente {i}: {message}" if is_batch else message
+				}, 400)
+		
+		input_encoded = encode_input(records)
+		if deadline_expired():
+			return deadline_expired_response()
+		probabilities, contributions = compute_feature_attributions(input_encoded)
+		feature_names = feature_metadata['feature_names']
+		
+		results = []
+		for prediction, row in zip(build_predictions(probabilities), contributions):
+			order = np.argsort(-np.abs(row))
+			results.append({
+				'prediction': prediction,
+				'explanation': {
+					'method': 'occlusion',
+					'base_value': explain_base_value,
+					'contributions': dict(zip(feature_names, row)),
+					# Una feature en su línea base no aporta nada: no se lista
+					'top_features': [feature_names[j] for j in order[:5] if row[j] != 0]
+				}
+			})
+		
+		response = {'success': True, 'timestamp': datetime.now().isoformat()}
+		if is_batch:
+			response['results'] = results
+		else:
+			response.update(results[0])
+		
+		return api_response(response, 200)
+		
+	except Exception as e:
+		app.logger.exception('Error en explicación', extra=log_context())
+		return api_response({
+			'success': False,
+			'error': 'Error interno del servidor',
+			'message': str(e)
+		}, 500)
+
+@app.route('/whatif', methods=['POST'])
+@admission_controlled
+def whatif():
+	"""
+	Barrido what-if: cómo cambia el riesgo al variar una o más features
+	
+	Body: {"patient": {...}, "sweep": {"bmi": {"min": 15, "max": 45, "steps": 31}, "gender": null}}
+	o "sweep": ["bmi", "age"] para usar las grillas por defecto. Toda la grilla
+	se evalúa en una sola llamada al modelo.
 	"""
 	try:
-		# 1. Recibir datos JSON
 		if not request.is_json:
 			return jsonify({
 				'error': 'Content-Type debe ser application/json'
 			}), 400
 		
-		data = request.get_json()
+		data = request.get_json(silent=True)
+		patient = data.get('patient') if isinstance(data, dict) else None
+		sweep = data.get('sweep') if isinstance(data, dict) else None
+		
+		if not isinstance(patient, dict) or not sweep:
+			return jsonify({
+				'error': 'Datos inválidos',
+				'message': "Se requieren 'patient' (objeto) y 'sweep' (features a barrer)"
+			}), 400
 		
-		# 2. Validar datos de entrada
-		is_valid, message = validate_input_data(data)
+		if isinstance(sweep, list):
+			sweep = {feature: None for feature in sweep}
+		if not isinstance(sweep, dict):
+			return jsonify({
+				'error': 'Datos inválidos',
+				'message': "'sweep' debe ser un objeto o una lista de features"
+			}), 400
+		
+		is_valid, message = validate_input_data(patient)
 		if not is_valid:
 			return jsonify({
 				'error': 'Datos inválidos',
 				'message': message
 			}), 400
 		
-		# 3. Preprocesar datos
-		input_processed = preprocess_input(data)
+		base_encoded = encode_input(patient)[0]
+		try:
+			features, values, grid = build_whatif_grid(base_encoded, sweep)
+		except ValueError as e:
+			return jsonify({
+				'error': 'Datos inválidos',
+				'message': str(e)
+			}), 400
 		
-		# 4. Realizar predicción
-		prediction_proba = model.predict(input_processed, verbose=0)
-		risk_probability = float(prediction_proba[0][0])
-		risk_percentage = round(risk_probability * 100, 2)
+		if deadline_expired():
+			return deadline_expired_response()
 		
-		# 5. Generar mensaje de acción según el riesgo
-		if risk_percentage <= 50:
-			risk_message = "Recomendación de seguimiento/chequeos."
-			risk_level = "bajo"
-			action_required = "preventive"
-		else:
-			risk_message = "Alerta: Cita clínica inmediata."
-			risk_level = "alto"
-			action_required = "immediate"
+		# Fila 0: paciente base; resto: grilla completa (una sola inferencia)
+		probabilities = predict_proba(np.vstack([base_encoded, grid]))
+		curve = probabilities[1:].astype(np.float64).reshape(tuple(len(raw) for raw in values))
 		
-		# 6. Preparar respuesta
-		response = {
+		return jsonify({
 			'success': True,
-			'prediction': {
-				'risk_percentage': risk_percentage,
-				'risk_probability': risk_probability,
-				'risk_level': risk_level,
-				'risk_message': risk_message,
-				'action_required': action_required
-			},
-			'input_data': data,
+			'base_prediction': build_prediction(float(probabilities[0])),
+			'features': features,
+			'values': {feature: raw for feature, raw in zip(features, values)},
+			'risk_probability': curve.tolist(),
+			'risk_percentage': np.round(curve * 100, 2).tolist(),
 			'timestamp': datetime.now().isoformat()
-		}
-		
-		# 7. Si se solicita, guardar la información en CSV
-		save_param = request.args.get('save') or request.args.get('conservar') or request.args.get('guardar')
-		if _str_to_bool(save_param):
-			row_to_save = {
-				**data,
-				'timestamp': response['timestamp']
-			}
-			append_prediction_to_csv(row_to_save)
-
-		# Log de predicción (útil para auditoría)
-		app.logger.info(f"Predicción realizada: {risk_percentage}% - {risk_level}")
-		
-		return jsonify(response), 200
+		}), 200
 		
 	except Exception as e:
-		app.logger.error(f"Error en predicción: {str(e)}")
+		app.logger.exception('Error en what-if', extra=log_context())
 		return jsonify({
 			'success': False,
 			'error': 'Error interno del servidor',
 			'message': str(e)
 		}), 500
 
-@app.route('/features', methods=['GET'])
-def get_features():
+@app.route('/drift', methods=['GET'])
+def drift_report():
 	"""
-	Endpoint auxiliar para obtener información sobre las features esperadas
+	Métricas de drift (PSI/KS por feature) de la ventana reciente de
+	predicciones frente al perfil de referencia de entrenamiento
 	"""
-	if feature_metadata is None:
-		return jsonify({'error': 'Metadata no disponible'}), 503
+	if drift_monitor is None:
+		return jsonify({'error': 'Monitor de drift no disponible'}), 503
 	
 	return jsonify({
+		'success': True,
+		'drift': drift_monitor.snapshot(),
+		'timestamp': datetime.now().isoformat()
+	})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+	"""
+	Métricas del control de admisión: profundidad de cola, inferencias activas,
+	solicitudes rechazadas (cola llena / espera agotada) y descartadas por deadline;
+	y de la cola de logs: registros pendientes y descartados
+	"""
+	return jsonify({
+		'success': True,
+		'admission': admission.snapshot() if admission is not None else None,
+		'logging': {
+			'sample_rate': LOG_SAMPLE_RATE,
+			'queue_depth': log_handler.queue.qsize(),
+			'dropped': log_handler.dropped
+		} if log_handler is not None else None,
+		'timestamp': datetime.now().isoformat()
+	})
+
+@app.route('/admin/profiler/start', methods=['POST'])
+@admin_required
+def profiler_start():
+	"""
+	Arranca el profiler por muestreo sobre el proceso en ejecución
+	Cuerpo opcional: {"interval_ms": 10, "duration_s": 60, "include_idle": false}
+	"""
+	options = request.get_json(silent=True) or {}
+	try:
+		interval_ms = float(options.get('interval_ms', PROFILER_INTERVAL_MS))
+		duration_s = min(float(options.get('duration_s', PROFILER_MAX_SECONDS)), PROFILER_MAX_SECONDS)
+	except (TypeError, ValueError):
+		return jsonify({'success': False, 'error': 'interval_ms y duration_s deben ser numéricos'}), 400
+	if interval_ms < 1 or duration_s <= 0:
+		return jsonify({'success': False, 'error': 'interval_ms debe ser >= 1 y duration_s > 0'}), 400
+	
+	if not profiler.start(interval_ms / 1000, duration_s, _str_to_bool(options.get('include_idle'))):
+		return jsonify({'success': False, 'error': 'El profiler ya está en marcha', 'profiler': profiler.summary()}), 409
+	
+	app.logger.warning('Profiler iniciado', extra=log_context(interval_ms=interval_ms, duration_s=duration_s))
+	return jsonify({'success': True, 'profiler': profiler.summary()})
+
+@app.route('/admin/profiler/stop', methods=['POST'])
+@admin_required
+def profiler_stop():
+	"""
+	Detiene el profiler; las pilas quedan disponibles en /admin/profiler/profile
+	"""
+	return jsonify({'success': True, 'profiler': profiler.stop()})
+
+@app.route('/admin/profiler/profile', methods=['GET'])
+@admin_required
+def profiler_profile():
+	"""
+	Pilas muestreadas en formato collapsed (flamegraph.pl, speedscope, inferno)
+	"""
+	filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+	return Response(
+		profiler.collapsed(),
+		mimetype='text/plain',
+		headers={'Content-Disposition': f'attachment; filename={filename}'}
+	)
+
+@app.route('/policy', methods=['GET'])
+def get_policy():
+	"""
+	Política de decisión activa: umbrales, bandas y su origen (p. ej. ROC de validación)
+	"""
+	if decision_policy is None:
+		return jsonify({'error': 'Política de decisión no disponible'}), 503
+	
+	return jsonify({
+		'success': True,
+		'policy': decision_policy.policy
+	})
+
+def get_features_info():
+	"""
+	Features esperadas y encoders, o None si la metadata no está cargada
+	"""
+	if feature_metadata is None:
+		return None
+	
+	return {
 		'features': feature_metadata['feature_names'],
 		'encoders': feature_metadata['encoders'],
 		'feature_info': {
@@ -308,12 +1425,23 @@ def get_features():
 			'categorical': ['gender', 'alcohol_consumption', 'smoking_status', 'physical_activity_level'],
 			'binary': ['hepatitis_b', 'hepatitis_c', 'cirrhosis_history', 'family_history_cancer', 'diabetes']
 		}
-	})
+	}
+
+@app.route('/features', methods=['GET'])
+def get_features():
+	"""
+	Endpoint auxiliar para obtener información sobre las features esperadas
+	"""
+	features_info = get_features_info()
+	if features_info is None:
+		return jsonify({'error': 'Metadata no disponible'}), 503
+	
+	return jsonify(features_info)
 
 # Ruta catch-all para servir assets del frontend desde la raíz (styles.css, script.js, imágenes)
 @app.route('/<path:filename>')
 def serve_root_assets(filename):
-	return send_from_directory(FRONTEND_FOLDER, filename)
+	return serve_frontend_file(filename)
 
 @app.errorhandler(404)
 def not_found(error):
@@ -335,13 +1463,10 @@ def internal_error(error):
 		'message': 'Por favor, contacta al administrador'
 	}), 500
 
-# Configuración de logging
 if __name__ == '__main__':
-	import logging
-	logging.basicConfig(
-		level=logging.INFO,
-		format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-	)
+	# Solo al arrancar el servidor: importar el módulo (benchmarks, tests, la
+	# app asíncrona) no debe reemplazar los handlers del logger raíz
+	init_logging()
 	
 	# Cargar artefactos del modelo al iniciar
 	if load_model_artifacts():
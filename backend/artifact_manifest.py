@@ -0,0 +1,55 @@
+"""
+Verificación de los artefactos del modelo al cargarlos
+model/train_model.py deja en saved_models/run_manifest.json el SHA-256 de
+cada artefacto que produjo; aquí se recalcula el de los archivos que el
+backend va a cargar y se compara, de modo que un artefacto copiado a medias,
+editado a mano o de otra ejecución se detecta antes de servir con él
+"""
+
+import hashlib
+import json
+import os
+
+class ArtifactVerificationError(Exception):
+	"""
+	Algún artefacto no coincide con el manifiesto (modo estricto)
+	"""
+
+def file_sha256(path, chunk_size=1 << 20):
+	"""
+	SHA-256 de un archivo leído por bloques
+	"""
+	digest = hashlib.sha256()
+	with open(path, 'rb') as f:
+		for block in iter(lambda: f.read(chunk_size), b''):
+			digest.update(block)
+	return digest.hexdigest()
+
+def verify_artifacts(manifest_path, paths):
+	"""
+	Compara los archivos `paths` con los hashes del manifiesto (por nombre de
+	archivo, así una copia en /dev/shm se verifica contra su original)
+
+	Returns:
+		Diccionario de estado: run_id, verified (bool), los nombres que
+		coinciden (ok), los que no (mismatched) y los que el manifiesto no
+		registra (unlisted); sin manifiesto verified es None
+	"""
+	try:
+		with open(manifest_path, 'r') as f:
+			manifest = json.load(f)
+	except FileNotFoundError:
+		return {'run_id': None, 'verified': None, 'ok': [], 'mismatched': [], 'unlisted': []}
+
+	artifacts = manifest.get('artifacts', {})
+	status = {'run_id': manifest.get('run_id'), 'verified': True, 'ok': [], 'mismatched': [], 'unlisted': []}
+	for path in paths:
+		name = os.path.basename(path)
+		if name not in artifacts:
+			status['unlisted'].append(name)
+		elif file_sha256(path) == artifacts[name]['sha256']:
+			status['ok'].append(name)
+		else:
+			status['mismatched'].append(name)
+	status['verified'] = not status['mismatched'] and not status['unlisted']
+	return status
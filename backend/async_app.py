@@ -0,0 +1,303 @@
+"""
+Variante asíncrona del servidor (aiohttp) para /predict, /health y /features
+Las solicitudes se leen y parsean en el event loop, por lo que un cliente
+lento o miles de conexiones keep-alive inactivas no ocupan ningún hilo.
+El preprocesamiento, la inferencia y la escritura del CSV se delegan a un
+executor dedicado (hilos o procesos, dimensionado a los núcleos) que ejecuta
+exactamente el mismo núcleo que la app Flask (app.run_prediction), así que
+los resultados son idénticos a los del servidor síncrono
+
+Uso (desde backend/):
+	python async_app.py
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from aiohttp import web
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header, parse_options_header
+
+import app as sync_app
+from admission import AdmissionRejected
+from json_provider import numpy_to_builtin
+from profiling import RequestTrace, NO_TRACE
+from thread_config import available_cpus, parse_cpu_list, worker_cpus
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+# Executor de inferencia: 'thread' (comparte el modelo del proceso) o 'process'
+# (cada proceso carga sus artefactos; evita el GIL en el preprocesamiento)
+ASYNC_EXECUTOR = os.environ.get('ASYNC_EXECUTOR', 'thread').strip().lower()
+ASYNC_WORKERS = int(os.environ.get('ASYNC_WORKERS', str(os.cpu_count() or 4)))
+ASYNC_HOST = os.environ.get('ASYNC_HOST', '0.0.0.0')
+ASYNC_PORT = int(os.environ.get('ASYNC_PORT', '5001'))
+# Segundos que se mantiene abierta una conexión keep-alive inactiva
+ASYNC_KEEPALIVE_TIMEOUT = float(os.environ.get('ASYNC_KEEPALIVE_TIMEOUT', '75'))
+# Con el executor 'process', fijar cada proceso a un bloque disjunto de núcleos
+# (de CPU_AFFINITY o, si está vacío, de todos los disponibles)
+ASYNC_PIN_WORKERS = os.environ.get('ASYNC_PIN_WORKERS', 'false').strip().lower() in ('1', 'true', 'yes')
+
+def _init_process_worker(worker_counter):
+	"""
+	Inicializa un proceso del executor cargando sus propios artefactos; si se
+	fijan los workers, antes elige su bloque de núcleos según su índice
+	"""
+	if ASYNC_PIN_WORKERS:
+		with worker_counter.get_lock():
+			worker_index = worker_counter.value
+			worker_counter.value += 1
+		cpus = parse_cpu_list(sync_app.CPU_AFFINITY) if sync_app.CPU_AFFINITY else available_cpus()
+		sync_app.CPU_AFFINITY = ','.join(map(str, worker_cpus(cpus, worker_index, ASYNC_WORKERS)))
+	sync_app.init_logging()
+	sync_app.load_model_artifacts()
+
+def _run_prediction(data, include_input, save, deadline, traced):
+	"""
+	Se ejecuta en el executor; la traza se crea aquí para que sus etapas
+	vuelvan también desde un proceso del executor
+	"""
+	trace = RequestTrace() if traced else NO_TRACE
+	payload, status = sync_app.run_prediction(data, include_input=include_input, save=save, deadline=deadline, trace=trace)
+	return payload, status, (trace.stages if traced else None)
+
+def dumps_json(payload):
+	if orjson is not None:
+		return orjson.dumps(payload, default=numpy_to_builtin, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+	return json.dumps(payload, default=numpy_to_builtin).encode('utf-8')
+
+def wants_msgpack(request):
+	"""
+	Negociación por q-values de la cabecera Accept, igual que la app Flask
+	"""
+	return sync_app.prefers_msgpack(parse_accept_header(request.headers.get('Accept'), MIMEAccept))
+
+def request_mimetype(request):
+	"""
+	Content-Type sin parámetros (charset, ...) y en minúsculas, como request.mimetype
+	"""
+	return parse_options_header(request.headers.get('Content-Type', ''))[0].lower()
+
+def api_response(request, payload, status=200, headers=None):
+	"""
+	Serializa la respuesta en el formato negociado (JSON por defecto o MessagePack)
+	"""
+	if wants_msgpack(request):
+		import msgpack
+		body = msgpack.packb(payload, use_bin_type=True, default=numpy_to_builtin)
+		return web.Response(body=body, status=status, content_type='application/msgpack', headers=headers)
+	return web.Response(body=dumps_json(payload), status=status, content_type='application/json', headers=headers)
+
+async def read_payload(request):
+	"""
+	Lee y decodifica el cuerpo en el event loop (JSON o MessagePack) con los
+	mismos criterios que app.read_request_payload: application/json y los
+	tipos +json (como request.is_json), con o sin parámetros
+
+	Returns:
+		El payload decodificado, o None si el Content-Type no es soportado
+
+	Raises:
+		ValueError: si el cuerpo no se puede decodificar (400 para el cliente)
+	"""
+	mimetype = request_mimetype(request)
+	body = await request.read()
+	if mimetype in sync_app.MSGPACK_MIMETYPES:
+		import msgpack
+		try:
+			return msgpack.unpackb(body, raw=False)
+		except (ValueError, TypeError) as e:
+			raise ValueError(f"Cuerpo MessagePack mal formado: {str(e) or type(e).__name__}") from None
+	if mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json')):
+		try:
+			payload = orjson.loads(body) if orjson is not None else json.loads(body)
+		except ValueError:
+			payload = None
+		if payload is None:
+			raise ValueError("Cuerpo JSON mal formado")
+		return payload
+	return None
+
+def request_deadline(request):
+	"""
+	Deadline (time.monotonic, común a todos los procesos) a partir de
+	X-Request-Timeout-Ms o DEFAULT_REQUEST_TIMEOUT_MS; None si no hay
+	"""
+	try:
+		timeout_ms = float(request.headers.get('X-Request-Timeout-Ms') or sync_app.DEFAULT_REQUEST_TIMEOUT_MS)
+	except ValueError:
+		timeout_ms = sync_app.DEFAULT_REQUEST_TIMEOUT_MS
+	if timeout_ms <= 0:
+		return None
+	return time.monotonic() + timeout_ms / 1000
+
+def rejection_response(request, rejection):
+	return api_response(request, {
+		'success': False,
+		'error': 'Servidor saturado' if rejection.status == 429 else 'Servicio no disponible',
+		'message': rejection.reason
+	}, rejection.status, headers={'Retry-After': str(rejection.retry_after)})
+
+@web.middleware
+async def logging_middleware(request, handler):
+	"""
+	Igual que before/after_request en la app Flask: request_id en X-Request-ID
+	y una línea de log estructurada (muestreada si es exitosa) por solicitud
+	"""
+	request_id = (request.headers.get('X-Request-ID') or uuid.uuid4().hex)[:128]
+	request['request_id'] = request_id
+	started = time.perf_counter()
+	try:
+		response = await handler(request)
+	except web.HTTPException as e:
+		sync_app.request_logger.log(request_id, request.method, request.path, e.status, (time.perf_counter() - started) * 1000)
+		raise
+	response.headers['X-Request-ID'] = request_id
+	sync_app.request_logger.log(
+		request_id, request.method, request.path, response.status,
+		(time.perf_counter() - started) * 1000, **request.get('log_fields', {})
+	)
+	return response
+
+@web.middleware
+async def cors_middleware(request, handler):
+	"""
+	Equivalente a flask_cors con la configuración por defecto (cualquier origen)
+	"""
+	if request.method == 'OPTIONS':
+		response = web.Response()
+		response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+		response.headers['Access-Control-Allow-Headers'] = request.headers.get('Access-Control-Request-Headers', '*')
+	else:
+		response = await handler(request)
+	response.headers['Access-Control-Allow-Origin'] = '*'
+	return response
+
+async def predict(request):
+	"""
+	POST /predict: mismo contrato que la app Flask
+	"""
+	state = request.app['state']
+	deadline = request_deadline(request)
+	trace = RequestTrace() if sync_app._str_to_bool(request.headers.get('X-Request-Trace')) else None
+
+	# Backpressure: plazas del executor + cola acotada, igual que el control de admisión síncrono
+	if state['inflight'] >= ASYNC_WORKERS + sync_app.MAX_QUEUE_SIZE:
+		state['shed'] += 1
+		return rejection_response(request, AdmissionRejected(429, 'Cola de inferencia llena', 1))
+
+	state['inflight'] += 1
+	try:
+		try:
+			data = await read_payload(request)
+		except ValueError as e:
+			return api_response(request, {'error': 'Datos inválidos', 'message': str(e)}, 400)
+		if data is None:
+			return api_response(request, {
+				'error': 'Content-Type debe ser application/json o application/msgpack'
+			}, 400)
+		if trace is not None:
+			trace.mark('parse')
+
+		query = request.query
+		save_param = query.get('save') or query.get('conservar') or query.get('guardar')
+		loop = asyncio.get_running_loop()
+		dispatched = time.perf_counter()
+		payload, status, stages = await loop.run_in_executor(
+			state['executor'], _run_prediction,
+			data, sync_app._str_to_bool(query.get('include_input', 'true')), sync_app._str_to_bool(save_param), deadline,
+			trace is not None
+		)
+		request['log_fields'] = sync_app.prediction_log_fields(payload)
+		if trace is None:
+			return api_response(request, payload, status)
+
+		# 'dispatch': espera en el executor + ida y vuelta al hilo/proceso
+		executor_ms = (time.perf_counter() - dispatched) * 1000
+		trace.add('dispatch', executor_ms - sum(duration for _, duration in stages))
+		for stage, duration in stages:
+			trace.add(stage, duration)
+		response = api_response(request, payload, status)
+		trace.mark('serialize')
+		response.headers['Server-Timing'] = trace.server_timing()
+		response.headers['Timing-Allow-Origin'] = '*'
+		return response
+
+	except AdmissionRejected as e:
+		return rejection_response(request, e)
+	except Exception as e:
+		sync_app.app.logger.exception('Error en predicción', extra={'fields': {
+			'request_id': request['request_id'], 'path': request.path
+		}})
+		return api_response(request, {
+			'success': False,
+			'error': 'Error interno del servidor',
+			'message': str(e)
+		}, 500)
+	finally:
+		state['inflight'] -= 1
+
+async def health(request):
+	health_status = sync_app.get_health_status()
+	health_status['server'] = {
+		'mode': 'async',
+		'executor': ASYNC_EXECUTOR,
+		'workers': ASYNC_WORKERS,
+		'pinned_workers': ASYNC_EXECUTOR == 'process' and ASYNC_PIN_WORKERS,
+		'inflight': request.app['state']['inflight'],
+		'shed': request.app['state']['shed']
+	}
+	return api_response(request, health_status, 200 if health_status['status'] == 'healthy' else 503)
+
+async def features(request):
+	features_info = sync_app.get_features_info()
+	if features_info is None:
+		return api_response(request, {'error': 'Metadata no disponible'}, 503)
+	return api_response(request, features_info)
+
+def create_app():
+	"""
+	Crea la aplicación aiohttp y su executor de inferencia
+	"""
+	if ASYNC_EXECUTOR == 'process':
+		mp_context = multiprocessing.get_context('spawn')
+		executor = ProcessPoolExecutor(
+			max_workers=ASYNC_WORKERS,
+			mp_context=mp_context,
+			initializer=_init_process_worker,
+			initargs=(mp_context.Value('i', 0),)
+		)
+	elif ASYNC_EXECUTOR == 'thread':
+		executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='inference')
+	else:
+		raise ValueError(f"ASYNC_EXECUTOR desconocido: {ASYNC_EXECUTOR} (use 'thread' o 'process')")
+
+	application = web.Application(middlewares=[logging_middleware, cors_middleware])
+	application['state'] = {'executor': executor, 'inflight': 0, 'shed': 0}
+	application.router.add_post('/predict', predict)
+	application.router.add_get('/health', health)
+	application.router.add_get('/features', features)
+
+	async def shutdown_executor(application):
+		application['state']['executor'].shutdown(wait=False, cancel_futures=True)
+	application.on_cleanup.append(shutdown_executor)
+
+	return application
+
+if __name__ == '__main__':
+	sync_app.init_logging()
+
+	if sync_app.load_model_artifacts():
+		print(f"\nAPI asíncrona lista (executor: {ASYNC_EXECUTOR}, {ASYNC_WORKERS} workers)")
+		print(f"Ejecutando en http://localhost:{ASYNC_PORT}")
+		web.run_app(create_app(), host=ASYNC_HOST, port=ASYNC_PORT, keepalive_timeout=ASYNC_KEEPALIVE_TIMEOUT, access_log=None)
+	else:
+		print("\nError: No se pudieron cargar los artefactos del modelo")
+		print("Asegúrate de entrenar el modelo primero ejecutando: python ../model/train_model.py")
@@ -0,0 +1,113 @@
+"""
+Benchmark de serialización JSON: json de la stdlib vs orjson
+Mide el parseo de la solicitud (request.get_json) y el renderizado de la
+respuesta (jsonify) con payloads equivalentes a /predict, /predict/batch y /explain
+
+Uso:
+	cd backend
+	python benchmark_json.py [--repeat 2000]
+"""
+
+import argparse
+import json
+import timeit
+import numpy as np
+from flask import Flask, jsonify, request
+from json_provider import create_json_provider, orjson
+
+PATIENT = {
+	"age": 55, "gender": "Male", "bmi": 28.5,
+	"alcohol_consumption": "Regular", "smoking_status": "Former",
+	"physical_activity_level": "Moderate", "liver_function_score": 65.5,
+	"alpha_fetoprotein_level": 15.3, "hepatitis_b": 0, "hepatitis_c": 0,
+	"cirrhosis_history": 1, "family_history_cancer": 1, "diabetes": 0
+}
+
+PREDICTION = {
+	'risk_percentage': 67.5,
+	'risk_probability': 0.6750321388244629,
+	'risk_level': 'alto',
+	'risk_message': 'Alerta: Cita clínica inmediata.',
+	'action_required': 'immediate'
+}
+
+def build_payloads():
+	"""
+	Payloads representativos (request, response) de cada endpoint
+	"""
+	rng = np.random.default_rng(42)
+	batch = [PATIENT] * 1000
+
+	return {
+		'predict': (
+			PATIENT,
+			{'success': True, 'prediction': PREDICTION, 'input_data': PATIENT, 'timestamp': '2024-01-15T10:30:00'}
+		),
+		'predict/batch (1000)': (
+			{'patients': batch},
+			{'success': True, 'count': len(batch), 'predictions': [PREDICTION] * len(batch),
+			 'input_data': batch, 'timestamp': '2024-01-15T10:30:00'}
+		),
+		'explain (numpy)': (
+			PATIENT,
+			{'success': True, 'prediction': PREDICTION, 'explanation': {
+				'method': 'occlusion',
+				'base_value': np.float64(0.0123),
+				'contributions': dict(zip(PATIENT.keys(), rng.normal(size=len(PATIENT)).astype(np.float32))),
+			}}
+		)
+	}
+
+def bench_provider(name, payloads, repeat):
+	"""
+	Devuelve {payload: (µs parseo, µs renderizado)} para un proveedor
+	"""
+	app = Flask(__name__)
+	app.json = create_json_provider(app, name)
+	results = {}
+
+	for label, (req_obj, resp_obj) in payloads.items():
+		body = json.dumps(req_obj)
+
+		with app.test_request_context('/predict', method='POST', data=body, content_type='application/json'):
+			def parse():
+				# Forzar el parseo en cada iteración (get_json cachea el resultado)
+				request._cached_json = (Ellipsis, Ellipsis)
+				return request.get_json()
+
+			parse_time = timeit.timeit(parse, number=repeat) / repeat
+
+		with app.app_context():
+			render_time = timeit.timeit(lambda: jsonify(resp_obj).get_data(), number=repeat) / repeat
+
+		results[label] = (parse_time * 1e6, render_time * 1e6)
+
+	return results
+
+def main(repeat):
+	payloads = build_payloads()
+	providers = ['std'] + (['orjson'] if orjson is not None else [])
+
+	if orjson is None:
+		print("⚠️ orjson no instalado: solo se mide el proveedor de la stdlib (pip install orjson)")
+
+	results = {name: bench_provider(name, payloads, repeat) for name in providers}
+
+	print(f"\n{'Payload':<24}{'Proveedor':<10}{'Parseo (µs)':>14}{'Render (µs)':>14}")
+	print("-" * 62)
+	for label in payloads:
+		for name in providers:
+			parse_us, render_us = results[name][label]
+			print(f"{label:<24}{name:<10}{parse_us:>14.1f}{render_us:>14.1f}")
+		if 'orjson' in results:
+			std_total = sum(results['std'][label])
+			fast_total = sum(results['orjson'][label])
+			print(f"{'':<24}{'speedup':<10}{std_total / fast_total:>27.1f}x")
+		print("-" * 62)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Benchmark de proveedores JSON (stdlib vs orjson)')
+	parser.add_argument('--repeat', type=int, default=2000, help='Iteraciones por medición')
+	args = parser.parse_args()
+
+	main(args.repeat)
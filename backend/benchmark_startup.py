@@ -0,0 +1,138 @@
+"""
+Benchmark del tiempo de arranque de la API y de la CLI de entrenamiento
+Cada objetivo se ejecuta en un intérprete nuevo (el arranque en frío es lo
+que paga un worker de gunicorn, un reinicio o un job de CI) y se informa la
+mediana del tiempo de pared. Una ejecución adicional con `python -X importtime`
+desglosa el tiempo de import por paquete para ver qué lo domina. Si la
+mediana de un objetivo supera su presupuesto el script termina con código 1,
+de modo que un import pesado añadido al camino de arranque (pandas en la API,
+TensorFlow en --help) se detecta en CI
+
+Uso:
+	cd backend
+	python benchmark_startup.py [--runs 5] [--targets api_import train_cli_help] [--budget api_import=500]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAIN_SCRIPT = os.path.join(BACKEND_DIR, '..', 'model', 'train_model.py')
+
+READY_CODE = (
+	"import contextlib, io, app\n"
+	"with contextlib.redirect_stdout(io.StringIO()):\n"
+	"\tok = app.load_model_artifacts()\n"
+	"raise SystemExit(0 if ok else 1)"
+)
+
+# Objetivo -> argumentos del intérprete y variables de entorno
+TARGETS = {
+	'api_import': {'args': ['-c', 'import app'], 'env': {}},
+	'api_ready_onnx': {'args': ['-c', READY_CODE], 'env': {'MODEL_BACKEND': 'onnx'}},
+	'api_ready_mmap': {'args': ['-c', READY_CODE], 'env': {'MODEL_BACKEND': 'mmap'}},
+	'train_cli_help': {'args': [TRAIN_SCRIPT, '--help'], 'env': {}}
+}
+
+# Presupuestos por defecto (ms de mediana) con margen sobre lo medido en un
+# núcleo (~400 ms la API, ~200 ms --help); volver a importar pandas en la API
+# (~670 ms) o scikit-learn/TensorFlow en --help (2-7 s) los rebasa
+BUDGETS = {
+	'api_import': 600,
+	'api_ready_onnx': 800,
+	'api_ready_mmap': 700,
+	'train_cli_help': 1000
+}
+
+def target_env(target):
+	"""
+	Entorno del subproceso: el actual más las variables del objetivo
+	"""
+	env = dict(os.environ)
+	env.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+	env.update(TARGETS[target]['env'])
+	return env
+
+def run_target(target, importtime=False):
+	"""
+	Ejecuta un objetivo en un subproceso (cwd backend/, como la API)
+
+	Returns:
+		(segundos de pared, stderr)
+	"""
+	command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + TARGETS[target]['args']
+	start = time.perf_counter()
+	result = subprocess.run(command, cwd=BACKEND_DIR, env=target_env(target), capture_output=True, text=True)
+	elapsed = time.perf_counter() - start
+	if result.returncode != 0:
+		raise RuntimeError(f"{target} terminó con código {result.returncode}:\n{result.stderr[-2000:]}")
+	return elapsed, result.stderr
+
+def import_costs(importtime_output):
+	"""
+	Tiempo de import propio (self) agregado por paquete raíz a partir de la
+	salida de -X importtime, en ms y de mayor a menor
+	"""
+	costs = defaultdict(float)
+	for line in importtime_output.splitlines():
+		if not line.startswith('import time:'):
+			continue
+		fields = line[len('import time:'):].split('|')
+		if len(fields) != 3 or not fields[0].strip().isdigit():
+			continue
+		costs[fields[2].strip().split('.')[0]] += int(fields[0]) / 1000
+	return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+def parse_budgets(overrides):
+	"""
+	Presupuestos por defecto con los `nombre=ms` de --budget aplicados
+	"""
+	budgets = dict(BUDGETS)
+	for override in overrides:
+		name, _, value = override.partition('=')
+		if name not in TARGETS or not value:
+			raise SystemExit(f"Presupuesto inválido: {override!r} (se espera objetivo=ms con objetivo en {list(TARGETS)})")
+		budgets[name] = float(value)
+	return budgets
+
+def main(targets, runs, budgets, top):
+	print(f"Python {sys.version.split()[0]} - mediana de {runs} arranques en frío por objetivo")
+	print(f"\n{'Objetivo':<18}{'Mediana (ms)':>14}{'Mín (ms)':>10}{'Presupuesto':>13}  Imports más pesados")
+	print("-" * 100)
+
+	exceeded = []
+	for target in targets:
+		run_target(target)  # calentar la caché de archivos del sistema
+		samples = [run_target(target)[0] * 1000 for _ in range(runs)]
+		median = statistics.median(samples)
+		heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in import_costs(run_target(target, importtime=True)[1])[:top])
+
+		budget = budgets.get(target)
+		status = '-' if budget is None else f"{budget:.0f}{' ✗' if median > budget else ' ✓'}"
+		if budget is not None and median > budget:
+			exceeded.append(target)
+		print(f"{target:<18}{median:>14.0f}{min(samples):>10.0f}{status:>13}  {heaviest}")
+	print("-" * 100)
+
+	if exceeded:
+		print(f"Presupuesto de arranque superado: {', '.join(exceeded)}")
+		return 1
+	print("Todos los objetivos dentro de presupuesto")
+	return 0
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Tiempo de arranque de la API y de la CLI de entrenamiento con presupuesto')
+	parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS),
+		help='Objetivos a medir')
+	parser.add_argument('--runs', type=int, default=5, help='Arranques medidos por objetivo')
+	parser.add_argument('--budget', action='append', default=[], metavar='OBJETIVO=MS',
+		help='Sustituye el presupuesto (ms de mediana) de un objetivo; repetible')
+	parser.add_argument('--top', type=int, default=4, help='Paquetes de import a mostrar por objetivo')
+	args = parser.parse_args()
+
+	sys.exit(main(args.targets, args.runs, parse_budgets(args.budget), args.top))
@@ -0,0 +1,166 @@
+"""
+Benchmark de configuración de hilos para la inferencia
+Barre combinaciones de backend, hilos de inferencia (intra-op de ONNX Runtime
+y TensorFlow + OpenMP/MKL/OpenBLAS), afinidad de CPU y clientes concurrentes.
+Cada combinación se mide en un proceso nuevo (los pools de hilos solo se
+pueden configurar una vez por proceso) llamando a app.run_prediction desde N
+hilos, como los hilos de Flask, y se informa throughput y latencias p50/p99
+
+Uso:
+	cd backend
+	python benchmark_threads.py [--backends onnx mmap] [--threads 1 2 4] [--concurrency 1 4] [--pin] [--duration 3]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from thread_config import available_cpus
+
+PATIENT = {
+	"age": 55, "gender": "Male", "bmi": 28.5,
+	"alcohol_consumption": "Regular", "smoking_status": "Former",
+	"physical_activity_level": "Moderate", "liver_function_score": 65.5,
+	"alpha_fetoprotein_level": 15.3, "hepatitis_b": 0, "hepatitis_c": 0,
+	"cirrhosis_history": 1, "family_history_cancer": 1, "diabetes": 0
+}
+
+def config_env(config):
+	"""
+	Variables de entorno que aplica load_model_artifacts para una combinación
+	"""
+	threads = str(config['threads'])
+	env = dict(os.environ)
+	env.update({
+		'MODEL_BACKEND': config['backend'],
+		'ORT_INTRA_OP_THREADS': threads,
+		'ORT_INTER_OP_THREADS': '1',
+		'TF_INTRA_OP_THREADS': threads,
+		'TF_INTER_OP_THREADS': '1',
+		'NATIVE_THREADS': threads,
+		'CPU_AFFINITY': config['cpu_affinity']
+	})
+	return env
+
+def measure(concurrency, duration):
+	"""
+	Se ejecuta en el proceso hijo: carga la app con la configuración del
+	entorno y lanza `concurrency` hilos que llaman a run_prediction durante
+	`duration` segundos
+	"""
+	import app
+
+	with contextlib.redirect_stdout(io.StringIO()):
+		if not app.load_model_artifacts():
+			raise RuntimeError("No se pudieron cargar los artefactos del modelo")
+
+	for _ in range(50):
+		app.run_prediction(PATIENT, include_input=False)
+
+	latencies = [[] for _ in range(concurrency)]
+	stop_at = time.perf_counter() + duration
+
+	def client(samples):
+		while time.perf_counter() < stop_at:
+			start = time.perf_counter()
+			app.run_prediction(PATIENT, include_input=False)
+			samples.append(time.perf_counter() - start)
+
+	clients = [threading.Thread(target=client, args=(samples,)) for samples in latencies]
+	start = time.perf_counter()
+	for thread in clients:
+		thread.start()
+	for thread in clients:
+		thread.join()
+	elapsed = time.perf_counter() - start
+
+	samples = np.concatenate([np.asarray(s) for s in latencies])
+	return {
+		'model_backend': app.model_backend,
+		'requests_per_s': len(samples) / elapsed,
+		'p50_ms': float(np.percentile(samples, 50) * 1000),
+		'p99_ms': float(np.percentile(samples, 99) * 1000)
+	}
+
+def run_config(config, duration):
+	"""
+	Mide una combinación en un subproceso y devuelve sus métricas
+	"""
+	output = subprocess.run(
+		[sys.executable, __file__, '--worker', json.dumps(config), '--duration', str(duration)],
+		env=config_env(config), capture_output=True, text=True, check=True
+	).stdout
+	return json.loads(output.strip().splitlines()[-1])
+
+def build_configs(backends, thread_counts, concurrencies, pin):
+	"""
+	Combinaciones a medir; con --pin cada una se repite fijada a tantos
+	núcleos como hilos de inferencia (un worker con su propio bloque de núcleos)
+	"""
+	cpus = available_cpus()
+	configs = []
+	for backend in backends:
+		for threads in thread_counts:
+			affinities = ['']
+			if pin and threads <= len(cpus):
+				affinities.append(','.join(map(str, cpus[:threads])))
+			for cpu_affinity in affinities:
+				for concurrency in concurrencies:
+					configs.append({
+						'backend': backend,
+						'threads': threads,
+						'cpu_affinity': cpu_affinity,
+						'concurrency': concurrency
+					})
+	return configs
+
+def main(backends, thread_counts, concurrencies, pin, duration):
+	configs = build_configs(backends, thread_counts, concurrencies, pin)
+	print(f"Núcleos disponibles: {available_cpus()} - {len(configs)} combinaciones de {duration:g} s")
+
+	results = []
+	print(f"\n{'Backend':<8}{'Hilos':>6}{'Afinidad':>12}{'Clientes':>10}{'req/s':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+	print("-" * 66)
+	for config in configs:
+		result = run_config(config, duration)
+		results.append((config, result))
+		print(f"{result['model_backend']:<8}{config['threads']:>6}{config['cpu_affinity'] or '-':>12}"
+			f"{config['concurrency']:>10}{result['requests_per_s']:>10.0f}{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+	print("-" * 66)
+
+	for label, key, pick in (('Mejor throughput', 'requests_per_s', max), ('Mejor p99', 'p99_ms', min)):
+		config, result = pick(results, key=lambda item: item[1][key])
+		env = config_env(config)
+		settings = ' '.join(
+			f"{var}={env[var]}" for var in ('MODEL_BACKEND', 'ORT_INTRA_OP_THREADS', 'TF_INTRA_OP_THREADS', 'NATIVE_THREADS', 'CPU_AFFINITY')
+			if env[var]
+		)
+		print(f"{label}: {result['requests_per_s']:.0f} req/s, p99 {result['p99_ms']:.3f} ms "
+			f"con {config['concurrency']} clientes -> {settings}")
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Barrido de hilos, afinidad y concurrencia para la inferencia')
+	parser.add_argument('--backends', nargs='+', choices=['keras', 'onnx', 'mmap'], default=['onnx', 'mmap'],
+		help='Backends de inferencia a medir')
+	parser.add_argument('--threads', nargs='+', type=int, default=None,
+		help='Hilos de inferencia a probar (por defecto 1, 2, 4... hasta los núcleos disponibles)')
+	parser.add_argument('--concurrency', nargs='+', type=int, default=None,
+		help='Clientes concurrentes a probar (por defecto 1 y el número de núcleos)')
+	parser.add_argument('--pin', action='store_true', help='Medir también cada combinación con afinidad de CPU')
+	parser.add_argument('--duration', type=float, default=3.0, help='Segundos de medición por combinación')
+	parser.add_argument('--worker', help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.worker:
+		print(json.dumps(measure(json.loads(args.worker)['concurrency'], args.duration)))
+	else:
+		num_cpus = len(available_cpus())
+		thread_counts = args.threads or [2 ** i for i in range(num_cpus.bit_length()) if 2 ** i <= num_cpus]
+		concurrencies = args.concurrency or sorted({1, num_cpus})
+		main(args.backends, thread_counts, concurrencies, args.pin, args.duration)
@@ -0,0 +1,81 @@
+"""
+Política de decisión: bandas de riesgo definidas por umbrales sobre la probabilidad
+La tabla (umbrales + nivel/mensaje/acción de cada banda) se carga desde
+saved_models/decision_policy.json junto con los artefactos del modelo, de modo
+que los umbrales se pueden ajustar sin tocar el código
+
+Cada probabilidad se asigna a su banda con una búsqueda binaria vectorizada
+(np.searchsorted) sobre los umbrales ordenados, así un lote de millones de
+scores se clasifica en una sola llamada
+"""
+
+import json
+import os
+import numpy as np
+
+# Política por defecto: la regla original `round(p * 100, 2) <= 50` -> bajo. Se
+# comparaba el porcentaje redondeado, así que p = 0.5 (y todo lo que se muestra
+# como 50%) es bajo y el riesgo alto empieza en 0.50005 (50.01%)
+DEFAULT_POLICY = {
+	'version': 1,
+	'source': {'method': 'default'},
+	'thresholds': [0.50005],
+	'bands': [
+		{
+			'risk_level': 'bajo',
+			'risk_message': 'Recomendación de seguimiento/chequeos.',
+			'action_required': 'preventive'
+		},
+		{
+			'risk_level': 'alto',
+			'risk_message': 'Alerta: Cita clínica inmediata.',
+			'action_required': 'immediate'
+		}
+	]
+}
+
+class DecisionPolicy:
+	"""
+	Umbrales ordenados t_1 < ... < t_k que definen k + 1 bandas: la banda i
+	cubre [t_i, t_{i+1}), es decir, cada umbral es el límite inferior
+	(inclusivo) de la banda siguiente
+	"""
+
+	def __init__(self, policy):
+		thresholds = np.asarray(policy['thresholds'], dtype=np.float64)
+		if len(policy['bands']) != len(thresholds) + 1:
+			raise ValueError("La política debe tener exactamente un umbral menos que bandas")
+		if np.any(np.diff(thresholds) < 0):
+			raise ValueError("Los umbrales de la política deben estar ordenados de menor a mayor")
+
+		self.policy = policy
+		self.thresholds = thresholds
+		self.bands = [
+			{
+				'risk_level': band['risk_level'],
+				'risk_message': band['risk_message'],
+				'action_required': band['action_required']
+			}
+			for band in policy['bands']
+		]
+
+	@classmethod
+	def load(cls, path):
+		"""
+		Carga la política desde JSON; si el archivo no existe usa la política por defecto
+		"""
+		if not os.path.exists(path):
+			print(f"Política de decisión no encontrada ({path}), se usa la política por defecto")
+			return cls(DEFAULT_POLICY)
+
+		with open(path, 'r', encoding='utf-8') as f:
+			return cls(json.load(f))
+
+	def classify(self, probabilities):
+		"""
+		Índice de banda de cada probabilidad (vectorizado)
+		"""
+		return np.searchsorted(self.thresholds, np.asarray(probabilities, dtype=np.float64), side='right')
+
+	def band(self, index):
+		return self.bands[index]
@@ -0,0 +1,231 @@
+"""
+Monitor de drift sobre el flujo de predicciones
+Mantiene histogramas por feature (y del score del modelo) en una ventana
+deslizante de memoria constante y los compara con el perfil de referencia de
+entrenamiento (PSI/KS)
+
+Las solicitudes solo encolan la matriz codificada (put_nowait); la
+actualización de los histogramas se hace en un hilo de fondo y las métricas
+se calculan bajo demanda al consultar el snapshot
+"""
+
+import queue
+import threading
+import numpy as np
+
+# Umbrales habituales de PSI
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+# Evita log(0) en PSI cuando un bin queda vacío
+_EPSILON = 1e-4
+
+class DriftMonitor:
+	"""
+	Ventana deslizante dividida en `num_buckets` sub-ventanas de igual tamaño:
+	al llenarse la sub-ventana actual se descarta la más antigua, así la
+	memoria es fija (num_buckets x bins totales) sin importar el tráfico
+	"""
+
+	def __init__(self, profile, window_size=5000, num_buckets=10, max_pending=10000):
+		self.feature_names = list(profile['feature_names'])
+		self.features = self._feature_specs(profile)
+		self.n_reference = profile.get('n_samples')
+
+		self.edges = []
+		self.offsets = []
+		self.expected = []
+		offset = 0
+		for feature in self.features:
+			self.edges.append(feature['bin_edges'] if feature['type'] == 'numeric' else None)
+			self.offsets.append(offset)
+			self.expected.append(feature['proportions'])
+			offset += len(feature['proportions'])
+		self.total_bins = offset
+		self.offsets = np.asarray(self.offsets)
+
+		self.num_buckets = num_buckets
+		self.bucket_size = max(1, window_size // num_buckets)
+		self.counts = np.zeros((num_buckets, self.total_bins), dtype=np.int64)
+		self.bucket_rows = np.zeros(num_buckets, dtype=np.int64)
+		self.current = 0
+		self.total_seen = 0
+
+		self.pending = queue.Queue(maxsize=max_pending)
+		self.dropped = 0
+		self.dropped_lock = threading.Lock()
+		self.lock = threading.Lock()
+		self.thread = None
+
+	@staticmethod
+	def _feature_specs(profile):
+		"""
+		Especificación por columna monitorizada (features en orden + score del
+		modelo como última columna) a partir de los arrays del perfil
+		"""
+		numeric_pos = {int(j): k for k, j in enumerate(profile['numeric_idx'])}
+		categorical_pos = {int(j): k for k, j in enumerate(profile['categorical_idx'])}
+		specs = []
+
+		for j, name in enumerate(profile['feature_names']):
+			if j in numeric_pos:
+				k = numeric_pos[j]
+				specs.append({
+					'name': name,
+					'type': 'numeric',
+					'bin_edges': profile['numeric_bin_edges'][k],
+					'proportions': profile['numeric_proportions'][k],
+					'min': float(profile['numeric_quantiles'][k, 0]),
+					'max': float(profile['numeric_quantiles'][k, -1])
+				})
+			else:
+				k = categorical_pos[j]
+				size = int(profile['categorical_sizes'][k])
+				specs.append({
+					'name': name,
+					'type': 'categorical',
+					'labels': profile['categorical_labels'][k][:size],
+					'proportions': profile['categorical_proportions'][k, :size]
+				})
+
+		score_edges = profile['score_bin_edges']
+		specs.append({
+			'name': 'risk_score',
+			'type': 'numeric',
+			'bin_edges': score_edges[1:-1],
+			'proportions': profile['score_proportions'],
+			'min': float(score_edges[0]),
+			'max': float(score_edges[-1])
+		})
+		return specs
+
+	def start(self):
+		"""
+		Arranca el hilo de fondo que consume las predicciones encoladas
+		"""
+		self.thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+		self.thread.start()
+		return self
+
+	def submit(self, X_encoded, scores):
+		"""
+		Encola una matriz codificada (sin escalar) y sus scores sin bloquear la
+		solicitud; si la cola está llena la muestra se descarta y se contabiliza
+		"""
+		try:
+			self.pending.put_nowait((X_encoded, scores))
+		except queue.Full:
+			with self.dropped_lock:
+				self.dropped += 1
+
+	def _run(self):
+		while True:
+			X, scores = self.pending.get()
+			try:
+				self._update(np.column_stack([np.atleast_2d(X), np.ravel(scores)]))
+			finally:
+				self.pending.task_done()
+
+	def _bin_indices(self, X):
+		"""
+		Índice de bin global (offset + bin local) de cada celda de X
+		"""
+		indices = np.empty(X.shape, dtype=np.int64)
+		for j, edges in enumerate(self.edges):
+			if edges is None:
+				local = np.clip(X[:, j].astype(np.int64), 0, len(self.expected[j]) - 1)
+			else:
+				local = np.searchsorted(edges, X[:, j], side='right')
+			indices[:, j] = local + self.offsets[j]
+		return indices
+
+	def _update(self, X):
+		indices = self._bin_indices(X)
+
+		with self.lock:
+			start = 0
+			while start < len(indices):
+				# Rotar a la siguiente sub-ventana cuando la actual está llena
+				if self.bucket_rows[self.current] >= self.bucket_size:
+					self.current = (self.current + 1) % self.num_buckets
+					self.counts[self.current] = 0
+					self.bucket_rows[self.current] = 0
+
+				take = min(self.bucket_size - self.bucket_rows[self.current], len(indices) - start)
+				chunk = indices[start:start + take]
+				self.counts[self.current] += np.bincount(chunk.ravel(), minlength=self.total_bins)
+				self.bucket_rows[self.current] += take
+				self.total_seen += take
+				start += take
+
+	def snapshot(self):
+		"""
+		Métricas de drift de la ventana actual frente a la referencia
+		"""
+		with self.lock:
+			window = self.counts.sum(axis=0)
+			window_rows = int(self.bucket_rows.sum())
+			total_seen = self.total_seen
+
+		features = {}
+		for j, feature in enumerate(self.features):
+			expected = self.expected[j]
+			start = self.offsets[j]
+			observed_counts = window[start:start + len(expected)]
+			features[feature['name']] = self._feature_metrics(feature, expected, observed_counts, window_rows)
+		score = features.pop('risk_score')
+
+		psi_values = [metrics['psi'] for metrics in features.values() if metrics['psi'] is not None]
+		drifted = [name for name, metrics in features.items() if metrics['status'] == 'significant']
+
+		return {
+			'window_rows': window_rows,
+			'window_capacity': self.bucket_size * self.num_buckets,
+			'total_seen': total_seen,
+			'pending': self.pending.qsize(),
+			'dropped': self.dropped,
+			'reference_samples': self.n_reference,
+			'max_psi': max(psi_values) if psi_values else None,
+			'drifted_features': drifted,
+			'score': score,
+			'features': features
+		}
+
+	def _feature_metrics(self, feature, expected, observed_counts, window_rows):
+		if window_rows == 0:
+			return {'psi': None, 'ks': None, 'status': 'no_data'}
+
+		observed = observed_counts / window_rows
+		e = np.clip(expected, _EPSILON, None)
+		o = np.clip(observed, _EPSILON, None)
+		psi = float(np.sum((o - e) * np.log(o / e)))
+
+		if psi >= PSI_SIGNIFICANT:
+			status = 'significant'
+		elif psi >= PSI_MODERATE:
+			status = 'moderate'
+		else:
+			status = 'stable'
+
+		metrics = {'psi': psi, 'status': status}
+
+		if feature['type'] == 'numeric':
+			# KS sobre las CDF discretizadas en los bins de referencia
+			metrics['ks'] = float(np.max(np.abs(np.cumsum(observed) - np.cumsum(expected))))
+			metrics['quantiles'] = self._estimate_quantiles(feature, observed)
+			metrics['histogram'] = observed_counts.tolist()
+		else:
+			metrics['ks'] = None
+			metrics['frequencies'] = dict(zip(map(str, feature['labels']), observed.tolist()))
+
+		return metrics
+
+	@staticmethod
+	def _estimate_quantiles(feature, observed, probs=(0.1, 0.5, 0.9)):
+		"""
+		Cuantiles aproximados de la ventana, interpolando linealmente dentro
+		de los bins de referencia (los extremos se acotan con el min/max de entrenamiento)
+		"""
+		bounds = np.concatenate(([feature['min']], feature['bin_edges'], [feature['max']]))
+		cdf = np.concatenate(([0.0], np.cumsum(observed)))
+		return {f'p{int(p * 100)}': float(np.interp(p, cdf, bounds)) for p in probs}
@@ -0,0 +1,66 @@
+"""
+Proveedores JSON para Flask
+Permiten elegir entre el json de la stdlib y orjson para parsear solicitudes
+(request.get_json) y renderizar respuestas (jsonify), ambos con soporte para
+tipos escalares y arrays de NumPy
+"""
+
+import numpy as np
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+def numpy_to_builtin(obj):
+	"""
+	Convierte escalares y arrays de NumPy a tipos nativos de Python
+	Se usa como 'default' de los serializadores (json, orjson, msgpack)
+	"""
+	if isinstance(obj, np.generic):
+		return obj.item()
+	if isinstance(obj, np.ndarray):
+		return obj.tolist()
+	raise TypeError(f"Objeto de tipo {type(obj).__name__} no es serializable")
+
+class NumpyJSONProvider(DefaultJSONProvider):
+	"""
+	Proveedor por defecto de Flask (json de la stdlib) que además acepta NumPy
+	"""
+	_flask_default = staticmethod(DefaultJSONProvider.default)
+
+	@staticmethod
+	def default(obj):
+		if isinstance(obj, (np.generic, np.ndarray)):
+			return numpy_to_builtin(obj)
+		return NumpyJSONProvider._flask_default(obj)
+
+class OrjsonProvider(JSONProvider):
+	"""
+	Proveedor basado en orjson: serializa directamente a bytes y maneja
+	NumPy de forma nativa (OPT_SERIALIZE_NUMPY)
+	"""
+	options = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+	def dumps(self, obj, **kwargs):
+		return orjson.dumps(obj, default=numpy_to_builtin, option=self.options).decode('utf-8')
+
+	def loads(self, s, **kwargs):
+		return orjson.loads(s)
+
+	def response(self, *args, **kwargs):
+		obj = self._prepare_response_obj(args, kwargs)
+		body = orjson.dumps(obj, default=numpy_to_builtin, option=self.options)
+		return self._app.response_class(body, mimetype='application/json')
+
+def create_json_provider(app, name):
+	"""
+	Crea el proveedor JSON indicado ('orjson' o 'std')
+	Si se pide orjson y no está instalado, se usa el de la stdlib
+	"""
+	if name == 'orjson' and orjson is not None:
+		return OrjsonProvider(app)
+	if name not in ('orjson', 'std'):
+		raise ValueError(f"JSON_PROVIDER desconocido: {name} (use 'orjson' o 'std')")
+	return NumpyJSONProvider(app)
@@ -0,0 +1,61 @@
+"""
+Detección de entradas fuera de distribución (OOD)
+Compara cada paciente con los datos de entrenamiento usando los arrays
+precompilados en el perfil de referencia:
+
+- Distancia de Mahalanobis en el espacio escalado: una multiplicación por la
+  proyección de blanqueo, sin invertir matrices en cada solicitud
+- Límites por feature: soporte observado en entrenamiento (mín/máx de las
+  numéricas y códigos conocidos de las categóricas)
+
+Todo se evalúa vectorizado sobre la matriz codificada, de modo que un lote
+cuesta lo mismo que una solicitud individual más unos microsegundos
+"""
+
+import numpy as np
+
+class OODDetector:
+	"""
+	Marca como OOD los pacientes cuya distancia supera el percentil
+	`threshold` de las distancias de entrenamiento o que tienen alguna
+	feature fuera del soporte observado
+	"""
+
+	def __init__(self, profile, threshold=0.99):
+		self.feature_names = list(profile['feature_names'])
+		self.center = np.asarray(profile['ood_center'], dtype=np.float64)
+		self.projection = np.asarray(profile['ood_projection'], dtype=np.float64)
+		self.lower = np.asarray(profile['ood_lower'], dtype=np.float64)
+		self.upper = np.asarray(profile['ood_upper'], dtype=np.float64)
+		self.distance_quantiles = np.asarray(profile['ood_distance_quantiles'], dtype=np.float64)
+		self.quantile_probs = np.asarray(profile['numeric_quantile_probs'], dtype=np.float64)
+		self.threshold = threshold
+		self.max_distance = float(np.interp(threshold, self.quantile_probs, self.distance_quantiles))
+
+	def check(self, X_encoded):
+		"""
+		Evalúa una matriz codificada (sin escalar) de forma vectorizada
+
+		Returns:
+			Lista con un diccionario por fila: is_ood, mahalanobis,
+			distance_percentile (fracción de pacientes de entrenamiento más
+			cercanos al centro) y out_of_range
+		"""
+		X = np.atleast_2d(np.asarray(X_encoded, dtype=np.float64))
+
+		distances = np.sqrt(np.sum(((X - self.center) @ self.projection) ** 2, axis=1))
+		percentiles = np.interp(distances, self.distance_quantiles, self.quantile_probs)
+		out_of_range = (X < self.lower) | (X > self.upper)
+		is_ood = (distances > self.max_distance) | out_of_range.any(axis=1)
+
+		# Conversión a tipos nativos de una vez; los nombres solo se buscan en las filas marcadas
+		flagged_rows = set(np.flatnonzero(out_of_range.any(axis=1)).tolist())
+		return [
+			{
+				'is_ood': flag,
+				'mahalanobis': round(distance, 4),
+				'distance_percentile': round(percentile, 4),
+				'out_of_range': [self.feature_names[j] for j in np.flatnonzero(out_of_range[i])] if i in flagged_rows else []
+			}
+			for i, (flag, distance, percentile) in enumerate(zip(is_ood.tolist(), distances.tolist(), percentiles.tolist()))
+		]
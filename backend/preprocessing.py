@@ -0,0 +1,71 @@
+"""
+Preprocesamiento de entrada sin scikit-learn
+saved_models/preprocessing.json (generado por model/train_model.py) guarda los
+parámetros del StandardScaler (mean_, scale_) y las clases de cada
+LabelEncoder en JSON plano. Cargarlo no ejecuta código, a diferencia de
+deserializar scaler.pkl, y no requiere importar sklearn, así que el backend
+arranca más rápido y sklearn deja de ser una dependencia de serving
+"""
+
+import json
+import numpy as np
+
+PREPROCESSING_FORMAT = 1
+
+class Scaler:
+	"""
+	Equivalente de StandardScaler.transform con los parámetros ya ajustados
+	"""
+
+	def __init__(self, mean, scale):
+		self.mean_ = mean
+		self.scale_ = scale
+
+	def transform(self, X):
+		return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+class CategoryEncoder:
+	"""
+	Equivalente de LabelEncoder.transform: cada clase se codifica con su
+	posición en `classes` (LabelEncoder las guarda ordenadas)
+	"""
+
+	def __init__(self, classes):
+		self.classes_ = np.asarray(classes)
+		self._codes = {value: code for code, value in enumerate(classes)}
+
+	def transform(self, values):
+		try:
+			return np.fromiter((self._codes[value] for value in values), dtype=np.int64, count=len(values))
+		except KeyError as e:
+			raise ValueError(f"Valor desconocido: {e.args[0]!r} (se esperaba uno de {self.classes_.tolist()})") from None
+		except TypeError:
+			# Valores no hashables (p. ej. una lista) tampoco son una clase válida
+			raise ValueError(f"Valor no válido (se esperaba uno de {self.classes_.tolist()})") from None
+
+def build_encoders(encoder_classes):
+	"""
+	Encoders a partir de {columna: [clases]}
+	"""
+	return {col: CategoryEncoder(classes) for col, classes in encoder_classes.items()}
+
+def load_preprocessing(path):
+	"""
+	Carga el scaler y los encoders de preprocessing.json
+
+	Returns:
+		(scaler, encoders, feature_names)
+	"""
+	with open(path, 'r') as f:
+		params = json.load(f)
+
+	if params.get('format') != PREPROCESSING_FORMAT:
+		raise ValueError(f"Formato de {path} no soportado: {params.get('format')}")
+
+	feature_names = params['feature_names']
+	mean = np.asarray(params['scaler']['mean'], dtype=np.float64)
+	scale = np.asarray(params['scaler']['scale'], dtype=np.float64)
+	if mean.shape != (len(feature_names),) or scale.shape != mean.shape:
+		raise ValueError(f"{path}: el scaler no coincide con las {len(feature_names)} features")
+
+	return Scaler(mean, scale), build_encoders(params['encoders']), feature_names
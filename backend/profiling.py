@@ -0,0 +1,172 @@
+"""
+Herramientas de diagnóstico de latencia sobre el servidor en ejecución
+
+- SamplingProfiler: profiler por muestreo que, desde un hilo en segundo plano,
+  toma la pila de todos los hilos cada `interval` segundos (sys._current_frames)
+  y acumula cuántas veces aparece cada pila. No instrumenta el código, así que
+  el costo es proporcional a la frecuencia de muestreo y no al tráfico. La
+  salida es el formato "collapsed" (una pila por línea, marcos separados por
+  ';' y el número de muestras), que leen flamegraph.pl, speedscope e inferno
+- RequestTrace: tiempos por etapa de una solicitud, devueltos en la cabecera
+  estándar Server-Timing (visible en las DevTools del navegador)
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Un hilo cuya pila termina en estos módulos está esperando (accept, cola, lock)
+_IDLE_MODULES = ('threading.py', 'selectors.py', 'socketserver.py', 'socket.py', 'queue.py')
+
+class SamplingProfiler:
+	"""
+	Profiler por muestreo de todos los hilos del proceso, arrancable y
+	detenible en caliente
+	"""
+
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._stop = threading.Event()
+		self._thread = None
+		self._labels = {}
+		self._stacks = Counter()
+		self.samples = 0
+		self.interval = None
+		self.include_idle = False
+		self.started_at = None
+		self.stopped_at = None
+
+	@property
+	def running(self):
+		return self._thread is not None and self._thread.is_alive()
+
+	def start(self, interval=0.01, max_duration=60.0, include_idle=False):
+		"""
+		Reinicia los conteos y empieza a muestrear; se detiene solo tras
+		`max_duration` segundos para que nunca quede activo por olvido
+
+		Returns:
+			False si ya estaba en marcha
+		"""
+		with self._lock:
+			if self.running:
+				return False
+			self._stacks = Counter()
+			self.samples = 0
+			self.interval = interval
+			self.include_idle = include_idle
+			self.started_at = time.time()
+			self.stopped_at = None
+			self._stop.clear()
+			self._thread = threading.Thread(
+				target=self._run, args=(interval, max_duration), name='sampling-profiler', daemon=True
+			)
+			self._thread.start()
+			return True
+
+	def stop(self):
+		"""
+		Detiene el muestreo (los conteos se conservan hasta el próximo start)
+		"""
+		self._stop.set()
+		thread = self._thread
+		if thread is not None and thread is not threading.current_thread():
+			thread.join()
+		return self.summary()
+
+	def _label(self, code):
+		label = self._labels.get(code)
+		if label is None:
+			label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+			self._labels[code] = label
+		return label
+
+	def _run(self, interval, max_duration):
+		own_id = threading.get_ident()
+		deadline = time.monotonic() + max_duration
+
+		while not self._stop.wait(interval):
+			if time.monotonic() >= deadline:
+				break
+
+			for thread_id, frame in sys._current_frames().items():
+				if thread_id == own_id:
+					continue
+				if not self.include_idle and os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+					continue
+				stack = []
+				while frame is not None:
+					stack.append(self._label(frame.f_code))
+					frame = frame.f_back
+				stack.reverse()
+				with self._lock:
+					self._stacks[';'.join(stack)] += 1
+
+			with self._lock:
+				self.samples += 1
+
+		self.stopped_at = time.time()
+
+	def collapsed(self):
+		"""
+		Pilas acumuladas en formato collapsed ('marco;marco;marco N' por línea)
+		"""
+		with self._lock:
+			stacks = self._stacks.most_common()
+		return ''.join(f"{stack} {count}\n" for stack, count in stacks)
+
+	def summary(self):
+		with self._lock:
+			end = self.stopped_at or time.time()
+			return {
+				'running': self.running,
+				'samples': self.samples,
+				'unique_stacks': len(self._stacks),
+				'interval_ms': self.interval * 1000 if self.interval else None,
+				'include_idle': self.include_idle,
+				'duration_s': round(end - self.started_at, 3) if self.started_at else 0.0
+			}
+
+class RequestTrace:
+	"""
+	Cronometra las etapas de una solicitud: cada mark(etapa) registra el
+	tiempo transcurrido desde la marca anterior
+	"""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self._last = self.started
+		self.stages = []
+
+	def mark(self, stage):
+		now = time.perf_counter()
+		self.stages.append((stage, (now - self._last) * 1000))
+		self._last = now
+
+	def add(self, stage, duration_ms):
+		"""
+		Agrega una etapa medida fuera de esta traza (p. ej. en otro proceso)
+		"""
+		self.stages.append((stage, duration_ms))
+		self._last = time.perf_counter()
+
+	def server_timing(self):
+		"""
+		Valor de la cabecera Server-Timing (ms por etapa y total)
+		"""
+		total = (time.perf_counter() - self.started) * 1000
+		return ', '.join(
+			f"{stage};dur={duration:.3f}" for stage, duration in self.stages + [('total', total)]
+		)
+
+class _NoTrace:
+	"""
+	Traza nula para las solicitudes que no piden Server-Timing
+	"""
+
+	def mark(self, stage):
+		pass
+
+NO_TRACE = _NoTrace()
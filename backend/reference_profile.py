@@ -0,0 +1,37 @@
+"""
+Lectura del perfil de referencia de entrenamiento (reference_profile.bin)
+generado por model/train_model.py
+
+Formato: b'LCRP' | uint32 longitud de cabecera | cabecera JSON | arrays crudos.
+Los arrays se devuelven como vistas de solo lectura sobre el buffer del
+archivo (np.frombuffer), sin copias ni parseo de texto
+"""
+
+import json
+import numpy as np
+
+_MAGIC = b'LCRP'
+
+def load_reference_profile(path):
+	"""
+	Carga el perfil como un diccionario {nombre: array o metadato}
+	"""
+	with open(path, 'rb') as f:
+		buffer = f.read()
+
+	if buffer[:4] != _MAGIC:
+		raise ValueError(f"{path} no es un perfil de referencia válido")
+
+	header_length = int(np.frombuffer(buffer, dtype=np.uint32, count=1, offset=4)[0])
+	header = json.loads(buffer[8:8 + header_length])
+	data_start = 8 + header_length
+
+	profile = {key: value for key, value in header.items() if key != 'arrays'}
+	for key, spec in header['arrays'].items():
+		dtype = np.dtype(spec['dtype'])
+		count = int(np.prod(spec['shape'], dtype=np.int64))
+		profile[key] = np.frombuffer(
+			buffer, dtype=dtype, count=count, offset=data_start + spec['offset']
+		).reshape(spec['shape'])
+
+	return profile
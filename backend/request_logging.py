@@ -0,0 +1,174 @@
+"""
+Logging estructurado y no bloqueante de las solicitudes
+Los hilos de las solicitudes solo encolan el LogRecord (sin formatear ni
+escribir); un QueueListener en segundo plano lo serializa a una línea JSON
+y lo escribe en stderr. Si la cola se llena, el registro se descarta y se
+cuenta en lugar de bloquear la solicitud
+
+Las solicitudes exitosas se muestrean (LOG_SAMPLE_RATE) y cada registro
+lleva su sample_rate para poder reponderar al agregar; los errores se
+registran siempre, con traceback completo
+"""
+
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class JsonFormatter(logging.Formatter):
+	"""
+	Un objeto JSON por línea: ts, level, logger, message, los campos pasados
+	en extra={'fields': {...}} y el traceback si lo hay
+	"""
+
+	def format(self, record):
+		entry = {
+			'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+			'level': record.levelname,
+			'logger': record.name,
+			'message': record.getMessage()
+		}
+		entry.update(getattr(record, 'fields', None) or {})
+		if record.exc_info:
+			entry['exception'] = self.formatException(record.exc_info)
+		if orjson is not None:
+			return orjson.dumps(entry, default=str).decode('utf-8')
+		return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+	"""
+	Formato de texto tradicional con los campos estructurados como clave=valor
+	"""
+
+	def __init__(self):
+		super().__init__(TEXT_FORMAT)
+
+	def format(self, record):
+		line = super().format(record)
+		fields = getattr(record, 'fields', None)
+		if fields:
+			line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+		return line
+
+class NonBlockingQueueHandler(QueueHandler):
+	"""
+	QueueHandler que entrega el registro sin formatearlo (el formateo ocurre
+	en el hilo del listener) y lo descarta si la cola está llena
+	"""
+
+	def __init__(self, log_queue):
+		super().__init__(log_queue)
+		self.dropped = 0
+		# += no es atómico: lo incrementan a la vez los hilos de las solicitudes
+		self.dropped_lock = threading.Lock()
+
+	def prepare(self, record):
+		# La cola es del mismo proceso: no hace falta aplanar mensaje ni traceback
+		return record
+
+	def enqueue(self, record):
+		try:
+			self.queue.put_nowait(record)
+		except queue.Full:
+			with self.dropped_lock:
+				self.dropped += 1
+
+def setup_logging(log_format='json', level='INFO', queue_size=10000):
+	"""
+	Configura el logger raíz para escribir a través de la cola
+
+	Args:
+		log_format: 'json' (una línea JSON por registro) o 'text'
+		level: Nivel mínimo del logger raíz
+		queue_size: Registros pendientes como máximo antes de descartar
+
+	Returns:
+		(handler, listener): el handler expone `dropped`; listener.stop() vacía la cola
+	"""
+	stream_handler = logging.StreamHandler(sys.stderr)
+	stream_handler.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+
+	handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+	listener = QueueListener(handler.queue, stream_handler, respect_handler_level=False)
+
+	root = logging.getLogger()
+	for existing in list(root.handlers):
+		root.removeHandler(existing)
+	root.addHandler(handler)
+	root.setLevel(level)
+
+	listener.start()
+	return handler, listener
+
+class RequestRecord(logging.LogRecord):
+	"""
+	LogRecord mínimo para la línea por solicitud: sin findCaller ni datos de
+	hilo/proceso/archivo, que son la mayor parte del costo de Logger.log
+	"""
+
+	def __init__(self, name, level, fields):
+		self.name = name
+		self.levelno = level
+		self.levelname = logging.getLevelName(level)
+		self.msg = 'request'
+		self.args = None
+		self.exc_info = None
+		self.exc_text = None
+		self.stack_info = None
+		self.created = time.time()
+		self.msecs = int((self.created - int(self.created)) * 1000) + 0.0
+		self.fields = fields
+
+class RequestLogger:
+	"""
+	Registra una línea por solicitud (request_id, método, ruta, status,
+	latency_ms y campos propios del endpoint); las exitosas con probabilidad
+	`sample_rate`, las 4xx como warning y las 5xx como error siempre
+
+	Con `handler` (el NonBlockingQueueHandler de setup_logging) la línea se
+	encola directamente como RequestRecord; sin él pasa por logger.log
+	"""
+
+	def __init__(self, logger, sample_rate=1.0, handler=None):
+		self.logger = logger
+		self.sample_rate = sample_rate
+		self.handler = handler
+
+	def log(self, request_id, method, path, status, latency_ms, **fields):
+		if status >= 500:
+			level = logging.ERROR
+		elif status >= 400:
+			level = logging.WARNING
+		else:
+			level = logging.INFO
+			if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+				return
+
+		if not self.logger.isEnabledFor(level):
+			return
+
+		fields = {
+			'request_id': request_id,
+			'method': method,
+			'path': path,
+			'status': status,
+			'latency_ms': round(latency_ms, 3),
+			'sample_rate': self.sample_rate if level == logging.INFO else 1.0,
+			**fields
+		}
+		if self.handler is not None:
+			self.handler.enqueue(RequestRecord(self.logger.name, level, fields))
+		else:
+			self.logger.log(level, 'request', extra={'fields': fields})
@@ -0,0 +1,75 @@
+"""
+Pesos del modelo compartidos entre procesos mediante un archivo mapeado en memoria
+(saved_models/liver_cancer_weights.bin, generado por model/train_model.py)
+
+Formato: b'LCMW' | uint32 longitud de cabecera | cabecera JSON | arrays crudos
+(el mismo layout que reference_profile.bin). La cabecera guarda el orden de
+las features, las clases de los encoders y la activación de cada capa; los
+arrays son los pesos del MLP (con el scaler fusionado en la primera capa) y
+los vectores mean_/scale_ del scaler
+
+El archivo se abre con np.memmap en solo lectura: todos los workers del host
+comparten las mismas páginas del page cache (o de /dev/shm si se copia allí),
+así que la memoria por worker no crece con el modelo y arrancar un worker
+nuevo no requiere cargar TensorFlow ni deserializar nada
+"""
+
+import json
+import numpy as np
+from preprocessing import Scaler
+
+_MAGIC = b'LCMW'
+
+_ACTIVATIONS = {
+	'relu': lambda x: np.maximum(x, 0, out=x),
+	'tanh': lambda x: np.tanh(x, out=x),
+	# σ(x) = (1 + tanh(x / 2)) / 2: sin overflow de exp para logits muy negativos
+	'sigmoid': lambda x: np.multiply(np.tanh(np.multiply(x, 0.5, out=x), out=x) + 1, 0.5),
+	'linear': lambda x: x
+}
+
+class SharedWeightsModel:
+	"""
+	MLP de capas densas evaluado con NumPy sobre pesos mapeados en memoria.
+	Recibe las features codificadas sin escalar (el escalado va fusionado en
+	la primera capa, igual que el grafo ONNX)
+	"""
+
+	def __init__(self, path):
+		self.path = path
+		self._buffer = np.memmap(path, dtype=np.uint8, mode='r')
+
+		if self._buffer[:4].tobytes() != _MAGIC:
+			raise ValueError(f"{path} no es un archivo de pesos compartidos válido")
+
+		header_length = int(self._buffer[4:8].view(np.uint32)[0])
+		header = json.loads(self._buffer[8:8 + header_length].tobytes())
+		data_start = 8 + header_length
+
+		arrays = {}
+		for key, spec in header['arrays'].items():
+			dtype = np.dtype(spec['dtype'])
+			start = data_start + spec['offset']
+			count = int(np.prod(spec['shape'], dtype=np.int64))
+			# np.asarray quita la subclase memmap (evita su overhead por operación) sin copiar
+			arrays[key] = np.asarray(self._buffer[start:start + count * dtype.itemsize]).view(dtype).reshape(spec['shape'])
+
+		self.feature_names = header['feature_names']
+		self.encoders = header['encoders']
+		self.model_family = header['model_family']
+		self.layers = [
+			(arrays[f'W{i}'], arrays[f'B{i}'], _ACTIVATIONS[activation])
+			for i, activation in enumerate(header['activations'])
+		]
+		# Vectores del scaler como vistas de solo lectura sobre el archivo mapeado
+		self.scaler = Scaler(arrays['scaler_mean'], arrays['scaler_scale'])
+		self.nbytes = int(self._buffer.nbytes)
+
+	def predict_proba(self, X_encoded):
+		"""
+		Probabilidad de riesgo de cada fila de una matriz codificada sin escalar
+		"""
+		h = np.asarray(X_encoded, dtype=np.float32)
+		for kernel, bias, activation in self.layers:
+			h = activation(h @ kernel + bias)
+		return h[:, 0]
@@ -0,0 +1,141 @@
+"""
+Capa de assets estáticos del frontend
+Precalcula al iniciar las variantes comprimidas (gzip/brotli) y un ETag fuerte
+de cada archivo, versiona las referencias locales de los HTML con el hash del
+contenido y responde a solicitudes condicionales con 304
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import request
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+# Referencias locales en HTML (href/src relativos, sin esquema ni query)
+_ASSET_REFERENCE = re.compile(r'(href|src)="([^"#?:]+)"')
+
+# Tipos de contenido que vale la pena comprimir
+_COMPRESSIBLE_PREFIXES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+class StaticAssetCache:
+	"""
+	Cache en memoria de los archivos de una carpeta estática
+
+	Los HTML se sirven con 'no-cache' (siempre se revalidan por ETag). El resto
+	de assets pedidos con ?v=<hash> vigente se sirven como inmutables durante
+	un año; sin versión, también se revalidan por ETag.
+	"""
+
+	def __init__(self, folder, max_age=31536000, min_compress_size=512):
+		self.folder = folder
+		self.max_age = max_age
+		self.min_compress_size = min_compress_size
+		self.assets = {}
+
+	def load(self):
+		"""
+		Lee todos los archivos de la carpeta y precalcula sus variantes
+		"""
+		self.assets = {}
+		if not os.path.isdir(self.folder):
+			return self
+
+		files = {}
+		for root, _, names in os.walk(self.folder):
+			for name in names:
+				path = os.path.join(root, name)
+				key = os.path.relpath(path, self.folder).replace(os.sep, '/')
+				with open(path, 'rb') as f:
+					files[key] = f.read()
+
+		# Primero los assets no-HTML: su hash se usa para versionar los HTML
+		versions = {}
+		for key, body in files.items():
+			if not key.endswith('.html'):
+				self.assets[key] = self._build_asset(key, body)
+				versions[key] = self.assets[key]['version']
+
+		for key, body in files.items():
+			if key.endswith('.html'):
+				body = self._version_references(key, body, versions)
+				self.assets[key] = self._build_asset(key, body)
+
+		return self
+
+	def _version_references(self, key, body, versions):
+		"""
+		Reescribe href="styles.css" como href="styles.css?v=<hash>" para los
+		assets locales conocidos, de modo que un cambio de contenido cambie la URL
+		"""
+		base = os.path.dirname(key)
+
+		def replace(match):
+			attribute, reference = match.groups()
+			target = os.path.normpath(os.path.join(base, reference)).replace(os.sep, '/')
+			if target not in versions:
+				return match.group(0)
+			return f'{attribute}="{reference}?v={versions[target]}"'
+
+		return _ASSET_REFERENCE.sub(replace, body.decode('utf-8')).encode('utf-8')
+
+	def _build_asset(self, key, body):
+		digest = hashlib.sha256(body).hexdigest()
+		mimetype = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+		variants = {'identity': body}
+		if len(body) >= self.min_compress_size and mimetype.startswith(_COMPRESSIBLE_PREFIXES):
+			variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+			if brotli is not None:
+				variants['br'] = brotli.compress(body, quality=11)
+
+		return {
+			'mimetype': mimetype,
+			'version': digest[:12],
+			'etags': {encoding: f'{digest[:32]}-{encoding}' for encoding in variants},
+			'variants': variants,
+			'is_html': mimetype == 'text/html'
+		}
+
+	def _choose_encoding(self, asset):
+		"""
+		Elige la mejor variante aceptada por el cliente (br > gzip > identity)
+		"""
+		for encoding in ('br', 'gzip'):
+			if encoding in asset['variants'] and request.accept_encodings[encoding]:
+				return encoding
+		return 'identity'
+
+	def _cache_control(self, asset):
+		if asset['is_html'] or request.args.get('v') != asset['version']:
+			return 'no-cache'
+		return f'public, max-age={self.max_age}, immutable'
+
+	def response(self, filename, response_class):
+		"""
+		Construye la respuesta para un asset, o devuelve None si no está en cache
+		"""
+		asset = self.assets.get(filename)
+		if asset is None:
+			return None
+
+		encoding = self._choose_encoding(asset)
+		etag = asset['etags'][encoding]
+
+		# Solicitud condicional: el contenido es el mismo en todas las variantes
+		if any(request.if_none_match.contains(tag) for tag in asset['etags'].values()):
+			response = response_class(status=304)
+		else:
+			response = response_class(asset['variants'][encoding], mimetype=asset['mimetype'])
+			if encoding != 'identity':
+				response.headers['Content-Encoding'] = encoding
+
+		response.set_etag(etag)
+		response.headers['Cache-Control'] = self._cache_control(asset)
+		response.vary.add('Accept-Encoding')
+		return response
@@ -0,0 +1,108 @@
+"""
+Configuración de hilos y afinidad de CPU para la inferencia
+Los pools de hilos de TensorFlow, ONNX Runtime y BLAS/OpenMP dimensionan por
+defecto un hilo por núcleo en cada proceso; con varios workers en el mismo
+host (más los hilos de Flask) eso sobresuscribe la CPU y dispara la latencia
+de cola. Estas funciones fijan los hilos nativos y, opcionalmente, restringen
+cada proceso a un subconjunto de núcleos antes de cargar el modelo
+"""
+
+import os
+
+# Variables que leen OpenMP, MKL y OpenBLAS al inicializarse
+NATIVE_THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+def parse_cpu_list(spec):
+	"""
+	Convierte una lista de núcleos estilo taskset ('0-3,6') en una lista de enteros
+	"""
+	cpus = []
+	for part in spec.split(','):
+		part = part.strip()
+		if not part:
+			continue
+		if '-' in part:
+			start, end = part.split('-')
+			cpus.extend(range(int(start), int(end) + 1))
+		else:
+			cpus.append(int(part))
+	return sorted(set(cpus))
+
+def available_cpus():
+	"""
+	Núcleos en los que el proceso puede ejecutarse (respeta cgroups/taskset)
+	"""
+	if hasattr(os, 'sched_getaffinity'):
+		return sorted(os.sched_getaffinity(0))
+	return list(range(os.cpu_count() or 1))
+
+def worker_cpus(cpus, worker_index, num_workers):
+	"""
+	Reparte los núcleos en bloques contiguos disjuntos, uno por worker; si hay
+	más workers que núcleos, cada worker recibe un núcleo en round-robin
+	"""
+	if num_workers >= len(cpus):
+		return [cpus[worker_index % len(cpus)]]
+	per_worker, extra = divmod(len(cpus), num_workers)
+	start = worker_index * per_worker + min(worker_index, extra)
+	return cpus[start:start + per_worker + (1 if worker_index < extra else 0)]
+
+def pin_to_cpus(cpus):
+	"""
+	Restringe el proceso actual a `cpus`; devuelve False si la plataforma no lo soporta
+	"""
+	if not hasattr(os, 'sched_setaffinity'):
+		print("⚠️ La afinidad de CPU no está soportada en esta plataforma, se ignora")
+		return False
+	os.sched_setaffinity(0, cpus)
+	return True
+
+def limit_native_threads(num_threads):
+	"""
+	Fija los hilos de OpenMP/MKL/OpenBLAS: por variables de entorno para las
+	librerías que aún no se cargaron (TensorFlow) y con threadpoolctl, si está
+	instalado, para las ya cargadas (el BLAS de NumPy)
+	"""
+	for var in NATIVE_THREAD_ENV_VARS:
+		os.environ[var] = str(num_threads)
+
+	try:
+		from threadpoolctl import threadpool_limits
+	except ImportError:
+		return
+	threadpool_limits(limits=num_threads)
+
+def configure_tensorflow_threads(tf, intra_op_threads, inter_op_threads):
+	"""
+	Fija los pools intra/inter-op de TensorFlow (0 = valor por defecto de TF).
+	Debe llamarse antes de la primera operación de TF, es decir, antes de load_model
+	"""
+	try:
+		if intra_op_threads > 0:
+			tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+		if inter_op_threads > 0:
+			tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+	except RuntimeError as e:
+		print(f"⚠️ No se pudieron fijar los hilos de TensorFlow (runtime ya inicializado): {e}")
+
+def apply_thread_config(cpu_affinity='', native_threads=0):
+	"""
+	Aplica la afinidad de CPU y el límite de hilos nativos al proceso actual
+
+	Args:
+		cpu_affinity: Lista de núcleos estilo taskset ('0-3,6'); vacío = sin fijar
+		native_threads: Hilos de OpenMP/MKL/OpenBLAS (0 = no se modifican)
+
+	Returns:
+		Diccionario con la configuración efectiva (para /health y /metrics)
+	"""
+	if cpu_affinity:
+		pin_to_cpus(parse_cpu_list(cpu_affinity))
+	if native_threads > 0:
+		limit_native_threads(native_threads)
+
+	return {
+		'cpus': available_cpus(),
+		'pinned': bool(cpu_affinity),
+		'native_threads': native_threads or None
+	}
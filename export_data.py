@@ -102,4 +102,5 @@ if __name__ == "__main__":
 # Guardar df como pickle para uso en otro script
 df.to_pickle('data/liver_cancer_data.pkl')
 
-# en el indice 23 y el 8 habían errores en los datos, los cuales fueron corregidos manualmente en el archivo csv generado.
\ No newline at end of file
+# Los errores de datos (como los de los índices 8 y 23, antes corregidos a mano) los resuelve
+# el pipeline de limpieza: python model/data_cleaning.py genera data/liver_cancer_data_clean.csv
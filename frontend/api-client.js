@@ -0,0 +1,238 @@
+/**
+ * Cliente de la API de predicción
+ * Deduplica solicitudes idénticas en vuelo, reutiliza resultados recientes
+ * ante envíos repetidos, agrupa varias predicciones en una llamada por lotes
+ * y reintenta con backoff exponencial cuando el servidor responde 503/429
+ */
+
+const RETRYABLE_STATUSES = [503, 429];
+
+class ApiClient {
+	constructor(baseUrl, options = {}) {
+		this.baseUrl = baseUrl;
+		// Ventana para agrupar predicciones en una sola llamada a /predict/batch;
+		// solo se abre si ya hay una predicción en curso (ver enqueue)
+		this.batchWindowMs = options.batchWindowMs ?? 30;
+		this.maxBatchSize = options.maxBatchSize ?? 100;
+		// Tiempo durante el cual un envío idéntico reutiliza el resultado anterior
+		this.recentTtlMs = options.recentTtlMs ?? 1500;
+		// Reintentos ante 503/429 o errores de red
+		this.maxRetries = options.maxRetries ?? 3;
+		this.baseDelayMs = options.baseDelayMs ?? 300;
+		this.maxDelayMs = options.maxDelayMs ?? 5000;
+
+		this.inFlight = new Map();
+		this.recent = new Map();
+		this.queues = new Map();
+		this.activeFlushes = 0;
+	}
+
+	/**
+	 * Estado del servidor (GET /health), deduplicado si ya hay una consulta en curso
+	 * Un 503 es la respuesta de un servidor no saludable, no una saturación
+	 * pasajera, así que se devuelve sin reintentar
+	 */
+	health() {
+		return this.dedupe("GET /health", () =>
+			this.request("/health", { method: "GET" }, [429]).then((response) =>
+				response.json(),
+			),
+		);
+	}
+
+	/**
+	 * Predicción de un paciente
+	 * Devuelve el mismo objeto que /predict: { success, prediction, timestamp, ... }
+	 */
+	predict(patient, { save = false } = {}) {
+		const key = `predict ${save} ${stableStringify(patient)}`;
+
+		this.pruneRecent();
+		const cached = this.recent.get(key);
+		if (cached && Date.now() - cached.time < this.recentTtlMs) {
+			return Promise.resolve(cached.result);
+		}
+
+		return this.dedupe(key, () =>
+			this.enqueue(patient, save).then((result) => {
+				// Borrar antes de insertar mantiene el Map ordenado por antigüedad
+				this.recent.delete(key);
+				this.recent.set(key, { time: Date.now(), result });
+				return result;
+			}),
+		);
+	}
+
+	/**
+	 * Elimina los resultados recientes ya caducados (el Map está ordenado
+	 * del más antiguo al más nuevo, así que basta con recorrer hasta el primero vigente)
+	 */
+	pruneRecent() {
+		const now = Date.now();
+		for (const [key, entry] of this.recent) {
+			if (now - entry.time < this.recentTtlMs) {
+				break;
+			}
+			this.recent.delete(key);
+		}
+	}
+
+	/**
+	 * Comparte la misma promesa entre llamadas idénticas mientras está en vuelo
+	 */
+	dedupe(key, factory) {
+		if (this.inFlight.has(key)) {
+			return this.inFlight.get(key);
+		}
+
+		const promise = factory().finally(() => this.inFlight.delete(key));
+		this.inFlight.set(key, promise);
+		return promise;
+	}
+
+	/**
+	 * Encola un paciente; la cola se vacía al cerrar la ventana de batching
+	 * o al alcanzar el tamaño máximo del lote. Si no hay ninguna predicción en
+	 * curso se envía de inmediato: el formulario pide un paciente a la vez y
+	 * esperar la ventana solo le sumaría latencia
+	 */
+	enqueue(patient, save) {
+		return new Promise((resolve, reject) => {
+			let queue = this.queues.get(save);
+			if (!queue) {
+				queue = { items: [], timer: null };
+				this.queues.set(save, queue);
+			}
+
+			queue.items.push({ patient, resolve, reject });
+
+			if (this.activeFlushes === 0 || queue.items.length >= this.maxBatchSize) {
+				this.flush(save);
+			} else if (!queue.timer) {
+				queue.timer = setTimeout(() => this.flush(save), this.batchWindowMs);
+			}
+		});
+	}
+
+	async flush(save) {
+		const queue = this.queues.get(save);
+		if (!queue || queue.items.length === 0) {
+			return;
+		}
+
+		clearTimeout(queue.timer);
+		this.queues.delete(save);
+		const items = queue.items;
+		const query = save ? "?save=true" : "";
+		this.activeFlushes++;
+
+		try {
+			if (items.length === 1) {
+				const result = await this.postJson(`/predict${query}`, items[0].patient);
+				items[0].resolve(result);
+				return;
+			}
+
+			const result = await this.postJson(
+				`/predict/batch${query}${query ? "&" : "?"}include_input=false`,
+				{ patients: items.map((item) => item.patient) },
+			);
+			items.forEach((item, i) => {
+				item.resolve({
+					success: true,
+					prediction: result.predictions[i],
+					input_data: item.patient,
+					timestamp: result.timestamp,
+				});
+			});
+		} catch (error) {
+			if (error.status !== 400 || items.length === 1) {
+				items.forEach((item) => item.reject(error));
+				return;
+			}
+			// Un paciente inválido hace fallar el lote entero: se reenvía cada
+			// paciente por separado para que solo falle quien envió datos inválidos
+			await Promise.all(
+				items.map((item) =>
+					this.postJson(`/predict${query}`, item.patient).then(
+						item.resolve,
+						item.reject,
+					),
+				),
+			);
+		} finally {
+			this.activeFlushes--;
+		}
+	}
+
+	async postJson(path, body) {
+		const response = await this.request(path, {
+			method: "POST",
+			headers: { "Content-Type": "application/json" },
+			body: JSON.stringify(body),
+		});
+		const result = await response.json();
+
+		if (!response.ok) {
+			const error = new Error(result.message || result.error || "Error en la predicción");
+			error.status = response.status;
+			throw error;
+		}
+		return result;
+	}
+
+	/**
+	 * fetch con reintentos y backoff exponencial (con jitter) ante los estados
+	 * de retryStatuses (503/429 por defecto) o errores de red; respeta la
+	 * cabecera Retry-After si viene en la respuesta
+	 */
+	async request(path, init, retryStatuses = RETRYABLE_STATUSES) {
+		for (let attempt = 0; ; attempt++) {
+			let response;
+			try {
+				response = await fetch(`${this.baseUrl}${path}`, init);
+			} catch (error) {
+				if (attempt >= this.maxRetries) {
+					throw error;
+				}
+				await sleep(this.backoffDelay(attempt));
+				continue;
+			}
+
+			const retryable = retryStatuses.includes(response.status);
+			if (!retryable || attempt >= this.maxRetries) {
+				return response;
+			}
+
+			const retryAfter = parseFloat(response.headers.get("Retry-After"));
+			await sleep(
+				Number.isFinite(retryAfter)
+					? Math.min(retryAfter * 1000, this.maxDelayMs)
+					: this.backoffDelay(attempt),
+			);
+		}
+	}
+
+	backoffDelay(attempt) {
+		const delay = Math.min(this.baseDelayMs * 2 ** attempt, this.maxDelayMs);
+		return delay / 2 + Math.random() * (delay / 2);
+	}
+}
+
+/**
+ * JSON con claves ordenadas, para que pacientes iguales generen la misma clave
+ */
+function stableStringify(value) {
+	return JSON.stringify(
+		Object.keys(value)
+			.sort()
+			.reduce((sorted, key) => {
+				sorted[key] = value[key];
+				return sorted;
+			}, {}),
+	);
+}
+
+function sleep(ms) {
+	return new Promise((resolve) => setTimeout(resolve, ms));
+}
@@ -3,8 +3,11 @@
  * Maneja la interacción con el formulario y la comunicación con la API
  */
 
-// Configuración de la API
-const API_URL = "http://localhost:5000";
+// Configuración de la API (se puede sobrescribir definiendo window.API_URL antes de cargar el script)
+const API_URL = window.API_URL || "http://localhost:5000";
+
+// Cliente con deduplicación, batching y reintentos (api-client.js)
+const apiClient = new ApiClient(API_URL);
 
 // Referencias a elementos del DOM
 const form = document.getElementById("predictionForm");
@@ -64,24 +67,8 @@ form.addEventListener("submit", async (e) => {
 			return;
 		}
 
-		// Construir URL con parámetro save si aplica
-		const url = `${API_URL}/predict${saveFlag ? "?save=true" : ""}`;
-
-		// Enviar datos a la API
-		const response = await fetch(url, {
-			method: "POST",
-			headers: {
-				"Content-Type": "application/json",
-			},
-			body: JSON.stringify(formData),
-		});
-
-		// Manejar respuesta
-		const result = await response.json();
-
-		if (!response.ok) {
-			throw new Error(result.message || "Error en la predicción");
-		}
+		// Enviar datos a la API (los envíos repetidos e idénticos se deduplican)
+		const result = await apiClient.predict(formData, { save: saveFlag });
 
 		// Mostrar resultados
 		displayResults(result.prediction);
@@ -236,21 +223,25 @@ function displayResults(prediction) {
 	const evaluationDateElement = document.getElementById("evaluationDate");
 	const actionRequiredElement = document.getElementById("actionRequired");
 
-	// Determinar clase de riesgo
-	const isHighRisk = prediction.risk_percentage > 50;
-	const riskClass = isHighRisk ? "risk-high" : "risk-low";
-	const riskColor = isHighRisk ? "#dc3545" : "#28a745";
+	// Determinar clase de riesgo según la banda de la política de decisión del backend
+	const riskStyles = {
+		immediate: { riskClass: "risk-high", riskColor: "#dc3545", icon: "🚨", action: "Inmediata" },
+		priority: { riskClass: "risk-moderate", riskColor: "#ffc107", icon: "⚠️", action: "Prioritaria" },
+		preventive: { riskClass: "risk-low", riskColor: "#28a745", icon: "✅", action: "Preventiva" },
+	};
+	const { riskClass, riskColor, icon, action } =
+		riskStyles[prediction.action_required] || riskStyles.preventive;
 
 	// Establecer valores iniciales
 	percentageElement.textContent = "0.0";
 
 	// Actualizar etiqueta de riesgo
-	riskLabelElement.textContent = isHighRisk ? "RIESGO ALTO" : "RIESGO BAJO";
+	riskLabelElement.textContent = `RIESGO ${prediction.risk_level.toUpperCase()}`;
 	riskLabelElement.className = `risk-label ${riskClass}`;
 	percentageElement.className = `percentage-value ${riskClass}`;
 
 	// Actualizar mensaje de acción
-	messageIconElement.textContent = isHighRisk ? "🚨" : "✅";
+	messageIconElement.textContent = icon;
 	messageTextElement.textContent = prediction.risk_message;
 	actionMessageElement.className = `action-message ${riskClass}`;
 	actionMessageElement.style.borderColor = riskColor;
@@ -264,8 +255,7 @@ function displayResults(prediction) {
 		hour: "2-digit",
 		minute: "2-digit",
 	});
-	actionRequiredElement.textContent =
-		prediction.action_required === "immediate" ? "Inmediata" : "Preventiva";
+	actionRequiredElement.textContent = action;
 
 	// Mostrar sección de resultados
 	resultsSection.style.display = "block";
@@ -541,8 +531,7 @@ document.querySelectorAll('input[type="number"]').forEach((input) => {
 // Verificar conexión con la API al cargar la página
 window.addEventListener("load", async () => {
 	try {
-		const response = await fetch(`${API_URL}/health`);
-		const health = await response.json();
+		const health = await apiClient.health();
 
 		if (health.status !== "healthy") {
 			showError(
@@ -0,0 +1,162 @@
+"""
+Validación cruzada k-fold con folds entrenados en paralelo
+Cada fold se entrena en un proceso independiente fijado a un subconjunto
+de núcleos (sched_setaffinity + hilos de TensorFlow acotados), de modo que
+los k entrenamientos no compiten por los mismos núcleos y el tiempo total
+se acerca al de un único entrenamiento en lugar de multiplicarse por k
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import stats
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from sklearn.metrics import roc_auc_score, accuracy_score
+
+def available_cores():
+	"""
+	Núcleos que el proceso puede usar (respeta cgroups/taskset en Linux)
+	"""
+	if hasattr(os, 'sched_getaffinity'):
+		return sorted(os.sched_getaffinity(0))
+	return list(range(os.cpu_count() or 1))
+
+def _init_worker(core_slots):
+	"""
+	Inicializa un proceso de la pool: toma un bloque de núcleos libre, fija la
+	afinidad y limita los hilos de TensorFlow/BLAS a ese bloque
+	"""
+	cores = core_slots.get()
+	if hasattr(os, 'sched_setaffinity'):
+		os.sched_setaffinity(0, cores)
+
+	threads = str(len(cores))
+	os.environ['OMP_NUM_THREADS'] = threads
+	os.environ['TF_NUM_INTRAOP_THREADS'] = threads
+	os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+	os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+	import tensorflow as tf
+	tf.config.threading.set_intra_op_parallelism_threads(len(cores))
+	tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _train_fold(job):
+	"""
+	Entrena y evalúa un fold. El scaler se ajusta solo con la parte de
+	entrenamiento del fold para no filtrar información del fold de validación
+	"""
+	from train_model import build_model_from_hyperparameters, load_tensorflow
+	tf = load_tensorflow()
+	from tensorflow.keras.callbacks import EarlyStopping
+
+	tf.keras.utils.set_random_seed(job['seed'] + job['fold'])
+
+	scaler = StandardScaler()
+	X_train = scaler.fit_transform(job['X_train'])
+	X_val = scaler.transform(job['X_val'])
+
+	model = build_model_from_hyperparameters(job['hyperparameters'], X_train.shape[1])
+	early_stopping = EarlyStopping(
+		monitor='val_auc',
+		mode='max',
+		patience=job['patience'],
+		restore_best_weights=True,
+		verbose=0
+	)
+	history = model.fit(
+		X_train, job['y_train'],
+		validation_split=0.2,
+		epochs=job['epochs'],
+		batch_size=job['batch_size'],
+		callbacks=[early_stopping],
+		verbose=0
+	)
+
+	y_proba = model.predict(X_val, verbose=0).ravel()
+	return {
+		'candidate': job['candidate'],
+		'fold': job['fold'],
+		'auc': float(roc_auc_score(job['y_val'], y_proba)),
+		'accuracy': float(accuracy_score(job['y_val'], (y_proba > 0.5).astype(int))),
+		'epochs': len(history.history['loss'])
+	}
+
+def summarize_folds(values, confidence=0.95):
+	"""
+	Media, desviación e intervalo de confianza t de Student de una métrica por fold
+	"""
+	values = np.asarray(values, dtype=np.float64)
+	mean = float(values.mean())
+	std = float(values.std(ddof=1)) if len(values) > 1 else 0.0
+	half_width = float(stats.t.ppf((1 + confidence) / 2, len(values) - 1) * std / np.sqrt(len(values))) if len(values) > 1 else 0.0
+	return {
+		'mean': mean,
+		'std': std,
+		'ci_low': mean - half_width,
+		'ci_high': mean + half_width,
+		'folds': values.tolist()
+	}
+
+def cross_validate(X, y, candidates, n_splits=5, n_workers=None, epochs=100, batch_size=32, patience=15, seed=42):
+	"""
+	Evalúa uno o varios conjuntos de hiperparámetros con k-fold estratificado
+
+	Todos los trabajos (candidato x fold) se envían a la misma pool, así que
+	comparar varios candidatos tampoco serializa los entrenamientos
+
+	Args:
+		X: Matriz de features codificada (sin escalar)
+		y: Etiquetas
+		candidates: Lista de diccionarios de hiperparámetros
+		n_splits: Número de folds
+		n_workers: Procesos en paralelo (por defecto min(trabajos, núcleos))
+		epochs, batch_size, patience: Parámetros de entrenamiento de cada fold
+		seed: Semilla para la partición y los pesos iniciales
+
+	Returns:
+		Lista (una entrada por candidato) con hiperparámetros, AUC y accuracy
+		agregadas (media, desviación, IC 95%) y resultados por fold
+	"""
+	X = np.asarray(X)
+	y = np.asarray(y)
+	folds = list(StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(X, y))
+
+	jobs = [
+		{
+			'candidate': c,
+			'fold': k,
+			'hyperparameters': hyperparameters,
+			'X_train': X[train_idx], 'y_train': y[train_idx],
+			'X_val': X[val_idx], 'y_val': y[val_idx],
+			'epochs': epochs, 'batch_size': batch_size, 'patience': patience, 'seed': seed
+		}
+		for c, hyperparameters in enumerate(candidates)
+		for k, (train_idx, val_idx) in enumerate(folds)
+	]
+
+	# Repartir los núcleos en bloques disjuntos, uno por proceso
+	cores = available_cores()
+	n_workers = max(1, min(n_workers or len(cores), len(jobs), len(cores)))
+	context = multiprocessing.get_context('spawn')
+	core_slots = context.Queue()
+	for block in np.array_split(np.array(cores), n_workers):
+		core_slots.put(block.tolist())
+
+	print(f"Validación cruzada: {len(candidates)} candidato(s) x {n_splits} folds en {n_workers} proceso(s) ({len(cores)} núcleos)")
+	with ProcessPoolExecutor(max_workers=n_workers, mp_context=context,
+			initializer=_init_worker, initargs=(core_slots,)) as pool:
+		results = list(pool.map(_train_fold, jobs))
+
+	summaries = []
+	for c, hyperparameters in enumerate(candidates):
+		fold_results = sorted((r for r in results if r['candidate'] == c), key=lambda r: r['fold'])
+		summaries.append({
+			'hyperparameters': hyperparameters,
+			'n_splits': n_splits,
+			'auc': summarize_folds([r['auc'] for r in fold_results]),
+			'accuracy': summarize_folds([r['accuracy'] for r in fold_results]),
+			'epochs': [r['epochs'] for r in fold_results]
+		})
+	return summaries
@@ -0,0 +1,408 @@
+"""
+Pipeline de limpieza del dataset (reemplaza a limpiezaDeDatos.py)
+Lee el CSV exportado por export_data.py por bloques de filas y, de forma
+vectorizada sobre cada bloque:
+
+1. Coerción de tipos: numéricas con coma decimal o caracteres sueltos,
+   binarias escritas como texto (true/false, sí/no) y categorías con
+   mayúsculas, espacios o alias ('M', 'masculino'...) a su valor canónico
+2. Reglas de corrección: valores físicamente imposibles (edad negativa,
+   IMC > 100...) se marcan como inválidos; la edad se redondea a entero
+3. Se descartan las filas con valores faltantes o inválidos
+4. Duplicados exactos entre todos los bloques (hash de 64 bits por fila)
+5. Outliers por IQR con límites estimados en una primera pasada sobre las
+   columnas numéricas (muestreo de reservorio, exacto hasta RESERVOIR_SIZE
+   filas): por defecto solo se informan; con --outliers clip/drop se recortan
+   a los límites o se descartan
+
+Escribe el dataset limpio (CSV para train_model.py y, si pyarrow está
+instalado, también Parquet) y un reporte JSON con los conteos de cada paso.
+La memoria es proporcional al tamaño de bloque, no al del archivo
+
+Uso:
+	python model/data_cleaning.py [--input data/liver_cancer_data.csv] [--output data/liver_cancer_data_clean.csv]
+		[--outliers report|clip|drop] [--parquet ruta.parquet] [--plots directorio]
+"""
+
+import argparse
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+try:
+	import pyarrow as pa
+	import pyarrow.parquet as pq
+except ImportError:
+	pa = None
+	pq = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+RAW_DATA_PATH = os.path.join(DATA_DIR, 'liver_cancer_data.csv')
+CLEAN_DATA_PATH = os.path.join(DATA_DIR, 'liver_cancer_data_clean.csv')
+REPORT_PATH = os.path.join(DATA_DIR, 'cleaning_report.json')
+
+CHUNK_SIZE = 100_000
+RESERVOIR_SIZE = 1_000_000
+IQR_FACTOR = 1.5
+
+# Orden de columnas del dataset limpio
+COLUMNS = [
+	'age', 'gender', 'bmi', 'alcohol_consumption', 'smoking_status',
+	'hepatitis_b', 'hepatitis_c', 'liver_function_score', 'alpha_fetoprotein_level',
+	'cirrhosis_history', 'family_history_cancer', 'physical_activity_level',
+	'diabetes', 'liver_cancer'
+]
+
+# Rangos físicamente posibles (None = sin límite). Son más amplios que los de
+# validación del backend a propósito: aquí solo se descartan errores de datos
+VALID_RANGES = {
+	'age': (0, 120),
+	'bmi': (0, 100),
+	'liver_function_score': (0, None),
+	'alpha_fetoprotein_level': (0, None)
+}
+NUMERIC_COLUMNS = list(VALID_RANGES)
+INTEGER_COLUMNS = ['age']
+
+BINARY_COLUMNS = [
+	'hepatitis_b', 'hepatitis_c', 'cirrhosis_history',
+	'family_history_cancer', 'diabetes', 'liver_cancer'
+]
+BINARY_ALIASES = {
+	'1': 1, '1.0': 1, 'true': 1, 'yes': 1, 'si': 1, 'sí': 1, 't': 1, 'y': 1,
+	'0': 0, '0.0': 0, 'false': 0, 'no': 0, 'f': 0, 'n': 0
+}
+
+# Alias en minúsculas -> valor canónico (los canónicos se incluyen a sí mismos)
+CATEGORY_ALIASES = {
+	'gender': {
+		'male': 'Male', 'm': 'Male', 'masculino': 'Male', 'hombre': 'Male',
+		'female': 'Female', 'f': 'Female', 'femenino': 'Female', 'mujer': 'Female'
+	},
+	'alcohol_consumption': {
+		'never': 'Never', 'none': 'Never', 'nunca': 'Never',
+		'occasional': 'Occasional', 'ocasional': 'Occasional',
+		'regular': 'Regular'
+	},
+	'smoking_status': {
+		'never': 'Never', 'nunca': 'Never',
+		'former': 'Former', 'ex': 'Former', 'exfumador': 'Former',
+		'current': 'Current', 'actual': 'Current', 'fumador': 'Current'
+	},
+	'physical_activity_level': {
+		'low': 'Low', 'baja': 'Low', 'bajo': 'Low',
+		'moderate': 'Moderate', 'medium': 'Moderate', 'moderada': 'Moderate', 'media': 'Moderate',
+		'high': 'High', 'alta': 'High', 'alto': 'High'
+	}
+}
+CATEGORICAL_COLUMNS = list(CATEGORY_ALIASES)
+
+class CleaningStats:
+	"""
+	Conteos acumulados entre bloques para el reporte
+	"""
+
+	def __init__(self):
+		self.rows_read = 0
+		self.rows_written = 0
+		self.chunks = 0
+		self.fixes = {'decimal_comma': 0, 'stray_characters': 0, 'category_alias': 0, 'binary_alias': 0, 'age_rounded': 0}
+		self.invalid = {col: 0 for col in COLUMNS}
+		self.out_of_range = {col: 0 for col in NUMERIC_COLUMNS}
+		self.dropped = {'missing_or_invalid': 0, 'duplicates': 0, 'outliers': 0}
+		self.outliers = {}
+
+class Reservoir:
+	"""
+	Muestra uniforme de tamaño fijo de un flujo de valores (algoritmo R
+	vectorizado); mientras el flujo no supera `size` guarda todos los valores
+	"""
+
+	def __init__(self, size, seed=42):
+		self.size = size
+		self.seen = 0
+		self.values = np.empty(size, dtype=np.float64)
+		self.rng = np.random.default_rng(seed)
+
+	def add(self, values):
+		values = np.asarray(values, dtype=np.float64)
+		fill = min(max(self.size - self.seen, 0), len(values))
+		self.values[self.seen:self.seen + fill] = values[:fill]
+		rest = values[fill:]
+		if len(rest):
+			positions = np.arange(self.seen + fill + 1, self.seen + len(values) + 1)
+			accepted = self.rng.random(len(rest)) < self.size / positions
+			slots = self.rng.integers(0, self.size, int(accepted.sum()))
+			self.values[slots] = rest[accepted]
+		self.seen += len(values)
+
+	def sample(self):
+		return self.values[:min(self.seen, self.size)]
+
+def coerce_numeric(raw, stats=None):
+	"""
+	Convierte texto a número reparando coma decimal y caracteres sueltos
+	(comillas, unidades, espacios); lo irreparable queda como NaN
+	"""
+	text = raw.astype('string').str.strip()
+	# Float64: si el bloque solo trae enteros, to_numeric devuelve Int64 y no
+	# admitiría los decimales reparados ('55,6')
+	values = pd.to_numeric(text, errors='coerce').astype('Float64')
+	pending = values.isna() & text.notna() & (text != '')
+	if pending.any():
+		repaired = text[pending].str.replace(',', '.', regex=False)
+		decimal_comma = pd.to_numeric(repaired, errors='coerce')
+		stripped = pd.to_numeric(repaired.str.replace(r'[^0-9eE+\-.]', '', regex=True), errors='coerce')
+		if stats is not None:
+			stats.fixes['decimal_comma'] += int(decimal_comma.notna().sum())
+			stats.fixes['stray_characters'] += int((decimal_comma.isna() & stripped.notna()).sum())
+		values[pending] = decimal_comma.fillna(stripped)
+	return values.astype(np.float64)
+
+def coerce_chunk(chunk, stats):
+	"""
+	Aplica la coerción de tipos y las reglas de corrección a un bloque leído
+	como texto; los valores inválidos quedan como NaN
+	"""
+	cleaned = pd.DataFrame(index=chunk.index)
+
+	for col in COLUMNS:
+		raw = chunk[col]
+		if col in VALID_RANGES:
+			values = coerce_numeric(raw, stats)
+			low, high = VALID_RANGES[col]
+			impossible = (values < low if low is not None else False) | (values > high if high is not None else False)
+			stats.out_of_range[col] += int(impossible.sum())
+			values = values.mask(impossible)
+			if col in INTEGER_COLUMNS:
+				rounded = values.round()
+				stats.fixes['age_rounded'] += int(((rounded != values) & values.notna()).sum())
+				values = rounded
+		elif col in BINARY_COLUMNS:
+			text = raw.astype('string').str.strip().str.lower()
+			values = text.map(BINARY_ALIASES).astype(np.float64)
+			stats.fixes['binary_alias'] += int((values.notna() & ~text.isin(['0', '1'])).sum())
+		else:
+			text = raw.astype('string').str.strip()
+			values = text.str.lower().map(CATEGORY_ALIASES[col])
+			stats.fixes['category_alias'] += int((values.notna() & (values != text)).sum())
+		stats.invalid[col] += int(values.isna().sum())
+		cleaned[col] = values
+
+	return cleaned
+
+def read_chunks(path, chunk_size, usecols=None):
+	"""
+	Lee el CSV por bloques, todo como texto para que la coerción sea explícita
+	"""
+	header = pd.read_csv(path, nrows=0).columns.tolist()
+	missing = [col for col in COLUMNS if col not in header]
+	if missing:
+		raise ValueError(f"Faltan columnas en {path}: {missing}")
+	return pd.read_csv(
+		path, dtype=str, keep_default_na=True, chunksize=chunk_size,
+		usecols=usecols or COLUMNS
+	)
+
+def estimate_outlier_bounds(path, chunk_size, reservoir_size=RESERVOIR_SIZE, iqr_factor=IQR_FACTOR):
+	"""
+	Primera pasada (solo columnas numéricas): límites Q1 - k·IQR y Q3 + k·IQR
+	de cada columna sobre los valores válidos
+
+	Returns:
+		(bounds, reservoirs): {col: (lower, upper)} y las muestras usadas
+	"""
+	reservoirs = {col: Reservoir(reservoir_size) for col in NUMERIC_COLUMNS}
+	for chunk in read_chunks(path, chunk_size, usecols=NUMERIC_COLUMNS):
+		for col in NUMERIC_COLUMNS:
+			values = coerce_numeric(chunk[col])
+			low, high = VALID_RANGES[col]
+			valid = values.notna()
+			if low is not None:
+				valid &= values >= low
+			if high is not None:
+				valid &= values <= high
+			reservoirs[col].add(values[valid].to_numpy())
+
+	bounds = {}
+	for col, reservoir in reservoirs.items():
+		sample = reservoir.sample()
+		if len(sample) == 0:
+			continue
+		q1, q3 = np.percentile(sample, [25, 75])
+		iqr = q3 - q1
+		bounds[col] = (float(q1 - iqr_factor * iqr), float(q3 + iqr_factor * iqr))
+	return bounds, reservoirs
+
+def finalize_types(df):
+	"""
+	Tipos del dataset limpio: enteros para edad y binarias, float para el resto
+	"""
+	for col in INTEGER_COLUMNS + BINARY_COLUMNS:
+		df[col] = df[col].astype(np.int64)
+	return df
+
+def save_boxplots(reservoirs, bounds, plots_dir):
+	"""
+	Un boxplot por columna numérica (sobre la muestra de la primera pasada)
+	guardado como PNG, en lugar de plt.show()
+	"""
+	import matplotlib
+	matplotlib.use('Agg')
+	import matplotlib.pyplot as plt
+
+	os.makedirs(plots_dir, exist_ok=True)
+	for col, reservoir in reservoirs.items():
+		fig, ax = plt.subplots(figsize=(8, 4))
+		ax.boxplot(reservoir.sample(), orientation='horizontal', whis=IQR_FACTOR)
+		if col in bounds:
+			for bound in bounds[col]:
+				ax.axvline(bound, color='red', linestyle='--', linewidth=1)
+		ax.set_title(col)
+		fig.tight_layout()
+		fig.savefig(os.path.join(plots_dir, f'boxplot_{col}.png'), dpi=100)
+		plt.close(fig)
+	print(f"✓ Boxplots guardados en: {plots_dir}")
+
+def clean_dataset(input_path=RAW_DATA_PATH, output_path=CLEAN_DATA_PATH, report_path=REPORT_PATH,
+		outlier_mode='report', chunk_size=CHUNK_SIZE, parquet_path=None, plots_dir=None):
+	"""
+	Ejecuta el pipeline completo y escribe el dataset limpio y el reporte
+
+	Args:
+		input_path: CSV crudo (export_data.py)
+		output_path: CSV limpio que consume train_model.py
+		report_path: Reporte JSON de la limpieza (None = no se escribe)
+		outlier_mode: 'report' (solo contar), 'clip' (recortar a los límites IQR) o 'drop'
+		chunk_size: Filas por bloque
+		parquet_path: Copia columnar en Parquet (requiere pyarrow)
+		plots_dir: Directorio para los boxplots de las columnas numéricas
+
+	Returns:
+		Diccionario del reporte
+	"""
+	if outlier_mode not in ('report', 'clip', 'drop'):
+		raise ValueError(f"outlier_mode inválido: {outlier_mode}")
+	if parquet_path and pq is None:
+		print("⚠️ pyarrow no está instalado, se omite la salida Parquet")
+		parquet_path = None
+
+	start = time.perf_counter()
+	print(f"Limpiando {input_path} en bloques de {chunk_size} filas...")
+
+	bounds, reservoirs = estimate_outlier_bounds(input_path, chunk_size)
+	stats = CleaningStats()
+	stats.outliers = {col: {'lower': lower, 'upper': upper, 'count': 0} for col, (lower, upper) in bounds.items()}
+	seen_hashes = set()
+
+	output_dir = os.path.dirname(os.path.abspath(output_path))
+	os.makedirs(output_dir, exist_ok=True)
+	tmp_output = output_path + '.tmp'
+	tmp_parquet = parquet_path + '.tmp' if parquet_path else None
+	parquet_writer = None
+
+	try:
+		with open(tmp_output, 'w', newline='', encoding='utf-8') as csv_file:
+			for chunk in read_chunks(input_path, chunk_size):
+				stats.chunks += 1
+				stats.rows_read += len(chunk)
+
+				cleaned = coerce_chunk(chunk, stats)
+				complete = cleaned.notna().all(axis=1)
+				stats.dropped['missing_or_invalid'] += int((~complete).sum())
+				cleaned = finalize_types(cleaned[complete])
+
+				# Duplicados dentro del bloque y contra los bloques anteriores
+				hashes = pd.util.hash_pandas_object(cleaned, index=False).to_numpy()
+				unique = ~pd.Series(hashes).duplicated().to_numpy()
+				unique &= np.fromiter((int(h) not in seen_hashes for h in hashes), dtype=bool, count=len(hashes))
+				seen_hashes.update(int(h) for h in hashes[unique])
+				stats.dropped['duplicates'] += int((~unique).sum())
+				cleaned = cleaned[unique]
+
+				outlier_rows = np.zeros(len(cleaned), dtype=bool)
+				for col, (lower, upper) in bounds.items():
+					outside = ((cleaned[col] < lower) | (cleaned[col] > upper)).to_numpy()
+					stats.outliers[col]['count'] += int(outside.sum())
+					outlier_rows |= outside
+					if outlier_mode == 'clip':
+						clipped = cleaned[col].clip(lower, upper)
+						cleaned[col] = clipped.round() if col in INTEGER_COLUMNS else clipped
+				if outlier_mode == 'drop':
+					stats.dropped['outliers'] += int(outlier_rows.sum())
+					cleaned = cleaned[~outlier_rows]
+				cleaned = finalize_types(cleaned)
+
+				cleaned.to_csv(csv_file, index=False, header=stats.chunks == 1)
+				stats.rows_written += len(cleaned)
+
+				if tmp_parquet:
+					table = pa.Table.from_pandas(cleaned, preserve_index=False)
+					if parquet_writer is None:
+						parquet_writer = pq.ParquetWriter(tmp_parquet, table.schema)
+					parquet_writer.write_table(table)
+
+		if parquet_writer is not None:
+			parquet_writer.close()
+			parquet_writer = None
+			os.replace(tmp_parquet, parquet_path)
+		os.replace(tmp_output, output_path)
+	finally:
+		if parquet_writer is not None:
+			parquet_writer.close()
+		for path in (tmp_output, tmp_parquet):
+			if path and os.path.exists(path):
+				os.remove(path)
+
+	report = {
+		'input': os.path.basename(input_path),
+		'output': os.path.basename(output_path),
+		'parquet': os.path.basename(parquet_path) if parquet_path else None,
+		'rows_read': stats.rows_read,
+		'rows_written': stats.rows_written,
+		'chunks': stats.chunks,
+		'chunk_size': chunk_size,
+		'fixes': stats.fixes,
+		'invalid_values': {col: count for col, count in stats.invalid.items() if count},
+		'out_of_range': {col: count for col, count in stats.out_of_range.items() if count},
+		'dropped': stats.dropped,
+		'outlier_mode': outlier_mode,
+		'iqr_factor': IQR_FACTOR,
+		'outliers': stats.outliers,
+		'elapsed_s': round(time.perf_counter() - start, 3)
+	}
+
+	if report_path:
+		with open(report_path, 'w', encoding='utf-8') as f:
+			json.dump(report, f, indent=2, ensure_ascii=False)
+			f.write('\n')
+
+	if plots_dir:
+		save_boxplots(reservoirs, bounds, plots_dir)
+
+	print(f"✓ Dataset limpio guardado en: {output_path} ({stats.rows_written} de {stats.rows_read} filas)")
+	print(f"  Descartadas: {stats.dropped['missing_or_invalid']} con valores faltantes o inválidos, "
+		f"{stats.dropped['duplicates']} duplicadas, {stats.dropped['outliers']} outliers")
+	print("  Outliers (IQR): " + ', '.join(f"{col}={info['count']}" for col, info in stats.outliers.items()))
+	if report_path:
+		print(f"✓ Reporte guardado en: {report_path}")
+	return report
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='Limpieza del dataset crudo por bloques')
+	parser.add_argument('--input', default=RAW_DATA_PATH, help='CSV crudo (por defecto data/liver_cancer_data.csv)')
+	parser.add_argument('--output', default=CLEAN_DATA_PATH, help='CSV limpio (por defecto data/liver_cancer_data_clean.csv)')
+	parser.add_argument('--report', default=REPORT_PATH, help='Reporte JSON (por defecto data/cleaning_report.json)')
+	parser.add_argument('--outliers', choices=['report', 'clip', 'drop'], default='report',
+		help='Tratamiento de los outliers IQR: solo informar, recortar o descartar')
+	parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Filas por bloque')
+	parser.add_argument('--parquet', default=None, help='Escribir también el dataset limpio en Parquet (requiere pyarrow)')
+	parser.add_argument('--plots', default=None, help='Directorio donde guardar los boxplots de las columnas numéricas')
+	args = parser.parse_args()
+
+	clean_dataset(
+		args.input, args.output, args.report, args.outliers,
+		args.chunk_size, args.parquet, args.plots
+	)
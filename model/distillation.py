@@ -0,0 +1,64 @@
+"""
+Destilación del MLP (profesor) en una red diminuta (estudiante)
+El estudiante se entrena con las probabilidades suaves del profesor en lugar
+de las etiquetas duras, de modo que con muy pocos parámetros reproduce la
+frontera de decisión aprendida por la red grande
+"""
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Dense, Input
+from tensorflow.keras.callbacks import EarlyStopping
+
+def soften(probabilities, temperature):
+	"""
+	Suaviza las probabilidades del profesor dividiendo sus logits por la temperatura
+	"""
+	p = np.clip(np.asarray(probabilities, dtype=np.float64), 1e-7, 1 - 1e-7)
+	logits = np.log(p / (1 - p))
+	return 1 / (1 + np.exp(-logits / temperature))
+
+def build_student(input_dim, hidden_units):
+	"""
+	Estudiante: una capa oculta pequeña + salida sigmoide
+	"""
+	model = Sequential([
+		Input(shape=(input_dim,)),
+		Dense(hidden_units, activation='relu'),
+		Dense(1, activation='sigmoid')
+	])
+	model.compile(
+		optimizer=tf.keras.optimizers.Adam(learning_rate=0.01),
+		loss='binary_crossentropy'
+	)
+	return model
+
+def distill_student(teacher, X_train_scaled, hidden_units, temperature=1.0, epochs=300, batch_size=64, seed=42):
+	"""
+	Entrena un estudiante con los targets suaves del profesor
+
+	Args:
+		teacher: Modelo Keras entrenado
+		X_train_scaled: Features de entrenamiento escaladas
+		hidden_units: Unidades de la capa oculta del estudiante
+		temperature: Temperatura de los targets suaves (1 = probabilidades tal cual)
+		epochs, batch_size: Parámetros de entrenamiento
+		seed: Semilla de los pesos iniciales
+
+	Returns:
+		Modelo Keras del estudiante
+	"""
+	tf.keras.utils.set_random_seed(seed)
+
+	soft_targets = soften(teacher.predict(X_train_scaled, verbose=0).ravel(), temperature)
+	student = build_student(X_train_scaled.shape[1], hidden_units)
+	student.fit(
+		X_train_scaled, soft_targets,
+		validation_split=0.2,
+		epochs=epochs,
+		batch_size=batch_size,
+		callbacks=[EarlyStopping(monitor='val_loss', patience=20, restore_best_weights=True)],
+		verbose=0
+	)
+	return student
@@ -0,0 +1,98 @@
+"""
+Reentrenamiento incremental con las predicciones registradas que ya tienen
+diagnóstico confirmado
+Las filas de data/predictions_log.csv cuyo campo liver_cancer se completó
+(0/1) se limpian con el mismo pipeline que el dataset, se codifican con los
+encoders del modelo y se usan para afinar el MLP guardado (warm start) durante
+pocas épocas, mezcladas con una muestra de repaso de los datos anteriores para
+que el modelo no olvide la distribución original
+"""
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from data_cleaning import CleaningStats, COLUMNS, coerce_chunk, finalize_types
+
+LABEL_COLUMN = 'liver_cancer'
+TIMESTAMP_COLUMN = 'timestamp'
+
+# Por debajo de estas filas nuevas no se separa un holdout propio
+MIN_HOLDOUT_ROWS = 20
+
+def load_labeled_predictions(log_path, feature_names, encoders):
+	"""
+	Filas etiquetadas del log de predicciones, limpias y codificadas
+
+	Se descartan las filas sin diagnóstico, con valores inválidos o sin
+	timestamp (el timestamp indica qué filas ya se usaron en un reentrenamiento)
+
+	Returns:
+		(X, y, timestamps): features codificadas en el orden de feature_names,
+		etiquetas 0/1 y timestamps como datetime
+	"""
+	empty = (pd.DataFrame(columns=feature_names), np.array([], dtype=np.int64), pd.Series([], dtype='datetime64[ns]'))
+
+	try:
+		log = pd.read_csv(log_path, dtype=str)
+	except FileNotFoundError:
+		return empty
+	if LABEL_COLUMN not in log.columns or TIMESTAMP_COLUMN not in log.columns:
+		return empty
+
+	log = log[log[LABEL_COLUMN].notna() & (log[LABEL_COLUMN].str.strip() != '')]
+	if log.empty:
+		return empty
+
+	cleaned = coerce_chunk(log[COLUMNS], CleaningStats())
+	timestamps = pd.to_datetime(log[TIMESTAMP_COLUMN], errors='coerce')
+	complete = cleaned.notna().all(axis=1) & timestamps.notna()
+	cleaned = finalize_types(cleaned[complete])
+
+	X = cleaned[feature_names].copy()
+	for col, encoder in encoders.items():
+		X[col] = encoder.transform(X[col])
+	return X, cleaned[LABEL_COLUMN].to_numpy(), timestamps[complete]
+
+def split_new_rows(X_new, y_new, holdout_fraction=0.2, seed=42):
+	"""
+	Separa un holdout estratificado de las filas nuevas para validar también
+	sobre la distribución reciente; con pocas filas o una sola clase todas
+	van a entrenamiento
+
+	Returns:
+		(X_train, X_holdout, y_train, y_holdout)
+	"""
+	if len(y_new) < MIN_HOLDOUT_ROWS or np.bincount(y_new, minlength=2).min() < 2:
+		return X_new, X_new.iloc[:0], y_new, y_new[:0]
+	return train_test_split(X_new, y_new, test_size=holdout_fraction, random_state=seed, stratify=y_new)
+
+def replay_sample(X_pool, y_pool, size, seed=42):
+	"""
+	Muestra uniforme sin reemplazo de los datos ya vistos (repaso)
+	"""
+	rng = np.random.default_rng(seed)
+	index = rng.choice(len(y_pool), size=min(size, len(y_pool)), replace=False)
+	return X_pool.iloc[index], np.asarray(y_pool)[index]
+
+def fine_tune(model, X_scaled, y, epochs=5, learning_rate=1e-4, batch_size=32, seed=42):
+	"""
+	Continúa el entrenamiento de un modelo ya entrenado con una tasa de
+	aprendizaje baja, para ajustar los pesos sin borrar lo aprendido
+
+	Returns:
+		History de Keras
+	"""
+	tf.keras.utils.set_random_seed(seed)
+	model.compile(
+		optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+		loss='binary_crossentropy',
+		metrics=['accuracy', tf.keras.metrics.AUC(name='auc')]
+	)
+	return model.fit(
+		X_scaled, y,
+		epochs=epochs,
+		batch_size=batch_size,
+		shuffle=True,
+		verbose=0
+	)
@@ -0,0 +1,204 @@
+"""
+Familias de modelos ligeros para comparar con el MLP
+Regresión logística y gradient boosting entrenados sobre la misma división,
+exportados al mismo grafo ONNX que consume el backend (entrada 'input' con
+las features codificadas sin escalar, salida 'probability' [N, 1]) y
+medidos en AUC y latencia de inferencia con ONNX Runtime
+"""
+
+import json
+import time
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.ensemble import GradientBoostingClassifier
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+FAMILIES = ('logistic_regression', 'gradient_boosting')
+
+def train_family(family, X_train, y_train, scaler, seed=42):
+	"""
+	Entrena una familia de modelos. La regresión logística usa las features
+	escaladas; los árboles no dependen de la escala y usan las codificadas
+	"""
+	if family == 'logistic_regression':
+		estimator = LogisticRegression(max_iter=1000, random_state=seed)
+		estimator.fit(scaler.transform(X_train), y_train)
+	elif family == 'gradient_boosting':
+		estimator = GradientBoostingClassifier(
+			n_estimators=150, max_depth=3, learning_rate=0.1, subsample=0.8, random_state=seed
+		)
+		estimator.fit(np.asarray(X_train, dtype=np.float32), y_train)
+	else:
+		raise ValueError(f"Familia de modelos desconocida: {family}")
+	return estimator
+
+def _logistic_regression_graph(estimator, scaler, helper, numpy_helper):
+	"""
+	MatMul + Add + Sigmoid con el scaler fusionado en los coeficientes
+	"""
+	mean = np.asarray(scaler.mean_, dtype=np.float64)
+	scale = np.asarray(scaler.scale_, dtype=np.float64)
+	coef = np.asarray(estimator.coef_, dtype=np.float64).T
+	intercept = np.asarray(estimator.intercept_, dtype=np.float64) - (mean / scale) @ coef
+	coef = coef / scale[:, None]
+
+	initializers = [
+		numpy_helper.from_array(coef.astype(np.float32), name='W'),
+		numpy_helper.from_array(intercept.astype(np.float32), name='B')
+	]
+	nodes = [
+		helper.make_node('MatMul', ['input', 'W'], ['logit_raw']),
+		helper.make_node('Add', ['logit_raw', 'B'], ['logit']),
+		helper.make_node('Sigmoid', ['logit'], ['probability'])
+	]
+	return nodes, initializers, []
+
+def _float32_floor(values):
+	"""
+	Redondea los umbrales float64 hacia abajo a float32: sklearn compara la
+	entrada float32 con el umbral float64, y x <= t equivale a x <= floor32(t)
+	"""
+	rounded = values.astype(np.float32)
+	too_high = rounded.astype(np.float64) > values
+	rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+	return rounded
+
+def _gradient_boosting_graph(estimator, helper, numpy_helper):
+	"""
+	TreeEnsembleRegressor (ai.onnx.ml) que suma las hojas ponderadas por el
+	learning rate, más el log-odds inicial y una Sigmoid
+	"""
+	attrs = {key: [] for key in (
+		'nodes_treeids', 'nodes_nodeids', 'nodes_featureids', 'nodes_values', 'nodes_modes',
+		'nodes_truenodeids', 'nodes_falsenodeids', 'target_treeids', 'target_nodeids',
+		'target_ids', 'target_weights'
+	)}
+
+	for tree_id, tree in enumerate(estimator.estimators_[:, 0]):
+		t = tree.tree_
+		is_leaf = t.children_left < 0
+		n_nodes = t.node_count
+		attrs['nodes_treeids'] += [tree_id] * n_nodes
+		attrs['nodes_nodeids'] += list(range(n_nodes))
+		attrs['nodes_featureids'] += np.where(is_leaf, 0, t.feature).tolist()
+		attrs['nodes_values'] += np.where(is_leaf, 0.0, _float32_floor(t.threshold)).tolist()
+		attrs['nodes_modes'] += ['LEAF' if leaf else 'BRANCH_LEQ' for leaf in is_leaf]
+		attrs['nodes_truenodeids'] += np.where(is_leaf, 0, t.children_left).tolist()
+		attrs['nodes_falsenodeids'] += np.where(is_leaf, 0, t.children_right).tolist()
+
+		leaves = np.flatnonzero(is_leaf)
+		attrs['target_treeids'] += [tree_id] * len(leaves)
+		attrs['target_nodeids'] += leaves.tolist()
+		attrs['target_ids'] += [0] * len(leaves)
+		attrs['target_weights'] += (t.value[leaves, 0, 0] * estimator.learning_rate).tolist()
+
+	# Log-odds inicial del DummyClassifier de prior (misma base que decision_function)
+	prior = float(estimator.init_.class_prior_[1])
+	base_value = np.log(prior / (1 - prior))
+
+	nodes = [
+		helper.make_node(
+			'TreeEnsembleRegressor', ['input'], ['logit'], domain='ai.onnx.ml',
+			n_targets=1, aggregate_function='SUM', post_transform='NONE',
+			base_values=[float(base_value)], **attrs
+		),
+		helper.make_node('Sigmoid', ['logit'], ['probability'])
+	]
+	return nodes, [], [helper.make_opsetid('ai.onnx.ml', 1)]
+
+def export_family_onnx(family, estimator, scaler, feature_names, encoders, output_path):
+	"""
+	Exporta un modelo de una familia ligera con la misma interfaz ONNX que
+	export_onnx_model (entrada sin escalar, salida 'probability', metadata_props)
+	"""
+	import onnx
+	from onnx import helper, numpy_helper, TensorProto
+
+	if family == 'logistic_regression':
+		nodes, initializers, extra_opsets = _logistic_regression_graph(estimator, scaler, helper, numpy_helper)
+	elif family == 'gradient_boosting':
+		nodes, initializers, extra_opsets = _gradient_boosting_graph(estimator, helper, numpy_helper)
+	else:
+		raise ValueError(f"Familia de modelos desconocida: {family}")
+
+	graph = helper.make_graph(
+		nodes,
+		f'liver_cancer_{family}',
+		[helper.make_tensor_value_info('input', TensorProto.FLOAT, [None, len(feature_names)])],
+		[helper.make_tensor_value_info('probability', TensorProto.FLOAT, [None, 1])],
+		initializer=initializers
+	)
+	onnx_model = helper.make_model(
+		graph,
+		producer_name='liver_cancer_train_model',
+		opset_imports=[helper.make_opsetid('', 13)] + extra_opsets
+	)
+	onnx_model.ir_version = 7
+
+	encoder_classes = {
+		col: (encoder.classes_.tolist() if hasattr(encoder, 'classes_') else list(encoder))
+		for col, encoder in encoders.items()
+	}
+	helper.set_model_props(onnx_model, {
+		'feature_names': json.dumps(feature_names),
+		'encoders': json.dumps(encoder_classes),
+		'scaling': 'fused' if family == 'logistic_regression' else 'none',
+		'model_family': family
+	})
+
+	onnx.checker.check_model(onnx_model)
+	onnx.save(onnx_model, output_path)
+	return output_path
+
+def evaluate_onnx_model(model_path, X_test, y_test, batch_size=1000, single_repeats=300, batch_repeats=30):
+	"""
+	AUC del artefacto exportado y latencias de inferencia con ONNX Runtime
+	(un hilo, como en una solicitud individual del backend)
+
+	Returns:
+		Diccionario con auc, accuracy (umbral 0.5), loss (log loss),
+		single_row_us (mediana) y batch_us_per_row
+	"""
+	import onnxruntime as ort
+
+	options = ort.SessionOptions()
+	options.intra_op_num_threads = 1
+	options.inter_op_num_threads = 1
+	session = ort.InferenceSession(model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+	X = np.asarray(X_test, dtype=np.float32)
+	probabilities = session.run(None, {'input': X})[0][:, 0]
+
+	row = X[:1]
+	batch = np.resize(X, (batch_size, X.shape[1]))
+	for _ in range(10):
+		session.run(None, {'input': row})
+
+	single = []
+	for _ in range(single_repeats):
+		start = time.perf_counter()
+		session.run(None, {'input': row})
+		single.append(time.perf_counter() - start)
+
+	batched = []
+	for _ in range(batch_repeats):
+		start = time.perf_counter()
+		session.run(None, {'input': batch})
+		batched.append(time.perf_counter() - start)
+
+	return {
+		'auc': float(roc_auc_score(y_test, probabilities)),
+		'accuracy': float(accuracy_score(y_test, probabilities > 0.5)),
+		'loss': float(log_loss(y_test, probabilities.astype(np.float64), labels=[0, 1])),
+		'single_row_us': float(np.median(single) * 1e6),
+		'batch_us_per_row': float(np.median(batched) * 1e6 / batch_size)
+	}
+
+def select_model(results, auc_tolerance=0.005, latency_metric='single_row_us'):
+	"""
+	Elige el modelo más rápido cuya AUC esté a menos de `auc_tolerance` de la
+	mejor AUC obtenida (compromiso precisión/latencia configurable)
+	"""
+	best_auc = max(r['auc'] for r in results.values())
+	eligible = {name: r for name, r in results.items() if r['auc'] >= best_auc - auc_tolerance}
+	return min(eligible, key=lambda name: eligible[name][latency_metric])
@@ -0,0 +1,211 @@
+"""
+Manifiesto de cada ejecución de train_model.py
+Registra qué produjo los artefactos de saved_models: hash de los datos y del
+código de entrenamiento, configuración (flags e hiperparámetros), versiones
+de las librerías, semilla, tiempos por fase, métricas y el SHA-256 de cada
+artefacto resultante
+
+Se guarda como saved_models/run_manifest.json (la última ejecución, la que
+verifica el backend al cargar) y como historial en saved_models/runs/. La
+huella (fingerprint) resume todas las entradas, incluido el modo: si coincide
+con la de alguna ejecución del historial y los artefactos no cambiaron desde
+entonces, repetirla produciría lo mismo y se puede omitir
+"""
+
+import hashlib
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+from importlib import metadata as importlib_metadata
+
+MANIFEST_NAME = 'run_manifest.json'
+RUNS_DIR = 'runs'
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Librería -> distribuciones que la proveen (TensorFlow se publica con varios nombres)
+TRACKED_LIBRARIES = {
+	'numpy': ('numpy',),
+	'pandas': ('pandas',),
+	'scikit-learn': ('scikit-learn',),
+	'tensorflow': ('tensorflow', 'tensorflow-cpu', 'tensorflow-macos'),
+	'keras': ('keras',),
+	'keras-tuner': ('keras-tuner',),
+	'onnx': ('onnx',),
+	'onnxruntime': ('onnxruntime',)
+}
+
+def file_sha256(path, chunk_size=1 << 20):
+	"""
+	SHA-256 de un archivo leído por bloques
+	"""
+	digest = hashlib.sha256()
+	with open(path, 'rb') as f:
+		for block in iter(lambda: f.read(chunk_size), b''):
+			digest.update(block)
+	return digest.hexdigest()
+
+def library_versions():
+	"""
+	Versiones de Python y de las librerías que influyen en el resultado
+	"""
+	versions = {'python': platform.python_version()}
+	for name, distributions in TRACKED_LIBRARIES.items():
+		versions[name] = None
+		for distribution in distributions:
+			try:
+				versions[name] = importlib_metadata.version(distribution)
+				break
+			except importlib_metadata.PackageNotFoundError:
+				continue
+	return versions
+
+def code_hashes():
+	"""
+	SHA-256 de cada módulo de model/ (el código de entrenamiento también es una entrada)
+	"""
+	return {
+		name: file_sha256(os.path.join(CODE_DIR, name))
+		for name in sorted(os.listdir(CODE_DIR)) if name.endswith('.py')
+	}
+
+def artifact_hashes(model_dir):
+	"""
+	SHA-256 y tamaño de cada archivo de saved_models (sin subcarpetas, ocultos ni el manifiesto)
+	"""
+	artifacts = {}
+	for name in sorted(os.listdir(model_dir)):
+		path = os.path.join(model_dir, name)
+		if name == MANIFEST_NAME or name.startswith('.') or not os.path.isfile(path):
+			continue
+		artifacts[name] = {'sha256': file_sha256(path), 'bytes': os.path.getsize(path)}
+	return artifacts
+
+def run_history(model_dir):
+	"""
+	Manifiestos de saved_models/runs/, del más reciente al más antiguo (el
+	run_id empieza por la fecha UTC, así que el orden por nombre es cronológico)
+	"""
+	runs_dir = os.path.join(model_dir, RUNS_DIR)
+	if not os.path.isdir(runs_dir):
+		return
+	for name in sorted(os.listdir(runs_dir), reverse=True):
+		if not name.endswith('.json'):
+			continue
+		try:
+			with open(os.path.join(runs_dir, name), 'r') as f:
+				yield json.load(f)
+		except (OSError, ValueError):
+			continue
+
+def changed_artifacts(model_dir, artifacts):
+	"""
+	Artefactos del manifiesto que faltan o cuyo contenido ya no coincide
+	"""
+	changed = []
+	for name, info in artifacts.items():
+		path = os.path.join(model_dir, name)
+		if not os.path.isfile(path) or file_sha256(path) != info['sha256']:
+			changed.append(name)
+	return changed
+
+class RunManifest:
+	"""
+	Manifiesto en construcción de la ejecución actual
+
+	Args:
+		command: Modo de train_model.py ('train', 'distill', 'incremental'...)
+		config: Flags de la ejecución
+		inputs: {nombre: ruta} de los archivos de entrada (datos, hiperparámetros...)
+		seed: Semilla global
+	"""
+
+	def __init__(self, command, config, inputs, seed):
+		self.command = command
+		self.config = config
+		self.seed = seed
+		self.inputs = {
+			name: {'file': os.path.basename(path), 'sha256': file_sha256(path)}
+			for name, path in inputs.items() if os.path.exists(path)
+		}
+		self.code = code_hashes()
+		self.libraries = library_versions()
+		self.fingerprint = hashlib.sha256(json.dumps({
+			'command': command,
+			'config': config,
+			'seed': seed,
+			'inputs': self.inputs,
+			'code': self.code,
+			'libraries': self.libraries
+		}, sort_keys=True).encode('utf-8')).hexdigest()
+		self.started_at = datetime.now(timezone.utc)
+		self.phases = {}
+		self._last = time.perf_counter()
+
+	def mark(self, phase):
+		"""
+		Registra la duración de una fase (tiempo desde la marca anterior)
+		"""
+		now = time.perf_counter()
+		self.phases[phase] = round(self.phases.get(phase, 0.0) + now - self._last, 3)
+		self._last = now
+
+	def is_up_to_date(self, model_dir):
+		"""
+		True si una ejecución del historial tuvo las mismas entradas (y el mismo
+		modo) y los artefactos siguen como los dejó. Se busca en runs/ y no solo
+		en run_manifest.json porque cada modo lo sobrescribe: repetir un
+		--distill-only después de un --export-policy-only que no cambió nada
+		también debe omitirse
+		"""
+		return any(
+			not changed_artifacts(model_dir, previous.get('artifacts', {}))
+			for previous in run_history(model_dir)
+			if previous.get('fingerprint') == self.fingerprint
+		)
+
+	def save(self, model_dir):
+		"""
+		Hashea los artefactos, toma las métricas de feature_metadata.json y
+		escribe el manifiesto (última ejecución + historial)
+		"""
+		metrics = {}
+		metadata_path = os.path.join(model_dir, 'feature_metadata.json')
+		if os.path.exists(metadata_path):
+			with open(metadata_path, 'r') as f:
+				metadata = json.load(f)
+			metrics = {
+				key: metadata[key]
+				for key in ('model_family', 'model_version', 'model_performance', 'teacher_performance', 'cross_validation')
+				if key in metadata
+			}
+
+		finished_at = datetime.now(timezone.utc)
+		run_id = f"{self.started_at.strftime('%Y%m%dT%H%M%SZ')}-{self.fingerprint[:8]}"
+		manifest = {
+			'run_id': run_id,
+			'command': self.command,
+			'started_at': self.started_at.isoformat(),
+			'finished_at': finished_at.isoformat(),
+			'duration_s': round((finished_at - self.started_at).total_seconds(), 3),
+			'fingerprint': self.fingerprint,
+			'seed': self.seed,
+			'config': self.config,
+			'inputs': self.inputs,
+			'code': self.code,
+			'libraries': self.libraries,
+			'phases': self.phases,
+			'metrics': metrics,
+			'artifacts': artifact_hashes(model_dir)
+		}
+
+		runs_dir = os.path.join(model_dir, RUNS_DIR)
+		os.makedirs(runs_dir, exist_ok=True)
+		for path in (os.path.join(runs_dir, f'{run_id}.json'), os.path.join(model_dir, MANIFEST_NAME)):
+			tmp_path = path + '.tmp'
+			with open(tmp_path, 'w') as f:
+				json.dump(manifest, f, indent=2)
+			os.replace(tmp_path, path)
+		print(f"Manifiesto de la ejecución {run_id} guardado en: {model_dir}/{MANIFEST_NAME}")
+		return manifest
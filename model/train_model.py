@@ -3,32 +3,42 @@ Script de entrenamiento para el modelo de predicción de cáncer de hígado
 Entrena una Red Neuronal Multicapa (MLP) usando TensorFlow/Keras con Keras Tuner
 """
 
-import pandas as pd
 import numpy as np
 import json
 import os
 import pickle
 import argparse
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
-import keras_tuner as kt
-import matplotlib.pyplot as plt
-import seaborn as sns
+from functools import lru_cache
+from run_manifest import RunManifest
+
+# pandas, scikit-learn (y con él scipy), TensorFlow, Keras Tuner,
+# matplotlib/seaborn y los módulos que dependen de ellos se importan dentro de
+# las funciones que los usan: cada modo carga solo lo suyo (--export-policy-only
+# no importa TensorFlow) y --help o una ejecución omitida por el manifiesto
+# no pagan ninguno de esos imports
 
 # Configurar semilla para reproducibilidad
 seed = 42
 np.random.seed(seed)
-tf.random.set_seed(seed)
+
+@lru_cache(maxsize=None)
+def load_tensorflow():
+	"""
+	Importa TensorFlow la primera vez que se necesita y fija la semilla de
+	Python/NumPy/TF y los kernels deterministas: misma entrada -> mismos pesos
+	"""
+	import tensorflow as tf
+	tf.keras.utils.set_random_seed(seed)
+	tf.config.experimental.enable_op_determinism()
+	return tf
 
 def load_and_preprocess_data(csv_path):
 	"""
 	Carga y preprocesa los datos del CSV
 	"""
+	import pandas as pd
+	from sklearn.preprocessing import LabelEncoder
+	
 	print("Cargando datos...")
 	df = pd.read_csv(csv_path)
 	
@@ -72,6 +82,10 @@ def build_model(hp, input_dim):
 	Returns:
 		Modelo compilado
 	"""
+	tf = load_tensorflow()
+	from tensorflow.keras.models import Sequential
+	from tensorflow.keras.layers import Dense, Dropout
+	
 	model = Sequential()
 	
 	# Capa de entrada con hiperparámetros tunables
@@ -119,6 +133,10 @@ def build_model_from_hyperparameters(hyperparameters, input_dim):
 	Returns:
 		model: Modelo de Keras compilado
 	"""
+	tf = load_tensorflow()
+	from tensorflow.keras.models import Sequential
+	from tensorflow.keras.layers import Dense, Dropout
+	
 	model = Sequential()
 	
 	# Primera capa
@@ -157,6 +175,8 @@ def plot_training_history(history):
 	"""
 	Visualiza el historial de entrenamiento
 	"""
+	import matplotlib.pyplot as plt
+	
 	fig, axes = plt.subplots(1, 3, figsize=(15, 5))
 	
 	# Loss
@@ -191,6 +211,10 @@ def evaluate_model(model, X_test, y_test, scaler):
 	"""
 	Evalúa el modelo y genera métricas
 	"""
+	import matplotlib.pyplot as plt
+	import seaborn as sns
+	from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score, roc_curve
+	
 	# Escalar datos de prueba
 	X_test_scaled = scaler.transform(X_test)
 	
@@ -237,6 +261,923 @@ def evaluate_model(model, X_test, y_test, scaler):
 	print(f"Test Accuracy: {test_accuracy:.4f}")
 	print(f"Test AUC: {test_auc:.4f}")
 
+def export_onnx_model(model, scaler, feature_names, encoders, output_path):
+	"""
+	Exporta el MLP junto con el scaler y los encoders como un único grafo ONNX
+
+	El StandardScaler se fusiona en los pesos de la primera capa densa
+	(W' = W / scale, b' = b - (mean / scale) @ W), por lo que el grafo recibe
+	las features codificadas sin escalar. Las clases de los encoders y el orden
+	de las features se guardan en los metadata_props del modelo.
+
+	La codificación de las categóricas (texto -> índice en sus clases) no es
+	un nodo del grafo: la entrada sigue siendo un único tensor float, la misma
+	que usan las demás familias, el estudiante y los pesos mmap, y el backend
+	codifica en NumPy con preprocessing.json. Un consumidor externo reproduce
+	la codificación con los metadata_props 'encoders' (el código es la posición
+	de la clase en la lista).
+
+	Args:
+		model: Modelo Keras entrenado (Sequential de capas Dense/Dropout)
+		scaler: StandardScaler ajustado sobre los datos de entrenamiento
+		feature_names: Lista ordenada de nombres de features
+		encoders: Diccionario {columna: LabelEncoder} o {columna: lista de clases}
+		output_path: Ruta del archivo .onnx a generar
+
+	Returns:
+		True si se exportó el modelo, False si falta la dependencia onnx
+	"""
+	try:
+		import onnx
+		from onnx import helper, numpy_helper, TensorProto
+	except ImportError:
+		print("⚠️ Paquete 'onnx' no instalado, se omite la exportación ONNX (pip install onnx)")
+		return False
+
+	activations = {'relu': 'Relu', 'tanh': 'Tanh', 'sigmoid': 'Sigmoid'}
+	tf = load_tensorflow()
+	dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+
+	mean = np.asarray(scaler.mean_, dtype=np.float64)
+	scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+	nodes = []
+	initializers = []
+	current = 'input'
+
+	for i, layer in enumerate(dense_layers):
+		kernel, bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+
+		# Fusionar el escalado en la primera capa
+		if i == 0:
+			bias = bias - (mean / scale) @ kernel
+			kernel = kernel / scale[:, None]
+
+		initializers.append(numpy_helper.from_array(kernel.astype(np.float32), name=f'W{i}'))
+		initializers.append(numpy_helper.from_array(bias.astype(np.float32), name=f'B{i}'))
+
+		nodes.append(helper.make_node('MatMul', [current, f'W{i}'], [f'matmul{i}']))
+		nodes.append(helper.make_node('Add', [f'matmul{i}', f'B{i}'], [f'dense{i}']))
+		current = f'dense{i}'
+
+		activation = layer.get_config()['activation']
+		if activation != 'linear':
+			if activation not in activations:
+				raise ValueError(f"Activación no soportada para exportación ONNX: {activation}")
+			output_name = 'probability' if i == len(dense_layers) - 1 else f'act{i}'
+			nodes.append(helper.make_node(activations[activation], [current], [output_name]))
+			current = output_name
+
+	if current != 'probability':
+		nodes.append(helper.make_node('Identity', [current], ['probability']))
+
+	graph = helper.make_graph(
+		nodes,
+		'liver_cancer_mlp',
+		[helper.make_tensor_value_info('input', TensorProto.FLOAT, [None, len(feature_names)])],
+		[helper.make_tensor_value_info('probability', TensorProto.FLOAT, [None, 1])],
+		initializer=initializers
+	)
+	onnx_model = helper.make_model(
+		graph,
+		producer_name='liver_cancer_train_model',
+		opset_imports=[helper.make_opsetid('', 13)]
+	)
+	onnx_model.ir_version = 7
+
+	encoder_classes = {
+		col: (encoder.classes_.tolist() if hasattr(encoder, 'classes_') else list(encoder))
+		for col, encoder in encoders.items()
+	}
+	helper.set_model_props(onnx_model, {
+		'feature_names': json.dumps(feature_names),
+		'encoders': json.dumps(encoder_classes),
+		'scaling': 'fused'
+	})
+
+	onnx.checker.check_model(onnx_model)
+	onnx.save(onnx_model, output_path)
+	print(f"Modelo ONNX (scaler fusionado) guardado en: {output_path}")
+	return True
+
+def export_onnx_from_saved_artifacts(model_dir):
+	"""
+	Exporta a ONNX el modelo servido (MLP o estudiante destilado) sin reentrenar
+
+	Las familias ligeras de --compare-models no guardan el estimador, así que
+	su grafo no se puede regenerar: se mantiene el ONNX servido en lugar de
+	sustituirlo por el MLP (la política y el perfil corresponden a ese modelo)
+	"""
+	with open(os.path.join(model_dir, 'feature_metadata.json'), 'r') as f:
+		metadata = json.load(f)
+	model_family = metadata.get('model_family', 'mlp')
+	model_files = {'mlp': 'liver_cancer_model.keras', 'mlp_student': 'liver_cancer_student.keras'}
+	if model_family not in model_files:
+		print(f"⚠️ El modelo servido ({model_family}) no es un MLP, se mantiene su ONNX actual. "
+			"Use --compare-models para regenerarlo")
+		return False
+
+	model = load_tensorflow().keras.models.load_model(os.path.join(model_dir, model_files[model_family]))
+	scaler = load_scaler(model_dir)
+
+	return export_onnx_model(
+		model, scaler, metadata['feature_names'], metadata['encoders'],
+		os.path.join(model_dir, 'liver_cancer_model.onnx')
+	)
+
+def build_reference_profile(X_train, train_scores, feature_names, encoders, num_bins=10, num_quantiles=101, score_bins=20):
+	"""
+	Construye el perfil de referencia de entrenamiento en una sola pasada
+	vectorizada sobre la matriz codificada (sin bucles por feature)
+	
+	Numéricas: sketch de cuantiles (percentiles 0-100), bordes de deciles y
+	proporción por bin. Categóricas y binarias: frecuencia de cada código.
+	Scores: cuantiles e histograma de la probabilidad que asigna el modelo.
+	OOD: centro y proyección de blanqueo del espacio escalado (distancia de
+	Mahalanobis como una sola multiplicación matricial), cuantiles de la
+	distancia en entrenamiento y límites por feature del soporte observado.
+	
+	Args:
+		X_train: Matriz de entrenamiento ya codificada (sin escalar)
+		train_scores: Probabilidades del modelo sobre X_train
+		feature_names: Lista ordenada de nombres de features
+		encoders: Diccionario {columna: LabelEncoder} o {columna: lista de clases}
+		num_bins: Número de bins por cuantiles para las features numéricas
+		num_quantiles: Puntos del sketch de cuantiles
+		score_bins: Bins uniformes en [0, 1] para el histograma de scores
+	
+	Returns:
+		Diccionario con arrays de NumPy y metadatos (se guarda con save_reference_profile)
+	"""
+	numeric_columns = ['age', 'bmi', 'liver_function_score', 'alpha_fetoprotein_level']
+	X = np.asarray(X_train, dtype=np.float64)
+	scores = np.asarray(train_scores, dtype=np.float64).ravel()
+	n = len(X)
+	
+	numeric_idx = np.array([j for j, name in enumerate(feature_names) if name in numeric_columns])
+	categorical_idx = np.array([j for j, name in enumerate(feature_names) if name not in numeric_columns])
+	
+	# Numéricas: cuantiles de todas las columnas a la vez
+	probs = np.linspace(0, 1, num_quantiles)
+	Xn = X[:, numeric_idx]
+	quantiles = np.quantile(Xn, probs, axis=0).T
+	decile_positions = np.searchsorted(probs, np.linspace(0, 1, num_bins + 1)[1:-1])
+	bin_edges = quantiles[:, decile_positions]
+	
+	# Bin de cada celda = nº de bordes <= valor (equivale a searchsorted side='right')
+	bins = (Xn[:, :, None] >= bin_edges[None, :, :]).sum(axis=2)
+	offsets = np.arange(len(numeric_idx)) * num_bins
+	numeric_counts = np.bincount((bins + offsets).ravel(), minlength=len(numeric_idx) * num_bins)
+	numeric_proportions = numeric_counts.reshape(len(numeric_idx), num_bins) / n
+	
+	# Categóricas/binarias: un único bincount con offsets por feature
+	labels = []
+	for j in categorical_idx:
+		encoder = encoders.get(feature_names[j])
+		if encoder is None:
+			labels.append(['0', '1'])
+		else:
+			labels.append([str(c) for c in (encoder.classes_ if hasattr(encoder, 'classes_') else encoder)])
+	max_categories = max(len(l) for l in labels)
+	codes = X[:, categorical_idx].astype(np.int64)
+	offsets = np.arange(len(categorical_idx)) * max_categories
+	categorical_counts = np.bincount((codes + offsets).ravel(), minlength=len(categorical_idx) * max_categories)
+	categorical_proportions = categorical_counts.reshape(len(categorical_idx), max_categories) / n
+	
+	# Distribución de scores del modelo
+	score_edges = np.linspace(0, 1, score_bins + 1)
+	score_counts = np.bincount(
+		np.clip(np.searchsorted(score_edges, scores, side='right') - 1, 0, score_bins - 1),
+		minlength=score_bins
+	)
+	
+	# OOD: Mahalanobis en el espacio escalado (z = (x - media) / std, como el
+	# StandardScaler). Con la descomposición de la covarianza se compila una
+	# proyección P tal que d² = ||(x - media) @ P||², válida directamente sobre
+	# la entrada codificada sin escalar
+	center = X.mean(axis=0)
+	std = X.std(axis=0)
+	std[std == 0] = 1.0
+	Z = (X - center) / std
+	eigenvalues, eigenvectors = np.linalg.eigh(np.cov(Z, rowvar=False))
+	keep = eigenvalues > 1e-10 * eigenvalues.max()
+	projection = (eigenvectors[:, keep] / np.sqrt(eigenvalues[keep])) / std[:, None]
+	train_distances = np.sqrt(np.sum(((X - center) @ projection) ** 2, axis=1))
+	
+	lower = np.zeros(len(feature_names))
+	upper = np.zeros(len(feature_names))
+	lower[numeric_idx] = quantiles[:, 0]
+	upper[numeric_idx] = quantiles[:, -1]
+	upper[categorical_idx] = [len(l) - 1 for l in labels]
+	
+	return {
+		'feature_names': list(feature_names),
+		'n_samples': int(n),
+		'categorical_labels': labels,
+		'numeric_idx': numeric_idx,
+		'numeric_quantile_probs': probs,
+		'numeric_quantiles': quantiles,
+		'numeric_bin_edges': bin_edges,
+		'numeric_proportions': numeric_proportions,
+		'categorical_idx': categorical_idx,
+		'categorical_sizes': np.array([len(l) for l in labels]),
+		'categorical_proportions': categorical_proportions,
+		'score_quantiles': np.quantile(scores, probs),
+		'score_bin_edges': score_edges,
+		'score_proportions': score_counts / n,
+		'ood_center': center,
+		'ood_projection': projection,
+		'ood_distance_quantiles': np.quantile(train_distances, probs),
+		'ood_lower': lower,
+		'ood_upper': upper
+	}
+
+def write_array_file(magic, header, arrays, output_path):
+	"""
+	Escribe un binario de layout fijo:
+	
+		magic (4 bytes) | uint32 longitud de cabecera | cabecera JSON | arrays crudos
+	
+	La cabecera contiene los metadatos y el dtype/shape/offset de cada array
+	(alineados a 8 bytes), de modo que el backend lo carga con un json.loads
+	pequeño y vistas sobre el buffer (np.frombuffer / np.memmap), sin copiar
+	ni parsear los datos
+	"""
+	arrays = {key: np.ascontiguousarray(value) for key, value in arrays.items()}
+	header = dict(header)
+	header['arrays'] = {}
+	
+	offset = 0
+	for key, array in arrays.items():
+		header['arrays'][key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+		offset += -(-array.nbytes // 8) * 8
+	
+	header_bytes = json.dumps(header).encode('utf-8')
+	header_bytes += b' ' * (-(len(header_bytes) + 8) % 8)
+	
+	with open(output_path, 'wb') as f:
+		f.write(magic)
+		f.write(np.uint32(len(header_bytes)).tobytes())
+		f.write(header_bytes)
+		for array in arrays.values():
+			data = array.tobytes()
+			f.write(data + b'\0' * (-len(data) % 8))
+
+def save_reference_profile(profile, output_path):
+	"""
+	Guarda el perfil de referencia con write_array_file (magic b'LCRP')
+	"""
+	arrays = {key: value for key, value in profile.items() if isinstance(value, np.ndarray)}
+	header = {key: value for key, value in profile.items() if key not in arrays}
+	header['version'] = 2
+	write_array_file(b'LCRP', header, arrays, output_path)
+	print(f"Perfil de referencia guardado en: {output_path}")
+
+def export_shared_weights(model, scaler, feature_names, encoders, output_path, model_family='mlp'):
+	"""
+	Exporta los pesos del MLP, los vectores del scaler y las clases de los
+	encoders a un único archivo (magic b'LCMW') que los workers del backend
+	mapean en memoria en solo lectura (MODEL_BACKEND=mmap)
+	
+	Como en el grafo ONNX, el escalado se fusiona en la primera capa y los
+	pesos se guardan en float32
+	
+	Args:
+		model: Modelo Keras entrenado (Sequential de capas Dense/Dropout)
+		scaler: StandardScaler ajustado sobre los datos de entrenamiento
+		feature_names: Lista ordenada de nombres de features
+		encoders: Diccionario {columna: LabelEncoder} o {columna: lista de clases}
+		output_path: Ruta del archivo .bin a generar
+		model_family: Familia registrada en feature_metadata.json ('mlp' o 'mlp_student')
+	"""
+	tf = load_tensorflow()
+	dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+	mean = np.asarray(scaler.mean_, dtype=np.float64)
+	scale = np.asarray(scaler.scale_, dtype=np.float64)
+	
+	arrays = {}
+	activations = []
+	for i, layer in enumerate(dense_layers):
+		kernel, bias = [np.asarray(w, dtype=np.float64) for w in layer.get_weights()]
+		if i == 0:
+			bias = bias - (mean / scale) @ kernel
+			kernel = kernel / scale[:, None]
+		arrays[f'W{i}'] = kernel.astype(np.float32)
+		arrays[f'B{i}'] = bias.astype(np.float32)
+		activations.append(layer.get_config()['activation'])
+	arrays['scaler_mean'] = mean
+	arrays['scaler_scale'] = scale
+	
+	header = {
+		'version': 1,
+		'model_family': model_family,
+		'feature_names': list(feature_names),
+		'encoders': {
+			col: (encoder.classes_.tolist() if hasattr(encoder, 'classes_') else list(encoder))
+			for col, encoder in encoders.items()
+		},
+		'activations': activations
+	}
+	write_array_file(b'LCMW', header, arrays, output_path)
+	print(f"Pesos compartidos (mmap) guardados en: {output_path}")
+
+def export_shared_weights_from_saved_artifacts(model_dir):
+	"""
+	Exporta los pesos compartidos del modelo servido (MLP o estudiante destilado) sin reentrenar
+	"""
+	with open(os.path.join(model_dir, 'feature_metadata.json'), 'r') as f:
+		metadata = json.load(f)
+	model_family = metadata.get('model_family', 'mlp')
+	model_files = {'mlp': 'liver_cancer_model.keras', 'mlp_student': 'liver_cancer_student.keras'}
+	if model_family not in model_files:
+		print(f"⚠️ El modelo servido ({model_family}) no es un MLP, no se exportan pesos compartidos")
+		return False
+	
+	model = load_tensorflow().keras.models.load_model(os.path.join(model_dir, model_files[model_family]))
+	scaler = load_scaler(model_dir)
+	
+	export_shared_weights(
+		model, scaler, metadata['feature_names'], metadata['encoders'],
+		os.path.join(model_dir, 'liver_cancer_weights.bin'), model_family
+	)
+	return True
+
+def export_preprocessing(scaler, feature_names, encoders, output_path):
+	"""
+	Guarda los parámetros del StandardScaler (mean_, scale_) y las clases de
+	los encoders en JSON plano (saved_models/preprocessing.json). Reemplaza a
+	scaler.pkl: cargarlo no ejecuta código ni requiere sklearn
+	"""
+	params = {
+		'format': 1,
+		'feature_names': list(feature_names),
+		'scaler': {
+			'mean': np.asarray(scaler.mean_, dtype=np.float64).tolist(),
+			'scale': np.asarray(scaler.scale_, dtype=np.float64).tolist()
+		},
+		'encoders': {
+			col: (encoder.classes_.tolist() if hasattr(encoder, 'classes_') else list(encoder))
+			for col, encoder in encoders.items()
+		}
+	}
+	with open(output_path, 'w') as f:
+		json.dump(params, f, indent=2)
+	print(f"Scaler y encoders guardados en: {output_path}")
+
+def load_scaler(model_dir):
+	"""
+	StandardScaler ajustado a partir de preprocessing.json (o de scaler.pkl
+	en artefactos anteriores a ese formato)
+	"""
+	from sklearn.preprocessing import StandardScaler
+	
+	params_path = os.path.join(model_dir, 'preprocessing.json')
+	if not os.path.exists(params_path):
+		with open(os.path.join(model_dir, 'scaler.pkl'), 'rb') as f:
+			return pickle.load(f)
+	
+	with open(params_path, 'r') as f:
+		params = json.load(f)
+	scaler = StandardScaler()
+	scaler.mean_ = np.asarray(params['scaler']['mean'], dtype=np.float64)
+	scaler.scale_ = np.asarray(params['scaler']['scale'], dtype=np.float64)
+	scaler.var_ = scaler.scale_ ** 2
+	scaler.n_features_in_ = len(scaler.mean_)
+	scaler.feature_names_in_ = np.asarray(params['feature_names'], dtype=object)
+	return scaler
+
+def export_preprocessing_from_saved_artifacts(model_dir):
+	"""
+	Genera preprocessing.json para los artefactos ya guardados sin reentrenar
+	"""
+	with open(os.path.join(model_dir, 'feature_metadata.json'), 'r') as f:
+		metadata = json.load(f)
+	export_preprocessing(
+		load_scaler(model_dir), metadata['feature_names'], metadata['encoders'],
+		os.path.join(model_dir, 'preprocessing.json')
+	)
+
+def build_decision_policy(y_val, val_scores, target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Construye la política de decisión de tres bandas a partir de la curva ROC
+	de validación:
+	
+		- bajo: por debajo del umbral que alcanza la sensibilidad objetivo
+		- moderado: entre ambos umbrales (seguimiento prioritario)
+		- alto: a partir del umbral que alcanza la especificidad objetivo
+	
+	Args:
+		y_val: Etiquetas de validación
+		val_scores: Probabilidades del modelo servido sobre validación
+		target_sensitivity: Fracción de casos positivos que deben quedar fuera de 'bajo'
+		target_specificity: Fracción de casos negativos que deben quedar fuera de 'alto'
+	
+	Returns:
+		Diccionario de la política (se guarda como decision_policy.json)
+	"""
+	from sklearn.metrics import roc_curve
+	
+	y_val = np.asarray(y_val)
+	scores = np.asarray(val_scores, dtype=np.float64).ravel()
+	fpr, tpr, thresholds = roc_curve(y_val, scores)
+	thresholds = np.clip(thresholds, 0.0, 1.0)
+	
+	# roc_curve ordena los umbrales de mayor a menor (positivo si score >= umbral)
+	sensitivity_threshold = float(thresholds[np.argmax(tpr >= target_sensitivity)])
+	specificity_threshold = float(thresholds[np.flatnonzero(fpr <= 1 - target_specificity)[-1]])
+	specificity_threshold = max(specificity_threshold, sensitivity_threshold)
+	
+	def operating_point(threshold):
+		predicted = scores >= threshold
+		return {
+			'threshold': threshold,
+			'sensitivity': float(predicted[y_val == 1].mean()),
+			'specificity': float((~predicted[y_val == 0]).mean())
+		}
+	
+	return {
+		'version': 1,
+		'source': {
+			'method': 'validation_roc',
+			'target_sensitivity': target_sensitivity,
+			'target_specificity': target_specificity,
+			'validation_samples': int(len(y_val)),
+			'operating_points': [operating_point(sensitivity_threshold), operating_point(specificity_threshold)]
+		},
+		'thresholds': [sensitivity_threshold, specificity_threshold],
+		'bands': [
+			{
+				'risk_level': 'bajo',
+				'risk_message': 'Recomendación de seguimiento/chequeos.',
+				'action_required': 'preventive'
+			},
+			{
+				'risk_level': 'moderado',
+				'risk_message': 'Riesgo intermedio: programar evaluación clínica prioritaria.',
+				'action_required': 'priority'
+			},
+			{
+				'risk_level': 'alto',
+				'risk_message': 'Alerta: Cita clínica inmediata.',
+				'action_required': 'immediate'
+			}
+		]
+	}
+
+def save_decision_policy(policy, output_path):
+	"""
+	Guarda la política de decisión en JSON (editable sin tocar el código)
+	"""
+	with open(output_path, 'w', encoding='utf-8') as f:
+		json.dump(policy, f, indent=2, ensure_ascii=False)
+	thresholds = ', '.join(f"{t:.4f}" for t in policy['thresholds'])
+	print(f"Política de decisión (umbrales: {thresholds}) guardada en: {output_path}")
+
+def validation_split_indices(n_train, validation_split=0.2):
+	"""
+	Índice donde empieza la validación interna de fit(validation_split=...):
+	Keras toma el último `validation_split` de las filas de entrenamiento
+	"""
+	return int(n_train * (1 - validation_split))
+
+def export_decision_policy_from_saved_model(model_dir, data_path, target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Recalcula la política de decisión con el modelo servido (ONNX) sobre la
+	validación interna del entrenamiento, sin reentrenar
+	"""
+	import onnxruntime as ort
+	from sklearn.model_selection import train_test_split
+	
+	X, y, _, _ = load_and_preprocess_data(data_path)
+	X_train, _, y_train, _ = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+	start = validation_split_indices(len(X_train))
+	
+	session = ort.InferenceSession(os.path.join(model_dir, 'liver_cancer_model.onnx'), providers=['CPUExecutionProvider'])
+	val_scores = session.run(None, {'input': np.asarray(X_train[start:], dtype=np.float32)})[0]
+	
+	save_decision_policy(
+		build_decision_policy(y_train[start:], val_scores, target_sensitivity, target_specificity),
+		os.path.join(model_dir, 'decision_policy.json')
+	)
+
+def export_reference_profile_from_saved_data(model_dir, data_path):
+	"""
+	Recalcula el perfil de referencia para los artefactos guardados sin
+	reentrenar, reproduciendo la misma división train/test. Los scores salen
+	del modelo servido (ONNX): el PSI/KS de scores en producción se compara
+	contra el mismo modelo, sea el MLP, el estudiante u otra familia
+	"""
+	import onnxruntime as ort
+	from sklearn.model_selection import train_test_split
+	
+	X, y, feature_names, encoders = load_and_preprocess_data(data_path)
+	X_train, _, _, _ = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+	
+	session = ort.InferenceSession(os.path.join(model_dir, 'liver_cancer_model.onnx'), providers=['CPUExecutionProvider'])
+	train_scores = session.run(None, {'input': np.asarray(X_train, dtype=np.float32)})[0]
+	
+	profile = build_reference_profile(X_train, train_scores, feature_names, encoders)
+	save_reference_profile(profile, os.path.join(model_dir, 'reference_profile.bin'))
+
+def compare_model_families(model_dir, data_path, auc_tolerance=0.005, latency_metric='single_row_us',
+		target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Compara el MLP guardado con familias ligeras (regresión logística y
+	gradient boosting) sobre la misma división train/test, midiendo AUC y
+	latencia del artefacto ONNX de cada una, y deja el modelo elegido como
+	liver_cancer_model.onnx (la misma interfaz que carga el backend)
+	
+	Args:
+		model_dir: Carpeta saved_models con el MLP, el scaler y la metadata
+		data_path: CSV limpio de entrenamiento
+		auc_tolerance: Pérdida máxima de AUC aceptada frente al mejor modelo
+		latency_metric: 'single_row_us' o 'batch_us_per_row'
+		target_sensitivity: Sensibilidad objetivo de la política de decisión
+		target_specificity: Especificidad objetivo de la política de decisión
+	
+	Returns:
+		Nombre de la familia elegida
+	"""
+	import tempfile
+	from sklearn.model_selection import train_test_split
+	from model_families import FAMILIES, train_family, export_family_onnx, evaluate_onnx_model, select_model
+	
+	X, y, feature_names, encoders = load_and_preprocess_data(data_path)
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+	
+	mlp = load_tensorflow().keras.models.load_model(os.path.join(model_dir, 'liver_cancer_model.keras'))
+	scaler = load_scaler(model_dir)
+	
+	results = {}
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		paths = {'mlp': os.path.join(tmp_dir, 'mlp.onnx')}
+		export_onnx_model(mlp, scaler, feature_names, encoders, paths['mlp'])
+		
+		for family in FAMILIES:
+			print(f"Entrenando {family}...")
+			estimator = train_family(family, X_train, y_train, scaler, seed=seed)
+			paths[family] = export_family_onnx(
+				family, estimator, scaler, feature_names, encoders,
+				os.path.join(tmp_dir, f'{family}.onnx')
+			)
+		
+		for family, path in paths.items():
+			results[family] = evaluate_onnx_model(path, X_test, y_test)
+			results[family]['size_bytes'] = os.path.getsize(path)
+		
+		selected = select_model(results, auc_tolerance=auc_tolerance, latency_metric=latency_metric)
+		serve_onnx_artifact(model_dir, paths[selected], X_train, y_train, feature_names, encoders, {
+			'model_family': selected,
+			'model_performance': onnx_performance(results[selected]),
+			'model_comparison': {
+				'auc_tolerance': auc_tolerance,
+				'latency_metric': latency_metric,
+				'results': results
+			}
+		}, target_sensitivity, target_specificity)
+	
+	print("\n" + "="*60)
+	print("COMPARACIÓN DE FAMILIAS DE MODELOS")
+	print("="*60)
+	print(f"{'Modelo':<22}{'AUC':>8}{'1 fila (µs)':>14}{'Lote (µs/fila)':>17}{'Tamaño (KB)':>14}")
+	for family, r in results.items():
+		marker = ' ←' if family == selected else ''
+		print(f"{family:<22}{r['auc']:>8.4f}{r['single_row_us']:>14.1f}{r['batch_us_per_row']:>17.3f}{r['size_bytes'] / 1024:>14.1f}{marker}")
+	print(f"\nElegido: {selected} (más rápido por {latency_metric} con AUC a menos de {auc_tolerance} de la mejor)")
+	
+	return selected
+
+def onnx_performance(result):
+	"""
+	Métricas de test de un artefacto ONNX (evaluate_onnx_model) con las
+	mismas claves que model_performance del MLP
+	"""
+	return {
+		'test_loss': result['loss'],
+		'test_accuracy': result['accuracy'],
+		'test_auc': result['auc']
+	}
+
+def serve_onnx_artifact(model_dir, onnx_path, X_train, y_train, feature_names, encoders, metadata_updates,
+		target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Publica un artefacto ONNX como el modelo servido: lo copia a
+	liver_cancer_model.onnx, regenera el perfil de referencia y la política de
+	decisión con sus scores y registra la familia en feature_metadata.json (el backend la lee para
+	cargar el artefacto ONNX)
+	"""
+	import shutil
+	import onnxruntime as ort
+	
+	shutil.copyfile(onnx_path, os.path.join(model_dir, 'liver_cancer_model.onnx'))
+	
+	# El perfil de referencia (distribución de scores) debe corresponder al modelo servido
+	session = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+	train_scores = session.run(None, {'input': np.asarray(X_train, dtype=np.float32)})[0]
+	save_reference_profile(
+		build_reference_profile(X_train, train_scores, feature_names, encoders),
+		os.path.join(model_dir, 'reference_profile.bin')
+	)
+	
+	# Los umbrales de la política dependen de la escala de scores del modelo servido
+	start = validation_split_indices(len(X_train))
+	save_decision_policy(
+		build_decision_policy(y_train[start:], train_scores[start:], target_sensitivity, target_specificity),
+		os.path.join(model_dir, 'decision_policy.json')
+	)
+	
+	metadata_path = os.path.join(model_dir, 'feature_metadata.json')
+	with open(metadata_path, 'r') as f:
+		metadata = json.load(f)
+	# En metadata anterior a teacher_performance, model_performance es la del MLP
+	if 'model_performance' in metadata:
+		metadata.setdefault('teacher_performance', metadata['model_performance'])
+	metadata.update(metadata_updates)
+	with open(metadata_path, 'w') as f:
+		json.dump(metadata, f, indent=2)
+	print(f"Modelo servido ({metadata_updates['model_family']}) guardado en: {model_dir}/liver_cancer_model.onnx")
+
+def distill_saved_model(model_dir, data_path, hidden_sizes=(4, 8, 16), auc_tolerance=0.005, temperature=1.0,
+		target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Destila el MLP guardado en un estudiante diminuto y, si iguala la AUC de
+	test del profesor dentro de la tolerancia, lo publica como modelo servido.
+	Ambas AUC se miden igual, sobre el ONNX exportado (la AUC de Keras de
+	teacher_performance usa otro cálculo y no es comparable)
+	
+	Se prueban los tamaños de capa oculta de menor a mayor y se queda el
+	primero que alcanza la paridad de AUC
+	
+	Args:
+		model_dir: Carpeta saved_models con el MLP, el scaler y la metadata
+		data_path: CSV limpio de entrenamiento
+		hidden_sizes: Unidades ocultas candidatas del estudiante
+		auc_tolerance: Pérdida máxima de AUC aceptada frente al profesor
+		temperature: Temperatura de los targets suaves
+		target_sensitivity: Sensibilidad objetivo de la política de decisión
+		target_specificity: Especificidad objetivo de la política de decisión
+	
+	Returns:
+		Unidades ocultas del estudiante publicado, o None si ninguno alcanza la paridad
+	"""
+	import tempfile
+	from sklearn.model_selection import train_test_split
+	from distillation import distill_student
+	from model_families import evaluate_onnx_model
+	
+	X, y, feature_names, encoders = load_and_preprocess_data(data_path)
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+	
+	teacher = load_tensorflow().keras.models.load_model(os.path.join(model_dir, 'liver_cancer_model.keras'))
+	scaler = load_scaler(model_dir)
+	
+	X_train_scaled = scaler.transform(X_train)
+	
+	print("\n" + "="*60)
+	print("DESTILACIÓN DEL MODELO")
+	print("="*60)
+	
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		teacher_path = os.path.join(tmp_dir, 'teacher.onnx')
+		export_onnx_model(teacher, scaler, feature_names, encoders, teacher_path)
+		teacher_result = evaluate_onnx_model(teacher_path, X_test, y_test)
+		target_auc = teacher_result['auc']
+		print(f"Profesor: {teacher.count_params()} parámetros, "
+			f"{teacher_result['single_row_us']:.1f} µs/fila, {teacher_result['batch_us_per_row']:.3f} µs/fila en lote")
+		print(f"AUC objetivo (profesor): {target_auc:.4f} (tolerancia {auc_tolerance})")
+		
+		for hidden_units in hidden_sizes:
+			student = distill_student(teacher, X_train_scaled, hidden_units, temperature=temperature, seed=seed)
+			student_path = os.path.join(tmp_dir, f'student_{hidden_units}.onnx')
+			export_onnx_model(student, scaler, feature_names, encoders, student_path)
+			result = evaluate_onnx_model(student_path, X_test, y_test)
+			
+			parity = result['auc'] >= target_auc - auc_tolerance
+			print(f"Estudiante {hidden_units} unidades: {student.count_params()} parámetros, AUC {result['auc']:.4f}, "
+				f"{result['single_row_us']:.1f} µs/fila, {result['batch_us_per_row']:.3f} µs/fila en lote"
+				f" {'✓' if parity else '✗'}")
+			
+			if parity:
+				student.save(os.path.join(model_dir, 'liver_cancer_student.keras'))
+				export_shared_weights(
+					student, scaler, feature_names, encoders,
+					os.path.join(model_dir, 'liver_cancer_weights.bin'), 'mlp_student'
+				)
+				serve_onnx_artifact(model_dir, student_path, X_train, y_train, feature_names, encoders, {
+					'model_family': 'mlp_student',
+					'model_performance': onnx_performance(result),
+					'distillation': {
+						'hidden_units': hidden_units,
+						'temperature': temperature,
+						'target_auc': target_auc,
+						'auc_tolerance': auc_tolerance,
+						'teacher': {'parameters': teacher.count_params(), **teacher_result},
+						'student': {'parameters': student.count_params(), **result}
+					}
+				}, target_sensitivity, target_specificity)
+				return hidden_units
+	
+	print("⚠️ Ningún estudiante alcanzó la AUC del profesor, se mantiene el modelo actual")
+	return None
+
+# Artefactos que forman una versión del modelo servido
+VERSIONED_ARTIFACTS = [
+	'liver_cancer_model.keras', 'liver_cancer_student.keras', 'liver_cancer_model.onnx',
+	'liver_cancer_weights.bin', 'preprocessing.json', 'reference_profile.bin',
+	'decision_policy.json', 'feature_metadata.json'
+]
+
+def archive_model_version(model_dir, version):
+	"""
+	Copia los artefactos servidos a saved_models/versions/vNNN (para auditar
+	o volver atrás copiándolos de nuevo a saved_models)
+	"""
+	import shutil
+	
+	version_dir = os.path.join(model_dir, 'versions', f'v{version:03d}')
+	os.makedirs(version_dir, exist_ok=True)
+	for name in VERSIONED_ARTIFACTS:
+		path = os.path.join(model_dir, name)
+		if os.path.exists(path):
+			shutil.copy2(path, version_dir)
+	return version_dir
+
+def incremental_train_saved_model(model_dir, data_path, log_path, epochs=5, replay_ratio=2.0,
+		learning_rate=1e-4, auc_tolerance=0.005, target_sensitivity=0.95, target_specificity=0.95):
+	"""
+	Afina el MLP guardado con las predicciones registradas que recibieron
+	diagnóstico desde el último reentrenamiento y publica una nueva versión
+	si no empeora la AUC en el conjunto reservado
+	
+	El conjunto reservado es el test de siempre (misma división train/test)
+	más un 20% estratificado de las filas nuevas. El repaso se toma de la
+	parte de entrenamiento sin la validación interna (que se reserva para la
+	política de decisión) y de las filas etiquetadas de reentrenamientos
+	anteriores. El scaler y los encoders no cambian: el warm start requiere
+	la misma representación de entrada
+	
+	Args:
+		model_dir: Carpeta saved_models con el MLP, el scaler y la metadata
+		data_path: CSV limpio de entrenamiento
+		log_path: CSV de predicciones registradas (data/predictions_log.csv)
+		epochs: Épocas de ajuste fino
+		replay_ratio: Filas de repaso por cada fila nueva de entrenamiento
+		learning_rate: Tasa de aprendizaje del ajuste fino
+		auc_tolerance: Pérdida máxima de AUC aceptada frente al modelo actual
+		target_sensitivity: Sensibilidad objetivo de la política de decisión
+		target_specificity: Especificidad objetivo de la política de decisión
+	
+	Returns:
+		Número de la versión publicada, o None si no hubo datos nuevos o se rechazó
+	
+	Raises:
+		ValueError: Si el modelo servido no es el MLP ni su estudiante (p. ej.
+			lo eligió --compare-models): publicar el MLP ajustado lo reemplazaría
+	"""
+	import tempfile
+	import pandas as pd
+	from sklearn.metrics import roc_auc_score
+	from sklearn.model_selection import train_test_split
+	from incremental import load_labeled_predictions, split_new_rows, replay_sample, fine_tune
+	
+	metadata_path = os.path.join(model_dir, 'feature_metadata.json')
+	with open(metadata_path, 'r') as f:
+		metadata = json.load(f)
+	previous_family = metadata.get('model_family', 'mlp')
+	if previous_family not in ('mlp', 'mlp_student'):
+		raise ValueError(
+			f"El modelo servido es '{previous_family}' y el reentrenamiento incremental solo afina el MLP. "
+			"Use --compare-models para reentrenar esa familia o vuelva a entrenar el MLP"
+		)
+	
+	X, y, feature_names, encoders = load_and_preprocess_data(data_path)
+	X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+	
+	state = metadata.get('incremental', {})
+	current_version = metadata.get('model_version', 0)
+	
+	print("\n" + "="*60)
+	print("REENTRENAMIENTO INCREMENTAL")
+	print("="*60)
+	
+	X_log, y_log, timestamps = load_labeled_predictions(log_path, feature_names, encoders)
+	consumed_until = state.get('consumed_until')
+	is_new = (timestamps > pd.Timestamp(consumed_until)).to_numpy() if consumed_until else np.ones(len(y_log), dtype=bool)
+	if not is_new.any():
+		print(f"No hay predicciones etiquetadas nuevas en {log_path}, se mantiene la versión {current_version}")
+		return None
+	
+	X_new, y_new = X_log[is_new], y_log[is_new]
+	X_new_train, X_holdout, y_new_train, y_holdout = split_new_rows(X_new, y_new, seed=seed)
+	print(f"Filas etiquetadas nuevas: {len(y_new)} ({len(y_new_train)} entrenamiento, {len(y_holdout)} reservadas)")
+	
+	# Repaso: entrenamiento original (sin su validación interna) + etiquetadas ya usadas
+	val_start = validation_split_indices(len(X_train))
+	X_pool = pd.concat([X_train[:val_start], X_log[~is_new]])
+	y_pool = np.concatenate([np.asarray(y_train)[:val_start], y_log[~is_new]])
+	X_replay, y_replay = replay_sample(X_pool, y_pool, int(replay_ratio * len(y_new_train)), seed=seed + current_version)
+	
+	X_eval = pd.concat([X_test, X_holdout])
+	y_eval = np.concatenate([np.asarray(y_test), y_holdout])
+	
+	model = load_tensorflow().keras.models.load_model(os.path.join(model_dir, 'liver_cancer_model.keras'))
+	scaler = load_scaler(model_dir)
+	
+	X_eval_scaled = scaler.transform(X_eval)
+	baseline_auc = roc_auc_score(y_eval, model.predict(X_eval_scaled, verbose=0).ravel())
+	
+	X_fit = pd.concat([X_new_train, X_replay])
+	y_fit = np.concatenate([y_new_train, y_replay])
+	print(f"Ajuste fino: {len(y_fit)} filas ({len(y_replay)} de repaso), {epochs} épocas, lr={learning_rate}")
+	fine_tune(model, scaler.transform(X_fit), y_fit, epochs=epochs, learning_rate=learning_rate, seed=seed)
+	
+	tuned_auc = roc_auc_score(y_eval, model.predict(X_eval_scaled, verbose=0).ravel())
+	accepted = tuned_auc >= baseline_auc - auc_tolerance
+	print(f"AUC en el conjunto reservado ({len(y_eval)} filas): actual {baseline_auc:.4f} -> ajustado {tuned_auc:.4f} "
+		f"{'✓' if accepted else '✗'}")
+	if not accepted:
+		print(f"⚠️ El modelo ajustado pierde más de {auc_tolerance} de AUC, se mantiene la versión {current_version}")
+		return None
+	
+	# Conservar la versión actual antes de sobrescribir los artefactos servidos
+	if not os.path.isdir(os.path.join(model_dir, 'versions', f'v{current_version:03d}')):
+		archive_model_version(model_dir, current_version)
+	
+	version = current_version + 1
+	test_metrics = model.evaluate(scaler.transform(X_test), y_test, verbose=0)
+	performance = {
+		'test_loss': float(test_metrics[0]),
+		'test_accuracy': float(test_metrics[1]),
+		'test_auc': float(test_metrics[2])
+	}
+	
+	model.save(os.path.join(model_dir, 'liver_cancer_model.keras'))
+	export_shared_weights(
+		model, scaler, feature_names, encoders,
+		os.path.join(model_dir, 'liver_cancer_weights.bin')
+	)
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		onnx_path = os.path.join(tmp_dir, 'model.onnx')
+		export_onnx_model(model, scaler, feature_names, encoders, onnx_path)
+		serve_onnx_artifact(model_dir, onnx_path, X_train, y_train, feature_names, encoders, {
+			'model_family': 'mlp',
+			'model_version': version,
+			'model_performance': performance,
+			'teacher_performance': performance,
+			'incremental': {
+				'consumed_until': timestamps[is_new].max().isoformat(),
+				'labeled_rows': int(len(y_log)),
+				'new_rows': int(len(y_new)),
+				'replay_rows': int(len(y_replay)),
+				'epochs': epochs,
+				'learning_rate': learning_rate,
+				'holdout_rows': int(len(y_eval)),
+				'baseline_auc': float(baseline_auc),
+				'auc': float(tuned_auc),
+				'previous_version': current_version
+			}
+		}, target_sensitivity, target_specificity)
+	
+	# Si se servía el estudiante destilado, se vuelve a destilar del MLP ajustado
+	if previous_family == 'mlp_student':
+		distill_saved_model(
+			model_dir, data_path, auc_tolerance=auc_tolerance,
+			target_sensitivity=target_sensitivity, target_specificity=target_specificity
+		)
+	
+	version_dir = archive_model_version(model_dir, version)
+	print(f"✓ Versión {version} publicada (copia en {version_dir})")
+	return version
+
+def manifest_inputs(command, model_dir, data_path, log_path, skip_tuning=False):
+	"""
+	Archivos de entrada que determinan el resultado de un modo de train_model.py
+
+	Solo entra lo que el modo lee sin escribirlo: --distill-only reescribe el
+	estudiante, así que hashearlo cambiaría la huella en cada ejecución y
+	nunca se omitiría una repetición
+
+	Returns:
+		{nombre: ruta} para RunManifest
+	"""
+	inputs = {'data': data_path}
+	if command == 'train':
+		if skip_tuning:
+			inputs['hyperparameters'] = os.path.join(model_dir, 'best_hyperparameters.json')
+		return inputs
+
+	inputs['model'] = os.path.join(model_dir, 'liver_cancer_model.keras')
+	inputs['scaler'] = os.path.join(model_dir, 'preprocessing.json')
+	if not os.path.exists(inputs['scaler']):
+		inputs['scaler'] = os.path.join(model_dir, 'scaler.pkl')
+	if command == 'export':
+		inputs['student'] = os.path.join(model_dir, 'liver_cancer_student.keras')
+	elif command == 'export_policy':
+		inputs['served_model'] = os.path.join(model_dir, 'liver_cancer_model.onnx')
+	elif command == 'incremental':
+		inputs['predictions_log'] = log_path
+	return inputs
+
 def run_hyperparameter_search(X_train_scaled, y_train, input_dim, tuner_dir):
 	"""
 	Ejecuta la búsqueda de hiperparámetros usando Keras Tuner
@@ -251,6 +1192,10 @@ def run_hyperparameter_search(X_train_scaled, y_train, input_dim, tuner_dir):
 		best_hps: Mejores hiperparámetros encontrados
 		tuner: Objeto tuner
 	"""
+	import keras_tuner as kt
+	load_tensorflow()
+	from tensorflow.keras.callbacks import EarlyStopping
+	
 	print("\n" + "="*60)
 	print("INICIANDO BÚSQUEDA DE HIPERPARÁMETROS CON KERAS TUNER")
 	print("="*60)
@@ -318,13 +1263,58 @@ def run_hyperparameter_search(X_train_scaled, y_train, input_dim, tuner_dir):
 	
 	return best_hps, tuner
 
-def main(skip_tuning=False):
+def hyperparameters_to_dict(hps):
+	"""
+	Convierte un objeto HyperParameters de Keras Tuner al diccionario que se
+	guarda en best_hyperparameters.json
+	"""
+	hyperparameters = {
+		'units_layer_1': hps.get('units_layer_1'),
+		'activation_layer_1': hps.get('activation_layer_1'),
+		'dropout_1': hps.get('dropout_1'),
+		'num_layers': hps.get('num_layers'),
+		'learning_rate': hps.get('learning_rate')
+	}
+	
+	for i in range(hps.get('num_layers')):
+		hyperparameters[f'units_layer_{i+2}'] = hps.get(f'units_layer_{i+2}')
+		hyperparameters[f'activation_layer_{i+2}'] = hps.get(f'activation_layer_{i+2}')
+		hyperparameters[f'dropout_{i+2}'] = hps.get(f'dropout_{i+2}')
+	
+	return hyperparameters
+
+def print_cv_summary(summary):
+	"""
+	Muestra las métricas agregadas de la validación cruzada de un candidato
+	"""
+	for metric in ('auc', 'accuracy'):
+		m = summary[metric]
+		print(f"  • CV {metric.upper()}: {m['mean']:.4f} ± {m['std']:.4f} (IC 95%: {m['ci_low']:.4f} - {m['ci_high']:.4f})")
+
+def main(skip_tuning=False, cv_folds=0, cv_workers=None, cv_candidates=1, distill=False, distill_tolerance=0.005,
+		target_sensitivity=0.95, target_specificity=0.95, manifest=None):
 	"""
 	Función principal de entrenamiento con Keras Tuner
 	
 	Args:
 		skip_tuning: Si es True, carga hiperparámetros previos en lugar de ejecutar búsqueda
+		cv_folds: Si es > 1, evalúa con validación cruzada k-fold sobre el conjunto de entrenamiento
+		cv_workers: Procesos en paralelo para los folds (por defecto uno por bloque de núcleos)
+		cv_candidates: Mejores configuraciones del tuner a comparar por AUC media de CV
+		distill: Si es True, destila el modelo entrenado en un estudiante diminuto
+		distill_tolerance: Pérdida máxima de AUC aceptada para publicar el estudiante
+		target_sensitivity: Sensibilidad objetivo de la política de decisión
+		target_specificity: Especificidad objetivo de la política de decisión
+		manifest: RunManifest donde se registran los tiempos de cada fase
 	"""
+	load_tensorflow()
+	from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+	from sklearn.model_selection import train_test_split
+	from sklearn.preprocessing import StandardScaler
+	from cross_validation import cross_validate
+	
+	cv_summary = None
+	
 	# Configuración
 	DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'liver_cancer_data_clean.csv')
 	MODEL_DIR = os.path.join(os.path.dirname(__file__), '..', 'backend', 'saved_models')
@@ -351,6 +1341,8 @@ def main(skip_tuning=False):
 	print(f"Tamaño del conjunto de prueba: {X_test.shape}")
 	print(f"Distribución de clases (train): {np.bincount(y_train)}")
 	print(f"Distribución de clases (test): {np.bincount(y_test)}")
+	if manifest is not None:
+		manifest.mark('carga_datos')
 	
 	# 3. Escalado de características
 	print("\n" + "="*60)
@@ -360,6 +1352,8 @@ def main(skip_tuning=False):
 	X_train_scaled = scaler.fit_transform(X_train)
 	X_test_scaled = scaler.transform(X_test)
 	print("Escalado completado con StandardScaler")
+	if manifest is not None:
+		manifest.mark('escalado')
 	
 	# 4. Búsqueda de hiperparámetros con Keras Tuner (o cargar previos)
 	input_dim = X_train_scaled.shape[1]
@@ -403,18 +1397,25 @@ def main(skip_tuning=False):
 		best_hps, tuner = run_hyperparameter_search(X_train_scaled, y_train, input_dim, TUNER_DIR)
 		
 		# Guardar hiperparámetros para uso futuro
-		best_hyperparameters = {
-			'units_layer_1': best_hps.get('units_layer_1'),
-			'activation_layer_1': best_hps.get('activation_layer_1'),
-			'dropout_1': best_hps.get('dropout_1'),
-			'num_layers': best_hps.get('num_layers'),
-			'learning_rate': best_hps.get('learning_rate')
-		}
+		best_hyperparameters = hyperparameters_to_dict(best_hps)
 		
-		for i in range(best_hps.get('num_layers')):
-			best_hyperparameters[f'units_layer_{i+2}'] = best_hps.get(f'units_layer_{i+2}')
-			best_hyperparameters[f'activation_layer_{i+2}'] = best_hps.get(f'activation_layer_{i+2}')
-			best_hyperparameters[f'dropout_{i+2}'] = best_hps.get(f'dropout_{i+2}')
+		# Elegir entre las mejores configuraciones del tuner por AUC media de CV
+		# (más estable que el val_auc de una única partición)
+		if cv_folds > 1 and cv_candidates > 1:
+			candidate_hps = tuner.get_best_hyperparameters(num_trials=cv_candidates)
+			cv_results = cross_validate(
+				X_train, y_train, [hyperparameters_to_dict(hps) for hps in candidate_hps],
+				n_splits=cv_folds, n_workers=cv_workers, seed=seed
+			)
+			best_index = int(np.argmax([r['auc']['mean'] for r in cv_results]))
+			best_hps = candidate_hps[best_index]
+			best_hyperparameters = cv_results[best_index]['hyperparameters']
+			cv_summary = cv_results[best_index]
+			
+			print(f"\nCandidato elegido por CV: #{best_index + 1} de {len(cv_results)}")
+			for i, result in enumerate(cv_results):
+				print(f"Candidato #{i + 1}:")
+				print_cv_summary(result)
 		
 		# 5. Construir y entrenar el mejor modelo
 		print("\n" + "="*60)
@@ -424,6 +1425,22 @@ def main(skip_tuning=False):
 		# Construir modelo con mejores hiperparámetros
 		best_model = tuner.hypermodel.build(best_hps)
 	
+	if manifest is not None:
+		manifest.mark('hiperparametros')
+	
+	# Validación cruzada de la configuración final (si no se hizo al elegir candidato)
+	if cv_folds > 1 and cv_summary is None:
+		print("\n" + "="*60)
+		print(f"VALIDACIÓN CRUZADA ({cv_folds} FOLDS)")
+		print("="*60)
+		cv_summary = cross_validate(
+			X_train, y_train, [best_hyperparameters],
+			n_splits=cv_folds, n_workers=cv_workers, seed=seed
+		)[0]
+		print_cv_summary(cv_summary)
+	if manifest is not None and cv_summary is not None:
+		manifest.mark('validacion_cruzada')
+	
 	print("\nArquitectura del modelo:")
 	best_model.summary()
 	
@@ -454,6 +1471,8 @@ def main(skip_tuning=False):
 		callbacks=[early_stopping, model_checkpoint],
 		verbose=1
 	)
+	if manifest is not None:
+		manifest.mark('entrenamiento')
 	
 	# 6. Visualizar historial de entrenamiento
 	print("\n" + "="*60)
@@ -464,6 +1483,8 @@ def main(skip_tuning=False):
 	
 	# 7. Evaluar modelo
 	evaluate_model(best_model, X_test, y_test, scaler)
+	if manifest is not None:
+		manifest.mark('evaluacion')
 	
 	# 8. Guardar artefactos
 	print("\n" + "="*60)
@@ -474,10 +1495,37 @@ def main(skip_tuning=False):
 	best_model.save(os.path.join(MODEL_DIR, 'liver_cancer_model.keras'))
 	print(f"Modelo guardado en: {MODEL_DIR}/liver_cancer_model.keras")
 	
-	# Guardar scaler
-	with open(os.path.join(MODEL_DIR, 'scaler.pkl'), 'wb') as f:
-		pickle.dump(scaler, f)
-	print(f"Scaler guardado en: {MODEL_DIR}/scaler.pkl")
+	# Guardar scaler y encoders en JSON plano (el backend los carga sin sklearn ni pickle)
+	export_preprocessing(
+		scaler, feature_names, encoders,
+		os.path.join(MODEL_DIR, 'preprocessing.json')
+	)
+	
+	# Exportar modelo + scaler + encoders como un único grafo ONNX
+	export_onnx_model(
+		best_model, scaler, feature_names, encoders,
+		os.path.join(MODEL_DIR, 'liver_cancer_model.onnx')
+	)
+	
+	# Pesos + scaler + encoders en un archivo mapeable en memoria por todos los workers
+	export_shared_weights(
+		best_model, scaler, feature_names, encoders,
+		os.path.join(MODEL_DIR, 'liver_cancer_weights.bin')
+	)
+	
+	# Guardar perfil de referencia para el monitor de drift y la detección OOD
+	train_scores = best_model.predict(X_train_scaled, verbose=0)
+	save_reference_profile(
+		build_reference_profile(X_train, train_scores, feature_names, encoders),
+		os.path.join(MODEL_DIR, 'reference_profile.bin')
+	)
+	
+	# Política de decisión con umbrales ajustados sobre la ROC de validación
+	val_start = validation_split_indices(len(X_train))
+	save_decision_policy(
+		build_decision_policy(y_train[val_start:], train_scores[val_start:], target_sensitivity, target_specificity),
+		os.path.join(MODEL_DIR, 'decision_policy.json')
+	)
 	
 	# Guardar mejores hiperparámetros (solo si no fueron cargados de archivo)
 	if not (skip_tuning and os.path.exists(HYPERPARAMS_PATH)):
@@ -489,22 +1537,34 @@ def main(skip_tuning=False):
 	
 	# Guardar metadata completa
 	test_metrics = best_model.evaluate(X_test_scaled, y_test, verbose=0)
+	performance = {
+		'test_loss': float(test_metrics[0]),
+		'test_accuracy': float(test_metrics[1]),
+		'test_auc': float(test_metrics[2])
+	}
+	# model_performance: modelo servido; teacher_performance: el MLP entrenado
+	# (al destilar o elegir otra familia solo cambia la primera)
 	metadata = {
 		'feature_names': feature_names,
 		'encoders': {col: encoder.classes_.tolist() for col, encoder in encoders.items()},
-		'model_performance': {
-			'test_loss': float(test_metrics[0]),
-			'test_accuracy': float(test_metrics[1]),
-			'test_auc': float(test_metrics[2])
-		},
+		'model_performance': performance,
+		'teacher_performance': dict(performance),
 		'best_hyperparameters': best_hyperparameters,
 		'tuning_method': 'Hyperband',
 		'input_dim': input_dim
 	}
+	if cv_summary is not None:
+		metadata['cross_validation'] = {
+			'n_splits': cv_summary['n_splits'],
+			'auc': cv_summary['auc'],
+			'accuracy': cv_summary['accuracy']
+		}
 	
 	with open(os.path.join(MODEL_DIR, 'feature_metadata.json'), 'w') as f:
 		json.dump(metadata, f, indent=2)
 	print(f"Metadata completa guardada en: {MODEL_DIR}/feature_metadata.json")
+	if manifest is not None:
+		manifest.mark('guardado')
 	
 	print("\n" + "="*60)
 	print("¡ENTRENAMIENTO COMPLETADO EXITOSAMENTE!")
@@ -512,8 +1572,18 @@ def main(skip_tuning=False):
 	print("\nResumen de resultados:")
 	print(f"  • Test Accuracy: {metadata['model_performance']['test_accuracy']:.4f}")
 	print(f"  • Test AUC: {metadata['model_performance']['test_auc']:.4f}")
+	if cv_summary is not None:
+		print_cv_summary(cv_summary)
 	print(f"  • Arquitectura: {best_hyperparameters['num_layers']+1} capas ocultas")
 	print("="*60)
+	
+	if distill:
+		distill_saved_model(
+			MODEL_DIR, DATA_PATH, auc_tolerance=distill_tolerance,
+			target_sensitivity=target_sensitivity, target_specificity=target_specificity
+		)
+		if manifest is not None:
+			manifest.mark('destilacion')
 
 if __name__ == "__main__":
 	parser = argparse.ArgumentParser(description='Entrenar modelo de predicción de cáncer de hígado')
@@ -522,6 +1592,198 @@ if __name__ == "__main__":
 		action='store_true',
 		help='Saltar búsqueda de hiperparámetros y usar los guardados previamente'
 	)
+	parser.add_argument(
+		'--clean',
+		action='store_true',
+		help='Regenerar data/liver_cancer_data_clean.csv con el pipeline de limpieza antes de continuar'
+	)
+	parser.add_argument(
+		'--force',
+		action='store_true',
+		help='Ejecutar aunque los datos, el código y la configuración no hayan cambiado desde la última ejecución'
+	)
+	parser.add_argument(
+		'--export-onnx-only',
+		action='store_true',
+		help='Solo exportar a ONNX los artefactos ya guardados (sin entrenar)'
+	)
+	parser.add_argument(
+		'--export-weights-only',
+		action='store_true',
+		help='Solo exportar los pesos compartidos (mmap) del modelo servido (sin entrenar)'
+	)
+	parser.add_argument(
+		'--export-preprocessing-only',
+		action='store_true',
+		help='Solo generar preprocessing.json (scaler y encoders en JSON) desde los artefactos guardados'
+	)
+	parser.add_argument(
+		'--export-profile-only',
+		action='store_true',
+		help='Solo recalcular el perfil de referencia de drift con la división de entrenamiento (sin entrenar)'
+	)
+	parser.add_argument(
+		'--export-policy-only',
+		action='store_true',
+		help='Solo recalcular la política de decisión con el modelo servido (sin entrenar)'
+	)
+	parser.add_argument(
+		'--target-sensitivity',
+		type=float,
+		default=0.95,
+		help='Sensibilidad objetivo del umbral bajo/moderado (por defecto 0.95)'
+	)
+	parser.add_argument(
+		'--target-specificity',
+		type=float,
+		default=0.95,
+		help='Especificidad objetivo del umbral moderado/alto (por defecto 0.95)'
+	)
+	parser.add_argument(
+		'--compare-models',
+		action='store_true',
+		help='Comparar el MLP guardado con regresión logística y gradient boosting (AUC y latencia) y servir el elegido'
+	)
+	parser.add_argument(
+		'--auc-tolerance',
+		type=float,
+		default=0.005,
+		help='Pérdida máxima de AUC frente al mejor modelo al elegir el más rápido (por defecto 0.005)'
+	)
+	parser.add_argument(
+		'--latency-metric',
+		choices=['single_row_us', 'batch_us_per_row'],
+		default='single_row_us',
+		help='Latencia usada para elegir el modelo: una fila o por fila en lote'
+	)
+	parser.add_argument(
+		'--distill',
+		action='store_true',
+		help='Tras entrenar, destilar el MLP en un estudiante diminuto y servirlo si iguala la AUC'
+	)
+	parser.add_argument(
+		'--distill-only',
+		action='store_true',
+		help='Solo destilar el MLP ya guardado (sin entrenar)'
+	)
+	parser.add_argument(
+		'--distill-tolerance',
+		type=float,
+		default=0.005,
+		help='Pérdida máxima de AUC del estudiante frente al profesor (por defecto 0.005)'
+	)
+	parser.add_argument(
+		'--incremental',
+		action='store_true',
+		help='Afinar el modelo guardado con las predicciones etiquetadas de data/predictions_log.csv y publicar una nueva versión'
+	)
+	parser.add_argument(
+		'--incremental-epochs',
+		type=int,
+		default=5,
+		help='Épocas de ajuste fino del modo incremental (por defecto 5)'
+	)
+	parser.add_argument(
+		'--replay-ratio',
+		type=float,
+		default=2.0,
+		help='Filas de repaso de datos anteriores por cada fila nueva (por defecto 2)'
+	)
+	parser.add_argument(
+		'--cv',
+		type=int,
+		default=0,
+		metavar='K',
+		help='Validación cruzada estratificada con K folds entrenados en paralelo'
+	)
+	parser.add_argument(
+		'--cv-workers',
+		type=int,
+		default=None,
+		help='Procesos en paralelo para la validación cruzada (por defecto según los núcleos disponibles)'
+	)
+	parser.add_argument(
+		'--cv-candidates',
+		type=int,
+		default=1,
+		help='Comparar por CV las N mejores configuraciones del tuner y quedarse con la de mayor AUC media'
+	)
 	args = parser.parse_args()
 	
-	main(skip_tuning=args.skip_tuning)
+	model_dir = os.path.join(os.path.dirname(__file__), '..', 'backend', 'saved_models')
+	
+	data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'liver_cancer_data_clean.csv')
+	
+	log_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'predictions_log.csv')
+	
+	if args.clean:
+		from data_cleaning import clean_dataset
+		clean_dataset(output_path=data_path)
+	
+	# Modo de la ejecución y archivos de entrada que determinan su resultado
+	if args.incremental:
+		command = 'incremental'
+	elif args.compare_models:
+		command = 'compare_models'
+	elif args.distill_only:
+		command = 'distill'
+	elif args.export_policy_only:
+		command = 'export_policy'
+	elif args.export_onnx_only or args.export_profile_only or args.export_weights_only or args.export_preprocessing_only:
+		command = 'export'
+	else:
+		command = 'train'
+	
+	inputs = manifest_inputs(command, model_dir, data_path, log_path, args.skip_tuning)
+	
+	config = {key: value for key, value in vars(args).items() if key not in ('force', 'clean')}
+	manifest = RunManifest(command, config, inputs, seed)
+	if not args.force and manifest.is_up_to_date(model_dir):
+		print(f"Sin cambios en datos, código ni configuración desde la última ejecución ({command}) "
+			"y los artefactos están intactos: se omite. Use --force para repetirla")
+		raise SystemExit(0)
+	
+	if args.incremental:
+		incremental_train_saved_model(
+			model_dir, data_path, log_path,
+			epochs=args.incremental_epochs, replay_ratio=args.replay_ratio,
+			target_sensitivity=args.target_sensitivity, target_specificity=args.target_specificity
+		)
+	elif args.compare_models:
+		compare_model_families(
+			model_dir, data_path, args.auc_tolerance, args.latency_metric,
+			args.target_sensitivity, args.target_specificity
+		)
+	elif args.distill_only:
+		distill_saved_model(
+			model_dir, data_path, auc_tolerance=args.distill_tolerance,
+			target_sensitivity=args.target_sensitivity, target_specificity=args.target_specificity
+		)
+	elif args.export_policy_only:
+		export_decision_policy_from_saved_model(
+			model_dir, data_path, args.target_sensitivity, args.target_specificity
+		)
+	elif args.export_onnx_only or args.export_profile_only or args.export_weights_only or args.export_preprocessing_only:
+		if args.export_preprocessing_only:
+			export_preprocessing_from_saved_artifacts(model_dir)
+		if args.export_onnx_only:
+			export_onnx_from_saved_artifacts(model_dir)
+		if args.export_weights_only:
+			export_shared_weights_from_saved_artifacts(model_dir)
+		if args.export_profile_only:
+			export_reference_profile_from_saved_data(model_dir, data_path)
+	else:
+		main(
+			skip_tuning=args.skip_tuning,
+			cv_folds=args.cv,
+			cv_workers=args.cv_workers,
+			cv_candidates=args.cv_candidates,
+			distill=args.distill,
+			distill_tolerance=args.distill_tolerance,
+			target_sensitivity=args.target_sensitivity,
+			target_specificity=args.target_specificity,
+			manifest=manifest
+		)
+	if command != 'train':
+		manifest.mark(command)
+	manifest.save(model_dir)
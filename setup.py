@@ -88,7 +88,7 @@ def check_model_trained():
     
     model_files = [
         "backend/saved_models/liver_cancer_model.keras",
-        "backend/saved_models/scaler.pkl",
+        "backend/saved_models/preprocessing.json",
         "backend/saved_models/feature_metadata.json"
     ]
     
@@ -4,11 +4,22 @@ Prueba diferentes escenarios y casos de uso
 """
 
 import requests
+import csv
 import json
+import os
+import sys
+import tempfile
+import time
 from datetime import datetime
 
 # URL base de la API
 API_URL = "http://localhost:5000"
+# Servidor asíncrono (backend/async_app.py) opcional para las pruebas de paridad
+ASYNC_API_URL = os.environ.get("ASYNC_API_URL", "http://localhost:5001")
+
+# Los tests de módulos internos (drift, manifiestos, limpieza...) los importan directamente
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(BASE_DIR, 'backend'), os.path.join(BASE_DIR, 'model')]
 
 # Colores para output en terminal
 class Colors:
@@ -22,6 +33,15 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+# Paciente válido de referencia para los tests de los endpoints avanzados
+SAMPLE_PATIENT = {
+    "age": 55, "gender": "Male", "bmi": 28.5,
+    "alcohol_consumption": "Regular", "smoking_status": "Former",
+    "physical_activity_level": "Moderate", "liver_function_score": 65.5,
+    "alpha_fetoprotein_level": 15.3, "hepatitis_b": 0, "hepatitis_c": 0,
+    "cirrhosis_history": 1, "family_history_cancer": 1, "diabetes": 0
+}
+
 def print_test_header(test_name):
     """Imprime el encabezado de un test"""
     print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*60}{Colors.ENDC}")
@@ -290,6 +310,923 @@ def test_edge_cases():
         print_result(False, f"Error: {str(e)}")
         return False
 
+def test_batch_prediction():
+    """Test de predicción por lotes y formato compacto (MessagePack)"""
+    print_test_header("Predicción por Lotes")
+    
+    patients = [
+        {
+            "age": 35, "gender": "Female", "bmi": 22.5,
+            "alcohol_consumption": "Never", "smoking_status": "Never",
+            "physical_activity_level": "High", "liver_function_score": 85.0,
+            "alpha_fetoprotein_level": 5.0, "hepatitis_b": 0, "hepatitis_c": 0,
+            "cirrhosis_history": 0, "family_history_cancer": 0, "diabetes": 0
+        },
+        {
+            "age": 65, "gender": "Male", "bmi": 32.0,
+            "alcohol_consumption": "Regular", "smoking_status": "Current",
+            "physical_activity_level": "Low", "liver_function_score": 45.0,
+            "alpha_fetoprotein_level": 250.0, "hepatitis_b": 1, "hepatitis_c": 1,
+            "cirrhosis_history": 1, "family_history_cancer": 1, "diabetes": 1
+        }
+    ]
+    
+    try:
+        response = requests.post(
+            f"{API_URL}/predict/batch?include_input=false",
+            json={"patients": patients},
+            headers={'Content-Type': 'application/json'}
+        )
+        
+        data = response.json()
+        
+        print_result(response.status_code == 200, f"Status code: {response.status_code}")
+        print_result(data.get('count') == len(patients), f"Predicciones recibidas: {data.get('count')}")
+        print_result('input_data' not in data, "input_data omitido")
+        
+        success = response.status_code == 200 and data.get('count') == len(patients)
+        
+        try:
+            import msgpack
+            
+            packed = requests.post(
+                f"{API_URL}/predict?include_input=false",
+                data=msgpack.packb(patients[1]),
+                headers={'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack'}
+            )
+            unpacked = msgpack.unpackb(packed.content, raw=False)
+            
+            print_result(packed.headers.get('Content-Type') == 'application/msgpack', "Respuesta en MessagePack")
+            print_result(unpacked['prediction']['risk_level'] == 'alto', f"Riesgo alto (msgpack): {unpacked['prediction']['risk_percentage']}%")
+            print(f"\n{Colors.OKCYAN}Tamaño respuesta msgpack: {len(packed.content)} bytes{Colors.ENDC}")
+            
+            success = success and packed.status_code == 200
+        except ImportError:
+            print(f"{Colors.WARNING}msgpack no instalado, se omite la prueba del formato compacto{Colors.ENDC}")
+        
+        print(f"\n{Colors.OKCYAN}Response:{Colors.ENDC}")
+        print(json.dumps(data, indent=2))
+        
+        return success
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_batch_invalid_patient():
+    """Test de un lote con un paciente inválido: 400 que lo identifica y los demás se predicen por separado"""
+    print_test_header("Lote con Paciente Inválido")
+    
+    patients = [SAMPLE_PATIENT, {**SAMPLE_PATIENT, "age": -5}, {**SAMPLE_PATIENT, "bmi": 22.0}]
+    try:
+        response = requests.post(f"{API_URL}/predict/batch?include_input=false", json={"patients": patients})
+        data = response.json()
+        rejected = response.status_code == 400 and data.get('message', '').startswith('Paciente 1:')
+        print_result(rejected, f"Lote rechazado: status {response.status_code} - {data.get('message')}")
+        
+        # Lo que hace frontend/api-client.js ante el 400: reenviar cada paciente por separado
+        statuses = [requests.post(f"{API_URL}/predict", json=patient).status_code for patient in patients]
+        individual = statuses == [200, 400, 200]
+        print_result(individual, f"Reenvío individual: {statuses} (esperado [200, 400, 200])")
+        
+        return rejected and individual
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_malformed_payloads():
+    """Test de cuerpos que no se pueden decodificar: 400, nunca 500"""
+    print_test_header("Cuerpos Mal Formados")
+    
+    cases = [
+        ("MessagePack inválido", "/predict", b"\xc1", "application/msgpack"),
+        ("MessagePack truncado", "/predict/batch", b"\x92\x01", "application/msgpack"),
+        ("JSON inválido", "/predict", b'{"age": 55,', "application/json"),
+        ("JSON inválido (lote)", "/predict/batch", b"[{", "application/json"),
+        ("JSON no objeto", "/predict", b"42", "application/json"),
+        ("JSON inválido (what-if)", "/whatif", b"{", "application/json")
+    ]
+    
+    success = True
+    for label, path, body, content_type in cases:
+        try:
+            response = requests.post(f"{API_URL}{path}", data=body, headers={'Content-Type': content_type})
+            data = response.json()
+            ok = response.status_code == 400 and data.get('error') == 'Datos inválidos'
+            print_result(ok, f"{label}: status {response.status_code} - {data.get('message')}")
+            success = success and ok
+        except Exception as e:
+            print_result(False, f"{label}: Error: {str(e)}")
+            success = False
+    
+    return success
+
+def decode_response(response):
+    """Decodifica una respuesta en JSON o MessagePack según su Content-Type"""
+    if response.headers.get('Content-Type', '').startswith('application/msgpack'):
+        import msgpack
+        return msgpack.unpackb(response.content, raw=False)
+    return response.json()
+
+def test_async_parity():
+    """Test de paridad de la app asíncrona con la síncrona en la negociación de contenido"""
+    print_test_header("Paridad App Asíncrona")
+    
+    try:
+        requests.get(f"{ASYNC_API_URL}/health", timeout=2)
+    except requests.exceptions.ConnectionError:
+        print(f"{Colors.WARNING}App asíncrona no disponible en {ASYNC_API_URL} (ASYNC_API_URL), se omite{Colors.ENDC}")
+        return True
+    
+    body = json.dumps(SAMPLE_PATIENT).encode('utf-8')
+    cases = [
+        ("JSON con charset", body, {'Content-Type': 'application/json; charset=utf-8'}),
+        ("Tipo +json", body, {'Content-Type': 'application/vnd.api+json'}),
+        ("Accept prefiere JSON por q-value", body, {'Content-Type': 'application/json', 'Accept': 'application/json, application/msgpack;q=0.5'}),
+        ("MessagePack con q=0", body, {'Content-Type': 'application/json', 'Accept': 'application/msgpack;q=0, application/json'}),
+        ("Accept MessagePack", body, {'Content-Type': 'application/json', 'Accept': 'application/msgpack'}),
+        ("JSON mal formado", b'{"age": 55,', {'Content-Type': 'application/json'}),
+        ("Content-Type no soportado", body, {'Content-Type': 'text/plain'})
+    ]
+    
+    success = True
+    for label, data, headers in cases:
+        try:
+            responses = [
+                requests.post(f"{url}/predict?include_input=false", data=data, headers=headers)
+                for url in (API_URL, ASYNC_API_URL)
+            ]
+            statuses = [response.status_code for response in responses]
+            mimetypes = [response.headers.get('Content-Type', '').split(';')[0] for response in responses]
+            payloads = [decode_response(response) for response in responses]
+            same = statuses[0] == statuses[1] and mimetypes[0] == mimetypes[1]
+            if statuses[0] == 200:
+                same = same and payloads[0]['prediction'] == payloads[1]['prediction']
+            else:
+                same = same and payloads[0].get('error') == payloads[1].get('error')
+            print_result(same, f"{label}: {statuses[0]} {mimetypes[0]} / async {statuses[1]} {mimetypes[1]}")
+            success = success and same
+        except Exception as e:
+            print_result(False, f"{label}: Error: {str(e)}")
+            success = False
+    
+    return success
+
+def test_admission_control():
+    """Test del control de admisión: deadlines vencidos (503), cola llena (429) y contadores en /metrics"""
+    print_test_header("Control de Admisión")
+    
+    try:
+        import threading
+        from admission import AdmissionController, AdmissionRejected
+        
+        before = requests.get(f"{API_URL}/metrics").json().get('admission')
+        if before is None:
+            print(f"{Colors.WARNING}Control de admisión deshabilitado (ADMISSION_CONTROL=false), se omite{Colors.ENDC}")
+            return True
+        
+        # Un deadline de 1 µs vence antes de la inferencia en todos los endpoints y en ambas apps
+        success = True
+        targets = [("/predict", SAMPLE_PATIENT), ("/predict/batch", [SAMPLE_PATIENT]), ("/whatif", {"patient": SAMPLE_PATIENT, "sweep": {"age": [40, 60]}})]
+        for path, payload in targets:
+            response = requests.post(f"{API_URL}{path}", json=payload, headers={'X-Request-Timeout-Ms': '0.001'})
+            rejected = response.status_code == 503 and response.headers.get('Retry-After', '').isdigit()
+            print_result(rejected, f"{path} con deadline vencido: {response.status_code}, Retry-After {response.headers.get('Retry-After')}")
+            success = success and rejected
+        
+        response = requests.post(f"{API_URL}/predict", json=SAMPLE_PATIENT, headers={'X-Request-Timeout-Ms': '5000'})
+        on_time = response.status_code == 200
+        print_result(on_time, f"Deadline holgado atendido: {response.status_code}")
+        
+        after = requests.get(f"{API_URL}/metrics").json()['admission']
+        counted = after['expired'] - before['expired'] >= len(targets) and after['admitted'] > before['admitted']
+        print_result(counted, f"Contadores de /metrics: expirados {before['expired']} -> {after['expired']}, admitidos {after['admitted']}")
+        success = success and on_time and counted
+        
+        try:
+            response = requests.post(f"{ASYNC_API_URL}/predict", json=SAMPLE_PATIENT, headers={'X-Request-Timeout-Ms': '0.001'})
+            async_rejected = response.status_code == 503 and response.headers.get('Retry-After', '').isdigit()
+            print_result(async_rejected, f"App asíncrona con deadline vencido: {response.status_code}")
+            success = success and async_rejected
+        except requests.exceptions.ConnectionError:
+            print(f"{Colors.WARNING}App asíncrona no disponible en {ASYNC_API_URL} (ASYNC_API_URL), se omite su deadline{Colors.ENDC}")
+        
+        # Sin control de admisión (ADMISSION_CONTROL=false) el deadline se comprueba
+        # en cada endpoint antes del cálculo caro (oclusión, grilla, inferencia)
+        import app as sync_app
+        if sync_app.model is None:
+            # Los artefactos se cargan con rutas relativas a backend/, como al arrancar el servidor
+            cwd = os.getcwd()
+            os.chdir(os.path.join(BASE_DIR, 'backend'))
+            try:
+                sync_app.load_model_artifacts()
+            finally:
+                os.chdir(cwd)
+        saved_admission, sync_app.admission = sync_app.admission, None
+        try:
+            client = sync_app.app.test_client()
+            targets.append(("/explain", SAMPLE_PATIENT))
+            for path, payload in targets:
+                response = client.post(path, json=payload, headers={'X-Request-Timeout-Ms': '0.001'})
+                rejected = response.status_code == 503
+                print_result(rejected, f"{path} sin control de admisión y deadline vencido: {response.status_code}")
+                success = success and rejected
+        finally:
+            sync_app.admission = saved_admission
+        
+        # Controlador aislado: 1 plaza, cola de 1, 200 ms de espera máxima
+        controller = AdmissionController(1, 1, 0.2)
+        held = controller.acquire()
+        outcomes = []
+        
+        def queued():
+            try:
+                controller.release(controller.acquire())
+                outcomes.append('admitted')
+            except AdmissionRejected as e:
+                outcomes.append(e.status)
+        
+        waiter = threading.Thread(target=queued)
+        waiter.start()
+        while controller.snapshot()['queue_depth'] < 1:
+            time.sleep(0.001)
+        try:
+            controller.acquire()
+            shed_status = None
+        except AdmissionRejected as e:
+            shed_status = e.status
+        waiter.join()
+        
+        try:
+            controller.acquire(time.monotonic() + 0.05)
+            expired_status = None
+        except AdmissionRejected as e:
+            expired_status = e.status
+        controller.release(held)
+        controller.release(controller.acquire())
+        
+        snapshot = controller.snapshot()
+        controller_ok = (
+            shed_status == 429 and outcomes == [503] and expired_status == 503
+            and snapshot['shed_queue_full'] == 1 and snapshot['shed_timeout'] == 1 and snapshot['expired'] == 1
+            and snapshot['admitted'] == 2 and snapshot['active'] == 0 and snapshot['queue_depth'] == 0
+        )
+        print_result(controller_ok, f"Cola llena {shed_status}, espera agotada {outcomes}, deadline en cola {expired_status}: {snapshot}")
+        
+        return success and controller_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_explain():
+    """Test de /explain: contribuciones por feature, top_features y negociación MessagePack"""
+    print_test_header("Explicación")
+    
+    try:
+        features = requests.get(f"{API_URL}/features").json()['features']
+        response = requests.post(f"{API_URL}/explain", json=SAMPLE_PATIENT)
+        data = response.json()
+        explanation = data.get('explanation', {})
+        contributions = explanation.get('contributions', {})
+        top = explanation.get('top_features', [])
+        
+        print_result(response.status_code == 200, f"Status code: {response.status_code}")
+        keys_ok = sorted(contributions) == sorted(features)
+        print_result(keys_ok, "Una contribución por feature")
+        top_ok = 0 < len(top) <= 5 and all(contributions[f] != 0 for f in top)
+        print_result(top_ok, f"top_features sin contribuciones nulas: {top}")
+        # Las binarias/categóricas en su clase más frecuente (hepatitis_b=0, gender=Male)
+        # son su propia línea base: contribución exactamente 0
+        baseline_ok = contributions.get('hepatitis_b') == 0 and contributions.get('gender') == 0
+        print_result(baseline_ok, f"Línea base en la clase más frecuente: hepatitis_b {contributions.get('hepatitis_b')}, gender {contributions.get('gender')}")
+        
+        batch = requests.post(f"{API_URL}/explain", json={"patients": [SAMPLE_PATIENT, {**SAMPLE_PATIENT, "age": 30}]})
+        batch_ok = batch.status_code == 200 and len(batch.json().get('results', [])) == 2
+        print_result(batch_ok, f"Lote de 2: status {batch.status_code}")
+        
+        invalid = requests.post(f"{API_URL}/explain", json={**SAMPLE_PATIENT, "age": -5})
+        print_result(invalid.status_code == 400, f"Paciente inválido: status {invalid.status_code}")
+        
+        success = response.status_code == 200 and keys_ok and top_ok and baseline_ok and batch_ok and invalid.status_code == 400
+        
+        try:
+            import msgpack
+            packed = requests.post(
+                f"{API_URL}/explain",
+                data=msgpack.packb(SAMPLE_PATIENT),
+                headers={'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack'}
+            )
+            msgpack_ok = (packed.status_code == 200
+                and packed.headers.get('Content-Type') == 'application/msgpack'
+                and decode_response(packed)['explanation']['top_features'] == top)
+            print_result(msgpack_ok, "Respuesta en MessagePack equivalente")
+            success = success and msgpack_ok
+        except ImportError:
+            print(f"{Colors.WARNING}msgpack no instalado, se omite la prueba del formato compacto{Colors.ENDC}")
+        
+        return success
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_whatif():
+    """Test del barrido what-if y de sus límites de tamaño"""
+    print_test_header("What-If")
+    
+    try:
+        response = requests.post(
+            f"{API_URL}/whatif",
+            json={"patient": SAMPLE_PATIENT, "sweep": {"bmi": {"min": 20, "max": 40, "steps": 5}, "gender": None}}
+        )
+        data = response.json()
+        
+        curve = data.get('risk_percentage', [])
+        shape_ok = len(curve) == 5 and all(len(row) == len(data['values']['gender']) for row in curve)
+        print_result(response.status_code == 200, f"Status code: {response.status_code}")
+        print_result(data.get('features') == ['bmi', 'gender'], f"Features barridas: {data.get('features')}")
+        print_result(shape_ok, "Grilla de 5 x clases de gender")
+        
+        success = response.status_code == 200 and shape_ok
+        
+        # Barridos desmesurados o no finitos se rechazan con 400 antes de reservar memoria
+        oversized = [
+            ("steps enorme", {"bmi": {"steps": 1e9}}),
+            ("lista enorme", {"age": list(range(100)) * 200}),
+            ("steps no numérico", {"bmi": {"steps": "muchos"}}),
+            ("feature desconocida", {"altura": None}),
+            ("sweep inválido", "bmi"),
+            ("null en la lista", {"age": [None, 40]}),
+            ("texto en la lista", {"age": ["cuarenta", 40]}),
+            ("rango que desborda", {"age": {"min": -1e308, "max": 1e308, "steps": 3}}),
+            ("rango fuera de límites", {"bmi": {"min": 20, "max": 400, "steps": 3}})
+        ]
+        for label, sweep in oversized:
+            rejected = requests.post(f"{API_URL}/whatif", json={"patient": SAMPLE_PATIENT, "sweep": sweep})
+            print_result(rejected.status_code == 400, f"{label}: status {rejected.status_code} (esperado 400)")
+            success = success and rejected.status_code == 400
+        
+        return success
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_drift():
+    """Test del monitor de drift: estructura del reporte y registro de predicciones"""
+    print_test_header("Drift")
+    
+    try:
+        before = requests.get(f"{API_URL}/drift")
+        if before.status_code == 503:
+            print(f"{Colors.WARNING}Monitor de drift deshabilitado (DRIFT_MONITOR=false), se omite{Colors.ENDC}")
+            return True
+        report = before.json()['drift']
+        
+        features = requests.get(f"{API_URL}/features").json()['features']
+        print_result(before.status_code == 200, f"Status code: {before.status_code}")
+        print_result(set(report['features']) == set(features), "PSI/KS para cada feature")
+        print_result('psi' in report['score'] and 'ks' in report['score'], "Drift del score del modelo servido")
+        
+        # Las predicciones se procesan en segundo plano: esperar a verlas en la ventana
+        requests.post(f"{API_URL}/predict/batch?include_input=false", json={"patients": [SAMPLE_PATIENT] * 20})
+        after = report
+        for _ in range(20):
+            after = requests.get(f"{API_URL}/drift").json()['drift']
+            if after['total_seen'] >= report['total_seen'] + 20:
+                break
+            time.sleep(0.1)
+        
+        seen = after['total_seen'] - report['total_seen']
+        print_result(seen >= 20, f"Predicciones registradas en la ventana: {seen}")
+        print_result(after['score']['psi'] is not None, f"PSI del score: {after['score']['psi']}")
+        
+        return before.status_code == 200 and seen >= 20 and after['score']['psi'] is not None
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def sample_reference(profile, n, seed=0):
+    """Muestra codificada (y sus scores) con la distribución del perfil de referencia"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    X = np.empty((n, len(profile['feature_names'])))
+    for k, j in enumerate(profile['numeric_idx']):
+        X[:, j] = np.interp(rng.random(n), profile['numeric_quantile_probs'], profile['numeric_quantiles'][k])
+    for k, j in enumerate(profile['categorical_idx']):
+        size = int(profile['categorical_sizes'][k])
+        proportions = profile['categorical_proportions'][k, :size]
+        X[:, j] = rng.choice(size, n, p=proportions / proportions.sum())
+    scores = np.interp(rng.random(n), profile['numeric_quantile_probs'], profile['score_quantiles'])
+    return X, scores
+
+def test_drift_monitor():
+    """Test del monitor de drift: sin drift con datos de referencia, drift en la feature desplazada"""
+    print_test_header("Monitor de Drift")
+    
+    try:
+        from drift_monitor import DriftMonitor
+        from reference_profile import load_reference_profile
+        
+        profile = load_reference_profile(os.path.join(BASE_DIR, 'backend', 'saved_models', 'reference_profile.bin'))
+        monitor = DriftMonitor(profile, window_size=2000, num_buckets=4).start()
+        X, scores = sample_reference(profile, 2000)
+        
+        monitor.submit(X, scores)
+        monitor.pending.join()
+        stable = monitor.snapshot()
+        stable_ok = stable['drifted_features'] == [] and stable['max_psi'] < 0.1
+        print_result(stable_ok, f"Datos de referencia: max PSI {stable['max_psi']:.4f}, sin features con drift")
+        
+        # age + 30 años reemplaza toda la ventana (2000 filas = capacidad)
+        shifted = X.copy()
+        shifted[:, profile['feature_names'].index('age')] += 30
+        monitor.submit(shifted, scores)
+        monitor.pending.join()
+        drifted = monitor.snapshot()
+        drift_ok = drifted['drifted_features'] == ['age'] and drifted['score']['status'] == 'stable'
+        print_result(drift_ok, f"age desplazada: drift en {drifted['drifted_features']}, PSI {drifted['features']['age']['psi']:.2f}")
+        window_ok = drifted['window_rows'] == 2000 and drifted['total_seen'] == 4000
+        print_result(window_ok, f"Ventana acotada: {drifted['window_rows']} de {drifted['total_seen']} filas vistas")
+        
+        # Sin hilo consumidor, la cola se llena y las muestras se descartan sin bloquear
+        saturated = DriftMonitor(profile, max_pending=1)
+        saturated.submit(X[:1], scores[:1])
+        saturated.submit(X[:1], scores[:1])
+        dropped_ok = saturated.dropped == 1
+        print_result(dropped_ok, f"Cola llena: {saturated.dropped} muestra descartada")
+        
+        return stable_ok and drift_ok and window_ok and dropped_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_ood():
+    """Test de la detección fuera de distribución en /predict, /predict/batch y sobre datos de referencia"""
+    print_test_header("Detección OOD")
+    
+    extreme = {**SAMPLE_PATIENT, "age": 119, "bmi": 59, "alpha_fetoprotein_level": 999}
+    try:
+        typical = requests.post(f"{API_URL}/predict?include_input=false", json=SAMPLE_PATIENT).json()['prediction']
+        if 'ood' not in typical:
+            print(f"{Colors.WARNING}Detección OOD deshabilitada (OOD_CHECK=false), se omite{Colors.ENDC}")
+            return True
+        typical_ok = typical['ood']['is_ood'] is False and typical['ood']['out_of_range'] == []
+        print_result(typical_ok, f"Paciente típico: percentil {typical['ood']['distance_percentile']}")
+        
+        # Valores válidos para la API pero fuera del rango visto en entrenamiento
+        flagged = requests.post(f"{API_URL}/predict?include_input=false", json=extreme).json()['prediction']['ood']
+        extreme_ok = flagged['is_ood'] is True and {'age', 'bmi', 'alpha_fetoprotein_level'} <= set(flagged['out_of_range'])
+        print_result(extreme_ok, f"Paciente extremo: fuera de rango {flagged['out_of_range']}, Mahalanobis {flagged['mahalanobis']}")
+        
+        batch = requests.post(f"{API_URL}/predict/batch?include_input=false", json={"patients": [SAMPLE_PATIENT, extreme]}).json()
+        batch_flags = [prediction['ood']['is_ood'] for prediction in batch['predictions']]
+        batch_ok = batch_flags == [False, True]
+        print_result(batch_ok, f"Lote: is_ood por paciente {batch_flags}")
+        
+        # Con datos de la distribución de entrenamiento solo se marca ~1% (umbral percentil 99)
+        from ood_detector import OODDetector
+        from reference_profile import load_reference_profile
+        profile = load_reference_profile(os.path.join(BASE_DIR, 'backend', 'saved_models', 'reference_profile.bin'))
+        X, _ = sample_reference(profile, 5000)
+        checks = OODDetector(profile, threshold=0.99).check(X)
+        rate = sum(check['is_ood'] for check in checks) / len(checks)
+        rate_ok = rate <= 0.03
+        print_result(rate_ok, f"Muestra de referencia: {rate:.2%} marcada como OOD")
+        
+        return typical_ok and extreme_ok and batch_ok and rate_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_policy():
+    """Test de la política de decisión y de su aplicación en /predict"""
+    print_test_header("Política de Decisión")
+    
+    try:
+        response = requests.get(f"{API_URL}/policy")
+        policy = response.json()['policy']
+        thresholds = policy['thresholds']
+        
+        print_result(response.status_code == 200, f"Status code: {response.status_code}")
+        print_result(thresholds == sorted(thresholds) and all(0 <= t <= 1 for t in thresholds), f"Umbrales ordenados: {thresholds}")
+        print_result(len(policy['bands']) == len(thresholds) + 1, f"Bandas: {[band['risk_level'] for band in policy['bands']]}")
+        print_result('target_sensitivity' in policy.get('source', {}), f"Origen: {policy.get('source', {}).get('method')}")
+        
+        success = response.status_code == 200 and len(policy['bands']) == len(thresholds) + 1
+        
+        # Cada predicción cae en la banda que indican los umbrales (p >= umbral sube de banda)
+        patients = [
+            {**SAMPLE_PATIENT, "alpha_fetoprotein_level": 1.0, "cirrhosis_history": 0, "family_history_cancer": 0},
+            {**SAMPLE_PATIENT, "alpha_fetoprotein_level": 1.0, "family_history_cancer": 0},
+            SAMPLE_PATIENT
+        ]
+        batch = requests.post(f"{API_URL}/predict/batch?include_input=false", json={"patients": patients}).json()
+        for prediction in batch['predictions']:
+            expected = policy['bands'][sum(prediction['risk_probability'] >= t for t in thresholds)]
+            matches = prediction['risk_level'] == expected['risk_level'] and prediction['risk_message'] == expected['risk_message']
+            print_result(matches, f"p={prediction['risk_probability']:.3f} -> {prediction['risk_level']}")
+            success = success and matches
+        
+        # Sin decision_policy.json se aplica la regla original: round(p * 100, 2) <= 50 es bajo
+        from decision_policy import DEFAULT_POLICY, DecisionPolicy
+        default = DecisionPolicy(DEFAULT_POLICY)
+        probabilities = [0.3, 0.5, 0.50004, 0.50005, 0.5001, 0.9]
+        levels = [default.band(index)['risk_level'] for index in default.classify(probabilities)]
+        original = ['bajo' if round(p * 100, 2) <= 50 else 'alto' for p in probabilities]
+        default_ok = levels == original
+        print_result(default_ok, f"Política por defecto igual a la regla original: {dict(zip(probabilities, levels))}")
+        
+        return success and default_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_predictions_log():
+    """Test del CSV de predicciones guardadas: cabecera fija con liver_cancer vacía para etiquetar"""
+    print_test_header("CSV de Predicciones")
+    
+    log_path = os.path.join(BASE_DIR, 'data', 'predictions_log.csv')
+    original = None
+    if os.path.exists(log_path):
+        with open(log_path, 'rb') as f:
+            original = f.read()
+        os.remove(log_path)
+    
+    try:
+        features = requests.get(f"{API_URL}/features").json()['features']
+        # Un campo adicional no debe alterar las columnas del archivo
+        single = requests.post(f"{API_URL}/predict?save=true", json={**SAMPLE_PATIENT, "notas": "x"})
+        batch = requests.post(f"{API_URL}/predict/batch?save=true&include_input=false", json={"patients": [SAMPLE_PATIENT, SAMPLE_PATIENT]})
+        saved = single.status_code == 200 and batch.status_code == 200
+        print_result(saved, f"Predicciones guardadas: {single.status_code}, {batch.status_code}")
+        
+        with open(log_path, newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        expected = features + ['liver_cancer', 'timestamp']
+        header_ok = rows[0] == expected
+        print_result(header_ok, f"Cabecera fija: {rows[0]}")
+        rows_ok = len(rows) == 4 and all(len(row) == len(expected) and row[-2] == '' for row in rows[1:])
+        print_result(rows_ok, f"{len(rows) - 1} filas alineadas con liver_cancer vacía")
+        
+        return saved and header_ok and rows_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+    finally:
+        if original is not None:
+            with open(log_path, 'wb') as f:
+                f.write(original)
+        elif os.path.exists(log_path):
+            os.remove(log_path)
+
+def parse_server_timing(header):
+    """Etapas de una cabecera Server-Timing como {etapa: ms}"""
+    stages = {}
+    for entry in header.split(','):
+        name, _, duration = entry.strip().partition(';dur=')
+        stages[name] = float(duration)
+    return stages
+
+def test_tracing_and_profiler():
+    """Test de Server-Timing por solicitud (sync y async) y del profiler por muestreo de /admin"""
+    print_test_header("Trazas y Profiler")
+    
+    try:
+        untraced = requests.post(f"{API_URL}/predict?include_input=false", json=SAMPLE_PATIENT)
+        untraced_ok = 'Server-Timing' not in untraced.headers
+        print_result(untraced_ok, "Sin X-Request-Trace no se mide")
+        
+        traced = requests.post(f"{API_URL}/predict?include_input=false", json=SAMPLE_PATIENT, headers={'X-Request-Trace': '1'})
+        stages = parse_server_timing(traced.headers.get('Server-Timing', ''))
+        total = stages.pop('total', None)
+        trace_ok = (traced.status_code == 200 and {'parse', 'preprocess', 'infer', 'serialize'} <= set(stages)
+            and total is not None and sum(stages.values()) <= total + 0.01)
+        print_result(trace_ok, f"Server-Timing: {sorted(stages)} (total {total} ms)")
+        
+        batch_traced = requests.post(f"{API_URL}/predict/batch?include_input=false", json=[SAMPLE_PATIENT] * 50, headers={'X-Request-Trace': '1'})
+        batch_stages = parse_server_timing(batch_traced.headers.get('Server-Timing', ''))
+        batch_total = batch_stages.pop('total', None)
+        batch_ok = (batch_traced.status_code == 200 and {'parse', 'validate', 'preprocess', 'infer', 'postprocess', 'serialize'} <= set(batch_stages)
+            and batch_total is not None and sum(batch_stages.values()) <= batch_total + 0.01)
+        print_result(batch_ok, f"Server-Timing del lote: {sorted(batch_stages)} (total {batch_total} ms)")
+        success = untraced_ok and trace_ok and batch_ok
+        
+        try:
+            async_traced = requests.post(f"{ASYNC_API_URL}/predict?include_input=false", json=SAMPLE_PATIENT, headers={'X-Request-Trace': '1'})
+            async_stages = parse_server_timing(async_traced.headers.get('Server-Timing', ''))
+            async_ok = {'dispatch', 'infer', 'total'} <= set(async_stages)
+            print_result(async_ok, f"Server-Timing async: {sorted(async_stages)}")
+            success = success and async_ok
+        except requests.exceptions.ConnectionError:
+            print(f"{Colors.WARNING}App asíncrona no disponible en {ASYNC_API_URL}, se omite su traza{Colors.ENDC}")
+        
+        # Sin ADMIN_TOKEN en el servidor los endpoints /admin están cerrados
+        token = os.environ.get('ADMIN_TOKEN')
+        if not token:
+            closed = requests.post(f"{API_URL}/admin/profiler/start")
+            print_result(closed.status_code == 403, f"/admin sin ADMIN_TOKEN: status {closed.status_code}")
+            print(f"{Colors.WARNING}Defina ADMIN_TOKEN (igual al del servidor) para probar el profiler{Colors.ENDC}")
+            return success and closed.status_code == 403
+        
+        headers = {'X-Admin-Token': token}
+        wrong = requests.post(f"{API_URL}/admin/profiler/start", headers={'X-Admin-Token': token + 'x'})
+        print_result(wrong.status_code == 401, f"Token inválido: status {wrong.status_code}")
+        started = requests.post(f"{API_URL}/admin/profiler/start", headers=headers, json={"interval_ms": 1, "duration_s": 30})
+        again = requests.post(f"{API_URL}/admin/profiler/start", headers=headers)
+        print_result(started.status_code == 200 and again.status_code == 409, f"Inicio: {started.status_code}, segundo inicio: {again.status_code}")
+        for _ in range(20):
+            requests.post(f"{API_URL}/predict/batch?include_input=false", json={"patients": [SAMPLE_PATIENT] * 50})
+        summary = requests.post(f"{API_URL}/admin/profiler/stop", headers=headers).json()['profiler']
+        folded = requests.get(f"{API_URL}/admin/profiler/profile", headers=headers).text
+        lines = folded.splitlines()
+        profile_ok = (summary['samples'] > 0 and not summary['running'] and lines
+            and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+            and any('predict_batch (app.py' in line for line in lines))
+        print_result(profile_ok, f"{summary['samples']} muestras, {len(lines)} pilas; predict_batch aparece en el perfil")
+        
+        return success and wrong.status_code == 401 and started.status_code == 200 and again.status_code == 409 and profile_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_logging_metrics():
+    """Test del logging por cola: activo en el servidor y sin efectos al importar app.py"""
+    print_test_header("Logging en /metrics")
+    
+    try:
+        import subprocess
+        
+        requests.get(f"{API_URL}/health")
+        response = requests.get(f"{API_URL}/metrics")
+        logging_metrics = response.json().get('logging')
+        
+        active = response.status_code == 200 and logging_metrics is not None
+        print_result(active, f"Cola de logs activa: {logging_metrics}")
+        counters_ok = active and isinstance(logging_metrics['dropped'], int) and logging_metrics['queue_depth'] >= 0
+        print_result(counters_ok, "Contadores de la cola de logs válidos")
+        
+        # Importar app (benchmarks, tests, app asíncrona) no toca el logger raíz
+        check = subprocess.run(
+            [sys.executable, '-c', "import logging; before = list(logging.getLogger().handlers); import app; "
+                "raise SystemExit(0 if logging.getLogger().handlers == before and app.log_handler is None else 1)"],
+            cwd=os.path.join(BASE_DIR, 'backend'), capture_output=True, text=True
+        )
+        import_clean = check.returncode == 0
+        print_result(import_clean, "import app conserva los handlers del logger raíz")
+        
+        return active and counters_ok and import_clean
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_cross_validation():
+    """Test de la validación cruzada k-fold: resumen por fold e intervalo de confianza"""
+    print_test_header("Validación Cruzada")
+    
+    try:
+        import numpy as np
+        from cross_validation import cross_validate, summarize_folds
+        
+        # Resumen: media, desviación muestral e IC t de Student (t(0.975, 4) = 2.776)
+        summary = summarize_folds([0.90, 0.92, 0.94, 0.96, 0.98])
+        half_width = 2.776 * summary['std'] / np.sqrt(5)
+        summary_ok = (abs(summary['mean'] - 0.94) < 1e-9
+            and abs(summary['std'] - np.std([0.90, 0.92, 0.94, 0.96, 0.98], ddof=1)) < 1e-9
+            and abs(summary['ci_high'] - summary['mean'] - half_width) < 1e-3)
+        print_result(summary_ok, f"IC 95%: [{summary['ci_low']:.4f}, {summary['ci_high']:.4f}]")
+        single_ok = summarize_folds([0.9])['ci_low'] == summarize_folds([0.9])['ci_high'] == 0.9
+        print_result(single_ok, "Un solo fold: intervalo degenerado")
+        
+        # Folds entrenados en procesos separados sobre un problema separable
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(300, 3))
+        y = (X[:, 0] + 0.5 * X[:, 1] > 0).astype(int)
+        hyperparameters = {'units_layer_1': 8, 'activation_layer_1': 'relu', 'dropout_1': 0.0, 'num_layers': 0, 'learning_rate': 0.01}
+        result = cross_validate(X, y, [hyperparameters], n_splits=3, epochs=20, patience=5)[0]
+        folds_ok = result['n_splits'] == 3 and len(result['auc']['folds']) == 3 and len(result['epochs']) == 3
+        print_result(folds_ok, f"3 folds evaluados (épocas {result['epochs']})")
+        auc_ok = result['auc']['mean'] > 0.9 and result['auc']['ci_low'] <= result['auc']['mean'] <= result['auc']['ci_high']
+        print_result(auc_ok, f"AUC media {result['auc']['mean']:.4f} dentro de su IC")
+        
+        return summary_ok and single_ok and folds_ok and auc_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_preprocessing_json():
+    """Test del preprocesamiento sin sklearn: preprocessing.json reproduce StandardScaler y LabelEncoder"""
+    print_test_header("Preprocesamiento JSON")
+    
+    try:
+        import numpy as np
+        import pandas as pd
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        from preprocessing import load_preprocessing
+        from train_model import export_preprocessing
+        
+        df = pd.read_csv(os.path.join(BASE_DIR, 'data', 'liver_cancer_data_clean.csv'))
+        feature_names = [col for col in df.columns if col != 'liver_cancer']
+        sk_encoders = {}
+        for col in ['gender', 'alcohol_consumption', 'smoking_status', 'physical_activity_level']:
+            sk_encoders[col] = LabelEncoder().fit(df[col])
+        X = df[feature_names].copy()
+        for col, encoder in sk_encoders.items():
+            X[col] = encoder.transform(X[col])
+        sk_scaler = StandardScaler().fit(X.values)
+        
+        with tempfile.TemporaryDirectory() as work_dir:
+            params_path = os.path.join(work_dir, 'preprocessing.json')
+            export_preprocessing(sk_scaler, feature_names, sk_encoders, params_path)
+            scaler, encoders, loaded_names = load_preprocessing(params_path)
+            
+            # Versión no soportada: se rechaza en lugar de aplicar parámetros mal interpretados
+            with open(params_path) as f:
+                params = json.load(f)
+            params['format'] = 99
+            with open(params_path, 'w') as f:
+                json.dump(params, f)
+            try:
+                load_preprocessing(params_path)
+                format_checked = False
+            except ValueError:
+                format_checked = True
+        
+        names_ok = loaded_names == feature_names and set(encoders) == set(sk_encoders)
+        print_result(names_ok, f"{len(loaded_names)} features y {len(encoders)} encoders cargados")
+        
+        codes_ok = all(
+            np.array_equal(encoders[col].transform(df[col].tolist()), sk_encoders[col].transform(df[col]))
+            for col in sk_encoders
+        )
+        print_result(codes_ok, "Códigos idénticos a LabelEncoder en todo el dataset")
+        
+        max_diff = float(np.max(np.abs(scaler.transform(X.values) - sk_scaler.transform(X.values))))
+        scaled_ok = max_diff < 1e-12
+        print_result(scaled_ok, f"Escalado igual a StandardScaler (máx. diferencia {max_diff:.2e})")
+        
+        try:
+            encoders['gender'].transform(['Otro'])
+            unknown_rejected = False
+        except ValueError as e:
+            unknown_rejected = 'Otro' in str(e)
+        try:
+            encoders['gender'].transform([['Male']])
+            unknown_rejected = False
+        except ValueError:
+            pass
+        print_result(unknown_rejected, "Categoría desconocida o no hashable rechazada con ValueError")
+        
+        # En la API un valor no hashable es un 400 de datos inválidos, no un 500
+        response = requests.post(f"{API_URL}/predict/batch", json={"patients": [{**SAMPLE_PATIENT, "gender": ["Male"]}]})
+        api_rejected = response.status_code == 400 and response.json().get('error') == 'Datos inválidos'
+        print_result(api_rejected, f"gender como lista: status {response.status_code} (esperado 400)")
+        print_result(format_checked, "Formato de preprocessing.json no soportado rechazado")
+        
+        return names_ok and codes_ok and scaled_ok and unknown_rejected and api_rejected and format_checked
+        
+    except ImportError as e:
+        print(f"{Colors.WARNING}scikit-learn no instalado ({e}), se omite la comparación{Colors.ENDC}")
+        return True
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_data_cleaning():
+    """Test del pipeline de limpieza por bloques: correcciones, descartes y reproducción del CSV limpio"""
+    print_test_header("Limpieza de Datos")
+    
+    try:
+        from data_cleaning import COLUMNS, clean_dataset
+        
+        with tempfile.TemporaryDirectory() as work_dir:
+            # El dataset crudo del repositorio se reproduce exactamente
+            output_path = os.path.join(work_dir, 'clean.csv')
+            report = clean_dataset(os.path.join(BASE_DIR, 'data', 'liver_cancer_data.csv'), output_path, None)
+            with open(output_path, 'rb') as produced, open(os.path.join(BASE_DIR, 'data', 'liver_cancer_data_clean.csv'), 'rb') as expected:
+                reproduced = produced.read() == expected.read()
+            print_result(reproduced, f"CSV limpio reproducido: {report['rows_written']} de {report['rows_read']} filas")
+            
+            # Bloques de 2 filas: el duplicado cae en otro bloque que su original
+            rows = [
+                ['55', 'Male', '28.5', 'Regular', 'Former', '0', '0', '65.5', '15.3', '1', '1', 'Moderate', '0', '1'],
+                ['40', 'Female', '22', 'Never', 'Never', '0', '0', '80', '3', '0', '0', 'High', '0', '0'],
+                ['40', 'Female', '22', 'Never', 'Never', '0', '0', '80', '3', '0', '0', 'High', '0', '0'],
+                ['55,6', 'm', '28,5', 'regular', 'ex', 'no', '0', '65.5 U/L', '15.3', 'si', '1', 'media', '0', '1'],
+                ['150', 'Female', '22', 'Never', 'Never', '0', '0', '80', '3', '0', '0', 'High', '0', '0'],
+                ['60', 'Otro', '22', 'Never', 'Never', '0', '0', '80', '3', '0', '0', 'High', '0', '0'],
+                ['61', 'Female', '', 'Never', 'Never', '0', '0', '80', '3', '0', '0', 'High', '0', '0']
+            ]
+            raw_path = os.path.join(work_dir, 'raw.csv')
+            with open(raw_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                writer.writerows(rows)
+            messy_path = os.path.join(work_dir, 'messy_clean.csv')
+            report = clean_dataset(raw_path, messy_path, None, chunk_size=2)
+            with open(messy_path, newline='', encoding='utf-8') as f:
+                cleaned = list(csv.DictReader(f))
+            
+            dropped_ok = report['dropped'] == {'missing_or_invalid': 3, 'duplicates': 1, 'outliers': 0} and report['chunks'] == 4
+            print_result(dropped_ok, f"Descartes: {report['dropped']}")
+            fixes_ok = report['fixes'] == {'decimal_comma': 2, 'stray_characters': 1, 'category_alias': 4, 'binary_alias': 2, 'age_rounded': 1}
+            print_result(fixes_ok, f"Correcciones: {report['fixes']}")
+            invalid_ok = report['out_of_range'] == {'age': 1} and report['invalid_values'] == {'age': 1, 'gender': 1, 'bmi': 1}
+            print_result(invalid_ok, f"Inválidos: {report['invalid_values']}, fuera de rango: {report['out_of_range']}")
+            repaired = cleaned[2] if len(cleaned) == 3 else {}
+            repaired_ok = (repaired.get('age'), repaired.get('gender'), repaired.get('bmi'), repaired.get('smoking_status'),
+                repaired.get('liver_function_score'), repaired.get('cirrhosis_history')) == ('56', 'Male', '28.5', 'Former', '65.5', '1')
+            print_result(repaired_ok, f"Fila reparada: {repaired}")
+        
+        return reproduced and dropped_ok and fixes_ok and invalid_ok and repaired_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
+def test_artifact_manifest():
+    """Test de la verificación de artefactos contra el manifiesto de entrenamiento"""
+    print_test_header("Manifiesto de Artefactos")
+    
+    try:
+        from artifact_manifest import verify_artifacts
+        from run_manifest import MANIFEST_NAME, RunManifest
+        
+        # Los artefactos servidos coinciden con la última ejecución registrada
+        artifacts = requests.get(f"{API_URL}/health").json().get('artifacts')
+        served_ok = artifacts is None or artifacts['verified'] is not False
+        print_result(served_ok, f"Artefactos servidos verificados: {artifacts and artifacts['verified']}")
+        
+        with tempfile.TemporaryDirectory() as model_dir:
+            data_path = os.path.join(model_dir, 'data.csv')
+            artifact_path = os.path.join(model_dir, 'model.bin')
+            with open(data_path, 'w') as f:
+                f.write("age,liver_cancer\n55,1\n")
+            with open(artifact_path, 'wb') as f:
+                f.write(b"pesos")
+            manifest_path = os.path.join(model_dir, MANIFEST_NAME)
+            
+            RunManifest('train', {}, {'data': data_path}, 42).save(model_dir)
+            intact = verify_artifacts(manifest_path, [artifact_path])['verified'] is True
+            print_result(intact, "Artefacto intacto verificado")
+            
+            # Otro modo sobrescribe run_manifest.json: el entrenamiento idéntico sigue omitiéndose
+            RunManifest('export_policy', {}, {'data': data_path}, 42).save(model_dir)
+            skipped = RunManifest('train', {}, {'data': data_path}, 42).is_up_to_date(model_dir)
+            print_result(skipped, "Entrenamiento sin cambios omitido tras otro modo")
+            
+            changed_config = not RunManifest('train', {'epochs': 10}, {'data': data_path}, 42).is_up_to_date(model_dir)
+            print_result(changed_config, "Cambio de configuración: se vuelve a ejecutar")
+            
+            unlisted_path = os.path.join(model_dir, 'extra.bin')
+            with open(unlisted_path, 'wb') as f:
+                f.write(b"ajeno")
+            with open(artifact_path, 'ab') as f:
+                f.write(b"!")
+            status = verify_artifacts(manifest_path, [artifact_path, unlisted_path])
+            tampered = status['verified'] is False and status['mismatched'] == ['model.bin'] and status['unlisted'] == ['extra.bin']
+            print_result(tampered, f"Artefacto modificado detectado: distintos {status['mismatched']}, fuera del manifiesto {status['unlisted']}")
+            stale = not RunManifest('train', {}, {'data': data_path}, 42).is_up_to_date(model_dir)
+            print_result(stale, "Artefacto modificado: no se omite el entrenamiento")
+            
+            os.remove(manifest_path)
+            missing = verify_artifacts(manifest_path, [artifact_path])['verified'] is None
+            print_result(missing, "Sin manifiesto: verified es None")
+        
+        # --distill-only reescribe el estudiante: no puede formar parte de su huella
+        from train_model import manifest_inputs
+        with tempfile.TemporaryDirectory() as model_dir:
+            data_path = os.path.join(model_dir, 'data.csv')
+            for name, content in (('data.csv', b"age\n55\n"), ('liver_cancer_model.keras', b"mlp"), ('preprocessing.json', b"{}")):
+                with open(os.path.join(model_dir, name), 'wb') as f:
+                    f.write(content)
+            
+            # Primera ejecución: escribe el estudiante y guarda el manifiesto
+            manifest = RunManifest('distill', {}, manifest_inputs('distill', model_dir, data_path, None), 42)
+            with open(os.path.join(model_dir, 'liver_cancer_student.keras'), 'wb') as f:
+                f.write(b"estudiante")
+            manifest.save(model_dir)
+            repeated = RunManifest('distill', {}, manifest_inputs('distill', model_dir, data_path, None), 42).is_up_to_date(model_dir)
+            export_reads_student = 'student' in manifest_inputs('export', model_dir, data_path, None)
+            distill_ok = repeated and export_reads_student and 'student' not in manifest_inputs('distill', model_dir, data_path, None)
+            print_result(distill_ok, "--distill-only repetido se omite; el estudiante solo es entrada de los exports")
+        
+        return served_ok and intact and skipped and changed_config and tampered and stale and missing and distill_ok
+        
+    except Exception as e:
+        print_result(False, f"Error: {str(e)}")
+        return False
+
 def run_all_tests():
     """Ejecuta todos los tests"""
     print(f"\n{Colors.BOLD}{Colors.HEADER}🧪 INICIANDO SUITE DE TESTS DE LA API{Colors.ENDC}")
@@ -303,7 +1240,25 @@ def run_all_tests():
         ("Predicción Alto Riesgo", test_prediction_high_risk),
         ("Datos Inválidos", test_invalid_data),
         ("Features Endpoint", test_features_endpoint),
-        ("Casos Límite", test_edge_cases)
+        ("Casos Límite", test_edge_cases),
+        ("Predicción por Lotes", test_batch_prediction),
+        ("Lote con Paciente Inválido", test_batch_invalid_patient),
+        ("Cuerpos Mal Formados", test_malformed_payloads),
+        ("Paridad App Asíncrona", test_async_parity),
+        ("Control de Admisión", test_admission_control),
+        ("Explicación", test_explain),
+        ("What-If", test_whatif),
+        ("Drift", test_drift),
+        ("Monitor de Drift", test_drift_monitor),
+        ("Detección OOD", test_ood),
+        ("Política de Decisión", test_policy),
+        ("CSV de Predicciones", test_predictions_log),
+        ("Trazas y Profiler", test_tracing_and_profiler),
+        ("Logging en /metrics", test_logging_metrics),
+        ("Validación Cruzada", test_cross_validation),
+        ("Preprocesamiento JSON", test_preprocessing_json),
+        ("Limpieza de Datos", test_data_cleaning),
+        ("Manifiesto de Artefactos", test_artifact_manifest)
     ]
     
     results = []